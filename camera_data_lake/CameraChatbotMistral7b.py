@@ -1,6 +1,9 @@
 import streamlit as st
 from chatbot_base import ChatbotBase
-from langchain_community.chat_models import ChatOllama
+import llm_clients
+from model_compare import compare_models
+from perf_trace import span
+from session_memory import session_values
 
 class CameraChatbotMistral7b(ChatbotBase):
     def __init__(self):
@@ -15,13 +18,11 @@ class CameraChatbotMistral7b(ChatbotBase):
         self.selected_model = "mistral:7b"
         self.temperature = 0.7  # 기본 temperature 값
         self.llm = None
-    
+        self.compare_models = []  # 비교 모드에서 동시에 질문할 모델 목록
+
     def initialize_llm(self):
-        """선택된 모델과 temperature로 LLM 초기화"""
-        self.llm = ChatOllama(
-            model=self.selected_model,
-            temperature=self.temperature
-        )
+        """선택된 모델과 temperature의 LLM을 프로세스 공용 저장소에서 가져옴 (없을 때만 생성)"""
+        self.llm = llm_clients.get_ollama_chat(self.selected_model, self.temperature)
 
     def render(self):
         st.header("💬 OpenSource Chatbot")
@@ -59,19 +60,31 @@ class CameraChatbotMistral7b(ChatbotBase):
             # 현재 설정 정보 표시
             st.info(f"Model: {self.selected_model}\nTemperature: {self.temperature}")
             
-            # 모델이나 temperature가 변경되면 LLM 재초기화
-            settings_changed = (
-                st.session_state.get('last_model') != self.selected_model or
-                st.session_state.get('last_temperature') != self.temperature
-            )
-            
-            if not self.llm or settings_changed:
-                self.initialize_llm()
-                st.session_state['last_model'] = self.selected_model
-                st.session_state['last_temperature'] = self.temperature
+            # 탭 객체는 세션마다 따로 있으므로 LLM은 공용 저장소에서 재사용하여 여러 세션이 같은 클라이언트를 공유
+            self.initialize_llm()
+
+            # 비교 모드: 같은 질문을 여러 모델에 동시에 보내 결과를 나란히 비교
+            # (탭 객체는 세션 동안 유지되므로 체크를 해제하면 비교 목록도 비움)
+            self.compare_models = []
+            if st.checkbox("모델 비교 모드", key="compare_mode"):
+                self.compare_models = st.multiselect(
+                    "비교할 모델", self.available_models, default=self.available_models[:2], key="compare_models"
+                )
 
-        # 파일 선택 (ChatbotBase에서 제공)
+            # 선택된 모델을 미리 로드하여 첫 질문에서 모델 로드 시간을 기다리지 않도록 함
+            warmup = llm_clients.warm_up_ollama(self.selected_model)
+            if warmup["status"] == "loading":
+                st.caption("⏳ 모델을 메모리에 로드하는 중...")
+            elif warmup["status"] == "ready":
+                st.caption("✅ 모델 로드 완료")
+            else:
+                st.caption(f"⚠️ 모델 미리 로드 실패: {warmup['error']}")
+
+        # 파일 선택, 응답 캐시, 코드 검색, 로그 설정 (ChatbotBase에서 제공)
         self.select_file()
+        self.cache_settings()
+        self.rag_settings()
+        self.log_settings()
 
         # 세션 상태에 메시지 저장소가 없으면 초기화
         self.initialize_messages()
@@ -81,24 +94,67 @@ class CameraChatbotMistral7b(ChatbotBase):
 
         # 사용자 질문 입력 처리
         if prompt := st.chat_input():
+            if len(self.compare_models) >= 2:
+                self.render_comparison(self.prepare_combined_prompt(prompt))
+                return
+
+            # 같은 질문의 캐시된 응답이 있으면 바로 표시
+            if self.answer_from_cache(prompt, self.selected_model, self.temperature):
+                return
+
             # 파일 내용을 포함한 질문 생성 (ChatbotBase에서 제공)
             combined_prompt = self.prepare_combined_prompt(prompt)
 
-            # 질문에 대한 응답 생성 (파일 내용 기반)
-            response = self.generate_response(combined_prompt)
+            # 질문에 대한 응답을 스트리밍으로 생성하여 화면에 표시하고 대화 기록에 추가 (파일 내용 기반)
+            response = self.stream_response(self.generate_response(combined_prompt))
+            self.store_in_cache(prompt, self.selected_model, self.temperature, response)
 
-            # 응답을 화면에 표시하고 대화 기록에 추가
-            st.session_state["messages"].append({"role": "assistant", "content": response})
-            st.chat_message("assistant").write(response)
+    def render_comparison(self, messages):
+        """
+        선택된 모델들에 같은 질문을 asyncio로 동시에 보내고, 응답을 나란히 스트리밍하며 모델별 지연/처리량을 표시하는 함수
+        Args:
+            messages: prepare_combined_prompt 결과
+        """
+        llms = {model: llm_clients.get_ollama_chat(model, self.temperature) for model in self.compare_models}
+
+        with st.chat_message("assistant"):
+            columns = st.columns(len(llms))
+            placeholders = {}
+            for column, model in zip(columns, llms):
+                column.markdown(f"**{model}**")
+                placeholders[model] = column.empty()
+
+            with span("llm.compare", models=len(llms)):
+                results = compare_models(llms, messages, on_update=lambda model, text: placeholders[model].markdown(text))
+
+            for column, result in zip(columns, results):
+                column.caption(self.format_metrics(result))
+
+        # 대화 기록에는 모델별 응답을 구분하여 하나의 메시지로 저장
+        combined = "\n\n".join(f"**{result['model']}**\n\n{result['response']}" for result in results)
+        session_values()["messages"].append({"role": "assistant", "content": combined})
 
     def generate_response(self, user_prompt):
         """
-        선택된 Ollama 모델을 사용하여 응답을 생성하는 함수
+        선택된 Ollama 모델을 사용하여 응답을 스트리밍으로 생성하는 함수
         Args:
             user_prompt: 사용자가 입력한 질문
+        Yields:
+            str: 응답 텍스트 조각
         """
         try:
-            response = self.llm.invoke(user_prompt)
-            return response.content
+            for chunk in self.llm.stream(user_prompt):
+                if chunk.content:
+                    yield chunk.content
         except Exception as e:
-            return f"Error: {str(e)}"
\ No newline at end of file
+            yield f"Error: {str(e)}"
+
+    def summarize_history(self, text, max_tokens):
+        """오래된 대화를 선택된 Ollama 모델로 요약하는 함수 (TokenBudget에서 호출)"""
+        if self.llm is None:
+            return None
+        response = self.llm.invoke([
+            {"role": "system", "content": f"다음 대화를 이후 질문에 필요한 사실 위주로 {max_tokens} 토큰 이내로 간결하게 요약하세요."},
+            {"role": "user", "content": text},
+        ])
+        return response.content
@@ -1,67 +1,219 @@
 # TabFunctionMap.py
 import streamlit as st
-import pandas as pd
-import pickle
 import os
+import pandas as pd
+from df_query import DataFrameQuery
+from function_map_catalog import FunctionMapCatalog
+from call_graph import CallGraph
+from dir_catalog import get_directory_catalog
+from shared_cache import get_shared_cache
+
+
+@st.cache_resource
+def get_function_map_catalog(base_dir):
+    """프로세스 전체에서 공유하는 function_map 폴더 감시 catalog"""
+    return FunctionMapCatalog(base_dir, directory=get_directory_catalog(base_dir), cache=get_shared_cache()).start()
+
+
+@st.cache_resource(show_spinner="호출 그래프를 생성하는 중...")
+def load_call_graph(_data, file_path, mtime, caller_col, callee_col):
+    """
+    로드된 Function Map의 모든 시트에서 호출 그래프를 생성하는 함수 (파일/컬럼 조합별로 캐시)
+    """
+    tables = _data.values() if isinstance(_data, dict) else [_data]
+    frames = [table.df for table in tables if isinstance(table, DataFrameQuery)]
+    return CallGraph.from_dataframes(frames, caller_col, callee_col)
+
 
 class TabFunctionMap:
     def __init__(self, base_dir="./project/CDL/function_map"):
         self.base_dir = base_dir
+        self.catalog = get_function_map_catalog(base_dir)
 
     def render(self):
         st.header("📂 Function Map Loader (Pickle 파일)")
 
+        # 새 파일이 들어오면 열린 세션도 자동으로 새로고침
+        self.watch_catalog()
+
         # 현재 디렉토리 및 하위 디렉토리에서 피클 파일 목록 불러오기
         pickle_files = self.get_pickle_files_with_dirs()
 
         # 사이드바에서 피클 파일 선택
         selected_file = st.sidebar.selectbox("피클 파일 선택", pickle_files)
 
-        # 피클 파일 로드 버튼
+        # 피클 파일 로드 버튼 (페이징/필터 조작 시에도 유지되도록 세션에 기록)
         if st.sidebar.button("피클 파일 로드"):
-            try:
-                # 선택한 파일을 로드하여 데이터프레임 형식으로 출력
-                with open(selected_file, "rb") as f:
-                    data = pickle.load(f)
-
-                # 로드된 데이터가 여러 시트로 구성된 경우 (dict로 DataFrame이 저장된 경우)
-                if isinstance(data, dict):
-                    # 시트(탭) 목록 생성
-                    sheet_names = list(data.keys())
-                    tabs = st.tabs(sheet_names)
-
-                    # 각 시트(탭)에 데이터를 표시
-                    for i, sheet_name in enumerate(sheet_names):
-                        with tabs[i]:
-                            st.write(f"### {sheet_name} 데이터")
+            st.session_state['function_map_file'] = selected_file
+
+        loaded_file = st.session_state.get('function_map_file')
+        if not loaded_file:
+            return
+
+        try:
+            data = self.catalog.get(loaded_file)
+
+            # 로드된 데이터가 여러 시트로 구성된 경우 (dict로 DataFrame이 저장된 경우)
+            if isinstance(data, dict):
+                # 시트(탭) 목록 생성
+                sheet_names = list(data.keys())
+                tabs = st.tabs([str(name) for name in sheet_names])
+
+                # 각 시트(탭)에 데이터를 표시
+                for i, sheet_name in enumerate(sheet_names):
+                    with tabs[i]:
+                        st.write(f"### {sheet_name} 데이터")
+                        if isinstance(data[sheet_name], DataFrameQuery):
+                            self.render_table(data[sheet_name], key=f"fm_{i}")
+                        else:
                             st.dataframe(data[sheet_name])
 
-                # 로드된 데이터가 단일 DataFrame인 경우
-                elif isinstance(data, pd.DataFrame):
-                    st.write("### 데이터 프레임 미리보기")
-                    st.dataframe(data)
+            # 로드된 데이터가 단일 DataFrame인 경우
+            elif isinstance(data, DataFrameQuery):
+                st.write("### 데이터 프레임 미리보기")
+                self.render_table(data, key="fm_single")
+
+            else:
+                st.error("로드된 데이터는 데이터프레임 형식이 아닙니다.")
+                return
+
+            self.render_call_graph(loaded_file, data)
+
+        except Exception as e:
+            st.error(f"피클 파일을 로드하는 중 오류가 발생했습니다: {e}")
+
+    @staticmethod
+    def render_table(table, key):
+        """
+        서버 측에서 필터/정렬/페이징한 결과 페이지만 화면에 표시하는 함수 (다른 탭의 DataFrameQuery 표에도 사용)
+        Args:
+            table: DataFrameQuery 객체
+            key: 위젯 키 접두사 (시트마다 고유)
+        """
+        search = st.text_input("전체 검색", key=f"{key}_search")
+
+        col_filter, col_sort = st.columns(2)
+        with col_filter:
+            filter_columns = st.multiselect("필터 컬럼", table.columns, key=f"{key}_filter_cols")
+        with col_sort:
+            sort_columns = st.multiselect("정렬 컬럼 (선택 순서대로 우선)", table.columns, key=f"{key}_sort_cols")
+
+        filters = {}
+        for col in filter_columns:
+            index = table.indexes[col]
+            if index.is_string:
+                filters[col] = st.text_input(f"{col} 포함 문자열", key=f"{key}_filter_{col}")
+            else:
+                low_col, high_col = st.columns(2)
+                low = low_col.text_input(f"{col} 최소값", key=f"{key}_low_{col}")
+                high = high_col.text_input(f"{col} 최대값", key=f"{key}_high_{col}")
+                try:
+                    filters[col] = (
+                        pd.Series([low]).astype(index.uniques.dtype).iloc[0] if low else None,
+                        pd.Series([high]).astype(index.uniques.dtype).iloc[0] if high else None,
+                    )
+                except (ValueError, TypeError):
+                    st.warning(f"{col} 범위 값을 해석할 수 없습니다.")
+
+        sort_by = []
+        for col in sort_columns:
+            ascending = st.radio(
+                f"{col} 정렬", ["오름차순", "내림차순"], horizontal=True, key=f"{key}_order_{col}"
+            ) == "오름차순"
+            sort_by.append((col, ascending))
+
+        size_col, page_col = st.columns(2)
+        page_size = size_col.selectbox("페이지 크기", [50, 100, 500, 1000], index=1, key=f"{key}_page_size")
+
+        rows = table.select_rows(filters, sort_by, search)
+        total = len(rows)
+        n_pages = max((total - 1) // page_size + 1, 1)
+        # 필터 변경으로 페이지 수가 줄어든 경우 첫 페이지로 되돌림
+        if st.session_state.get(f"{key}_page", 1) > n_pages:
+            st.session_state[f"{key}_page"] = 1
+        page = page_col.number_input(
+            f"페이지 (1 ~ {n_pages})", min_value=1, max_value=n_pages, value=1, key=f"{key}_page"
+        )
+
+        page_df = table.page(rows, page - 1, page_size)
+        st.caption(f"전체 {len(table):,}행 중 {total:,}행 일치")
+        st.dataframe(page_df)
+
+    def render_call_graph(self, file_path, data):
+        """
+        호출 관계 컬럼을 선택하여 호출 그래프를 만들고, 탐색 결과와 주변 부분 그래프를 표시하는 함수
+        Args:
+            file_path: 로드된 피클 파일 경로
+            data: load_function_map 결과
+        """
+        tables = data.values() if isinstance(data, dict) else [data]
+        columns = sorted({col for table in tables if isinstance(table, DataFrameQuery) for col in table.columns})
+        if len(columns) < 2:
+            return
+
+        with st.expander("🔗 호출 그래프 분석"):
+            col_caller, col_callee = st.columns(2)
+            caller_col = col_caller.selectbox("호출하는 함수 컬럼 (caller)", columns, key="cg_caller_col")
+            callee_col = col_callee.selectbox("호출되는 함수 컬럼 (callee)", columns, index=1, key="cg_callee_col")
+            if caller_col == callee_col:
+                st.info("caller와 callee 컬럼을 다르게 선택하세요.")
+                return
 
-                else:
-                    st.error("로드된 데이터는 데이터프레임 형식이 아닙니다.")
+            mtime = self.catalog.entries.get(file_path, {}).get("mtime")
+            graph = load_call_graph(data, file_path, mtime, caller_col, callee_col)
+            st.caption(f"노드 {graph.n_nodes:,}개, 간선 {graph.n_edges:,}개")
+            if graph.n_nodes == 0:
+                return
 
-            except Exception as e:
-                st.error(f"피클 파일을 로드하는 중 오류가 발생했습니다: {e}")
+            pattern = st.text_input("함수 이름 검색", key="cg_pattern")
+            candidates = graph.find_nodes(pattern) if pattern else list(graph.names[:50])
+            if not candidates:
+                st.info("일치하는 함수가 없습니다.")
+                return
+            function = st.selectbox("함수 선택", candidates, key="cg_function")
+
+            col_up, col_down = st.columns(2)
+            with col_up:
+                st.write("**Callers**")
+                st.write(graph.callers(function))
+            with col_down:
+                st.write("**Callees**")
+                st.write(graph.callees(function))
+
+            col_depth, col_nodes = st.columns(2)
+            depth = col_depth.slider("탐색 깊이", 1, 5, 2, key="cg_depth")
+            max_nodes = col_nodes.number_input("최대 노드 수", 10, 1000, 100, key="cg_max_nodes")
+            nodes, edges = graph.neighborhood(function, depth=depth, max_nodes=max_nodes)
+            st.graphviz_chart(graph.to_dot(nodes, edges, highlight=function))
+
+            reach_down = graph.reachable(function)
+            reach_up = graph.reachable(function, reverse=True)
+            st.write(f"전이적으로 호출하는 함수 {len(reach_down):,}개, 전이적으로 호출되는 함수 {len(reach_up):,}개")
+
+            target = st.selectbox("최단 호출 경로 대상", [""] + [name for name, _ in reach_down[:1000]], key="cg_target")
+            if target:
+                st.write(" → ".join(graph.shortest_path(function, target)))
+
+            if st.checkbox("순환 호출(SCC) 표시", key="cg_show_cycles"):
+                cycles = graph.cycles()
+                st.write(f"순환 호출 그룹 {len(cycles)}개")
+                for group in cycles[:20]:
+                    st.write(", ".join(group[:50]))
+
+    @st.fragment(run_every=5)
+    def watch_catalog(self):
+        """
+        catalog의 version이 바뀌었으면 전체 화면을 다시 실행하여 파일 목록과 데이터를 갱신하는 함수
+        """
+        seen = st.session_state.get('function_map_catalog_version')
+        st.session_state['function_map_catalog_version'] = self.catalog.version
+        if seen is not None and seen != self.catalog.version:
+            st.rerun()
 
     def get_pickle_files_with_dirs(self):
         """
-        현재 디렉토리 및 하위 디렉토리에서 피클 파일 목록을 반환하는 함수
+        감시 중인 catalog에서 피클 파일 목록을 반환하는 함수 (요청 처리 중 디스크를 탐색하지 않음)
         Returns:
             list: 피클 파일의 전체 경로 목록
         """
-        pickle_files = []
-        try:
-            # 재귀적으로 디렉토리와 하위 디렉토리 탐색
-            for root, dirs, files in os.walk(self.base_dir):
-                for file in files:
-                    if file.endswith('.pkl') or file.endswith('.pickle'):
-                        full_path = os.path.join(root, file)
-                        pickle_files.append(full_path)
-            return pickle_files
-        except Exception as e:
-            st.error(f"피클 파일 목록을 불러오는 중 오류가 발생했습니다: {e}")
-            return []
+        return self.catalog.files()
@@ -1,10 +1,13 @@
 import streamlit as st
 from chatbot_base import ChatbotBase
-from openai import OpenAI
+from llm_clients import get_openai_client
 
 class TabGPTChatbot(ChatbotBase):
     def __init__(self):
         super().__init__()
+        self.openai_api_key = None
+        self.model = "gpt-3.5-turbo"
+        self.temperature = 1.0  # OpenAI 기본값
 
     def render(self):
         st.header("💬 Chatbot (GPT)")
@@ -17,8 +20,11 @@ class TabGPTChatbot(ChatbotBase):
             value=""
             )
 
-        # 파일 선택 (ChatbotBase에서 제공)
+        # 파일 선택, 응답 캐시, 코드 검색, 로그 설정 (ChatbotBase에서 제공)
         self.select_file()
+        self.cache_settings()
+        self.rag_settings()
+        self.log_settings()
 
         # 세션 상태에 메시지 저장소가 없으면 초기화
         self.initialize_messages()
@@ -32,30 +38,53 @@ class TabGPTChatbot(ChatbotBase):
                 st.info("Please add your OpenAI API key to continue.")
                 st.stop()
 
+            self.openai_api_key = openai_api_key
+
+            # 같은 질문의 캐시된 응답이 있으면 바로 표시
+            if self.answer_from_cache(prompt, self.model, self.temperature):
+                return
+
             # 파일 내용을 포함한 질문 생성 (ChatbotBase에서 제공)
             combined_prompt = self.prepare_combined_prompt(prompt)
 
-            # 질문에 대한 응답 생성 (파일 내용 기반)
-            response = self.generate_response(openai_api_key, combined_prompt)
-
-            # GPT 응답을 화면에 표시하고 대화 기록에 추가
-            st.session_state["messages"].append({"role": "assistant", "content": response})
-            st.chat_message("assistant").write(response)
+            # 질문에 대한 응답을 스트리밍으로 생성하여 화면에 표시하고 대화 기록에 추가 (파일 내용 기반)
+            response = self.stream_response(self.generate_response(openai_api_key, combined_prompt))
+            self.store_in_cache(prompt, self.model, self.temperature, response)
 
     def generate_response(self, openai_api_key, user_prompt):
         """
-        OpenAI GPT 모델을 사용하여 응답을 생성하는 함수
+        OpenAI GPT 모델을 사용하여 응답을 스트리밍으로 생성하는 함수
         Args:
             api_key: OpenAI API 키
             user_prompt: 사용자가 입력한 질문
+        Yields:
+            str: 응답 텍스트 조각
         """
-        client = OpenAI(api_key=openai_api_key)
+        client = get_openai_client(openai_api_key)
 
         try:
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=user_prompt
+            stream = client.chat.completions.create(
+                model=self.model,
+                messages=user_prompt,
+                stream=True
             )
-            return response.choices[0].message.content
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
         except Exception as e:
-            return f"Error: {str(e)}"
+            yield f"Error: {str(e)}"
+
+    def summarize_history(self, text, max_tokens):
+        """오래된 대화를 GPT로 요약하는 함수 (TokenBudget에서 호출)"""
+        if not self.openai_api_key:
+            return None
+        client = get_openai_client(self.openai_api_key)
+        response = client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": "다음 대화를 이후 질문에 필요한 사실 위주로 간결하게 요약하세요."},
+                {"role": "user", "content": text},
+            ],
+            max_tokens=max_tokens
+        )
+        return response.choices[0].message.content
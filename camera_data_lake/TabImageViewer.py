@@ -1,6 +1,9 @@
+import hashlib
 import streamlit as st
 import numpy as np
 import cv2
+from perf_trace import span
+from shared_cache import get_shared_cache
 
 def decode_raw10_packed(data, width, height, stride):
     # For RAW10, stride is typically width * 10 / 8 = width * 5 / 4
@@ -487,7 +490,12 @@ class TabImageViewer:
 
             if decoder_func:
                 with st.spinner(f"Decoding {image_format} image..."):
-                    image_to_display = decoder_func(file_data, width, height, stride)
+                    with span("image.decode", format=image_format, bytes=len(file_data)):
+                        # 같은 파일/설정의 디코딩 결과는 모든 서버 프로세스가 공유 캐시(mmap)에서 재사용
+                        key = f"{hashlib.sha256(file_data).hexdigest()}|{image_format}|{width}x{height}|{stride}"
+                        image_to_display = get_shared_cache().get_or_compute(
+                            "image_decode", key, lambda: decoder_func(file_data, width, height, stride)
+                        )
                     if image_to_display is not None:
                         st.image(image_to_display, caption=f"Decoded Image ({image_format})", use_column_width=True)
             else:
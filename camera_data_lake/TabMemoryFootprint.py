@@ -3,6 +3,83 @@ import streamlit as st
 import json
 import json_utils as ju  # JSON 관련 유틸리티
 import os
+import numpy as np
+import c_struct
+from df_query import DataFrameQuery
+from dir_catalog import get_directory_catalog
+from perf_trace import span
+from session_memory import session_values
+from artifact_store import download_artifact
+from shared_cache import get_shared_cache
+from storage import get_storage
+from symbol_index import SymbolIndex, parse_addresses
+from TabFunctionMap import TabFunctionMap
+
+DUMP_EXTENSIONS = ('.bin', '.dump', '.dmp', '.mem', '.raw', '.img')
+HEADER_EXTENSIONS = ('.h', '.hpp')
+BUILD_EXTENSIONS = ('.elf', '.axf', '.out', '.so', '.map')
+
+DEFAULT_STRUCT_DEFINITIONS = """#define META_RING_LEN 16
+
+typedef enum { CAM_IDLE, CAM_STREAMING, CAM_ERROR = 0x80 } cam_state_t;
+
+typedef struct {
+    uint32_t frame_id;
+    uint64_t timestamp_us;
+    uint16_t width, height;
+    uint32_t exposure_us;
+    float    analog_gain;
+    uint8_t  sensor_id : 4;
+    uint8_t  hdr_mode  : 2;
+    uint8_t  valid     : 1;
+    cam_state_t state;
+    void    *buffer;
+} cam_meta_t;
+
+typedef struct {
+    uint32_t head;
+    uint32_t tail;
+    cam_meta_t entries[META_RING_LEN];
+} cam_meta_ring_t;
+"""
+
+
+@st.cache_resource(max_entries=16)
+def parse_definitions(definitions, byteorder, pointer_size):
+    """구조체 정의 해석 결과 (정의/옵션 조합별로 캐시)"""
+    return c_struct.parse_structs(definitions, byteorder=byteorder, pointer_size=pointer_size, long_size=pointer_size)
+
+
+@st.cache_resource(max_entries=4, show_spinner="덤프를 구조체로 해석하는 중...")
+def load_struct_table(dump_path, size, mtime, definitions, type_name, offset, count, address, byteorder, pointer_size):
+    """
+    메모리 덤프를 mmap으로 열고 offset 위치에 구조체 배열을 겹쳐 해석한 표 (덤프 크기/수정 시각이 바뀌면 다시 해석)
+    Returns:
+        (DataFrameQuery, list): 표, 원소를 생략한 배열 멤버 이름 목록
+    """
+    ctype = parse_definitions(definitions, byteorder, pointer_size)[type_name]
+    # 네트워크 경로의 덤프는 로컬 캐시에 받은 뒤 mmap (열어 둔 매핑은 캐시에서 삭제되어도 유지됨)
+    with get_storage().open_local(dump_path) as (local_path, _):
+        dump = np.memmap(local_path, mode="r")
+    with span("struct.decode", type=type_name) as attrs:
+        records = c_struct.overlay(dump, ctype, offset, count)
+        frame, truncated = c_struct.records_to_frame(records, ctype, address)
+        attrs["records"] = len(records)
+    return DataFrameQuery(frame), truncated
+
+
+@st.cache_resource(max_entries=4, show_spinner="심볼 인덱스를 만드는 중...")
+def get_symbol_index(build_path, checksum):
+    """
+    빌드 파일(ELF/링커 맵) 내용별 주소 -> 심볼 인덱스
+    다른 서버 프로세스가 같은 빌드로 이미 만든 인덱스는 공유 캐시에서 가져온다.
+    """
+    def build():
+        with get_storage().open_local(build_path) as (local_path, _):
+            return SymbolIndex.load(local_path)
+
+    return get_shared_cache().get_or_compute("symbol_index", checksum, build)
+
 
 class TabMemoryFootprint:
     def __init__(self):
@@ -28,20 +105,16 @@ class TabMemoryFootprint:
         # JSON 저장 버튼 (현재 탭의 JSON 저장)
         if st.sidebar.button("JSON 저장"):
             json_filename = f"{base_file_name}.json"
-            json_data = st.session_state.get(f'json_input_{self.current_tab_key}')
+            json_data = session_values().get(f'json_input_{self.current_tab_key}')
             if json_data:
                 ju.save_json(json_filename, json_data, selected_folder)
  
-        # JSON 파일 다운로드 버튼
+        # JSON 파일 다운로드 버튼 (파일을 rerun마다 다시 읽지 않고 저장소의 내용을 사용)
         json_path = os.path.join(selected_folder, f"{base_file_name}.json")
-        if os.path.exists(json_path):
-            with open(json_path, "r") as file:
-                st.sidebar.download_button(
-                    label="Download JSON",
-                    data=file.read(),
-                    file_name=f"{base_file_name}.json",
-                    mime="application/json"
-                )
+        download_artifact(json_path, "Download JSON", "application/json")
+
+        self.render_struct_overlay(selected_folder)
+        self.render_symbol_resolver(selected_folder)
 
         st.header("메모리 데이터 에디터")
 
@@ -63,3 +136,115 @@ class TabMemoryFootprint:
 
         # 현재 탭을 "tab2"으로 설정
         st.session_state['current_tab_key'] = self.current_tab_key
+
+    def render_struct_overlay(self, selected_folder):
+        """
+        선택한 폴더의 메모리 덤프 위에 C 구조체 배열을 겹쳐 해석하고 필터/정렬 가능한 표로 표시하는 함수
+        Args:
+            selected_folder: 덤프와 헤더(.h) 파일을 찾을 폴더
+        """
+        with st.expander("🧩 구조체 오버레이 (메모리 덤프)"):
+            dumps = self.folder_files(selected_folder, DUMP_EXTENSIONS)
+            headers = self.folder_files(selected_folder, HEADER_EXTENSIONS)
+            if not dumps:
+                st.info(f"{selected_folder} 폴더에 덤프 파일({', '.join(DUMP_EXTENSIONS)})이 없습니다.")
+                return
+
+            col_dump, col_header = st.columns(2)
+            dump_file = col_dump.selectbox("덤프 파일", dumps, key="struct_dump")
+            header = col_header.selectbox("구조체 정의", ["직접 입력"] + headers, key="struct_header")
+            if header == "직접 입력":
+                definitions = st.text_area(
+                    "C 구조체 정의", DEFAULT_STRUCT_DEFINITIONS, height=300, key="struct_definitions"
+                )
+            else:
+                definitions = get_storage().read(os.path.join(selected_folder, header)).decode("utf-8", errors="replace")
+
+            col_order, col_pointer = st.columns(2)
+            byteorder = "<" if col_order.radio(
+                "Byte order", ["little endian", "big endian"], horizontal=True, key="struct_byteorder"
+            ) == "little endian" else ">"
+            pointer_size = col_pointer.radio("포인터 크기", [4, 8], horizontal=True, key="struct_pointer_size")
+
+            try:
+                types = parse_definitions(definitions, byteorder, pointer_size)
+            except c_struct.CStructError as e:
+                st.error(f"구조체 정의 해석 오류: {e}")
+                return
+            if not types:
+                st.info("struct/union 정의가 없습니다.")
+                return
+
+            type_name = st.selectbox(
+                "구조체", list(types), key="struct_type",
+                format_func=lambda name: f"{name} ({types[name].size}B)",
+            )
+            col_base, col_address, col_count = st.columns(3)
+            base_text = col_base.text_input("덤프 시작 주소", "0x0", key="struct_base")
+            address_text = col_address.text_input("구조체 주소", "0x0", key="struct_address")
+            count = col_count.number_input("레코드 수", min_value=1, max_value=1_000_000, value=1000, key="struct_count")
+            try:
+                base, address = int(base_text, 0), int(address_text, 0)
+            except ValueError:
+                st.error("주소는 0x로 시작하는 16진수 또는 10진수로 입력하세요.")
+                return
+
+            dump_path = os.path.join(selected_folder, dump_file)
+            size, mtime = get_storage().backend.stat(dump_path)
+            try:
+                table, truncated = load_struct_table(
+                    dump_path, size, mtime, definitions, type_name, address - base, count, address, byteorder, pointer_size
+                )
+            except c_struct.CStructError as e:
+                st.error(str(e))
+                return
+
+            st.caption(
+                f"{type_name}: {types[type_name].size}B x {len(table):,}개 "
+                f"({address:#x} ~ {address + types[type_name].size * len(table):#x}, 덤프 {size:,}B)"
+            )
+            if truncated:
+                st.caption(f"배열 원소는 앞의 일부만 표시: {', '.join(truncated)}")
+            TabFunctionMap.render_table(table, key="struct_overlay")
+
+    def render_symbol_resolver(self, selected_folder):
+        """
+        붙여넣거나 업로드한 주소 목록(크래시 로그 포함)을 선택한 빌드의 심볼+오프셋과 섹션으로 한 번에 변환하는 함수
+        Args:
+            selected_folder: 빌드 파일(ELF/링커 맵)을 찾을 폴더
+        """
+        with st.expander("📍 주소 → 심볼 변환"):
+            builds = self.folder_files(selected_folder, BUILD_EXTENSIONS)
+            if not builds:
+                st.info(f"{selected_folder} 폴더에 빌드 파일({', '.join(BUILD_EXTENSIONS)})이 없습니다.")
+                return
+
+            build = st.selectbox("빌드 (ELF/링커 맵)", builds, key="symbol_build")
+            text = st.text_area("주소 목록 또는 크래시 로그", height=150, key="symbol_addresses")
+            uploaded = st.file_uploader("주소/로그 파일 업로드", key="symbol_upload")
+            if uploaded is not None:
+                text = f"{text}\n{uploaded.getvalue().decode('utf-8', errors='replace')}"
+            addresses = parse_addresses(text)
+            if not len(addresses):
+                st.caption("0x로 시작하는 주소(또는 a-f가 들어간 8/16자리 16진수, pc/lr/#NN 뒤의 값)를 붙여넣으세요.")
+                return
+
+            build_path = os.path.join(selected_folder, build)
+            try:
+                index = get_symbol_index(build_path, get_storage().checksum(build_path))
+            except (ValueError, OSError) as e:
+                st.error(f"빌드 파일을 읽는 중 오류가 발생했습니다: {e}")
+                return
+            with span("symbol.resolve", addresses=len(addresses)):
+                result = index.resolve(addresses)
+
+            st.caption(
+                f"심볼 {len(index.symbols):,}개, 섹션 {len(index.sections):,}개 · "
+                f"주소 {len(result):,}개 중 {int((result['symbol'] != '').sum()):,}개 변환"
+            )
+            TabFunctionMap.render_table(DataFrameQuery(result), key="symbol_resolve")
+
+    def folder_files(self, selected_folder, extensions):
+        """폴더 안의 파일 중 확장자가 일치하는 파일 이름 목록 (공용 폴더 catalog 사용, 디스크 탐색 없음)"""
+        files = get_directory_catalog(selected_folder).files_in(selected_folder) or []
+        return sorted(f for f in files if f.lower().endswith(extensions))
@@ -2,9 +2,14 @@
 import streamlit as st
 import wavedrom
 import json
+import hashlib
 import json_utils as ju  # JSON 관련 유틸리티
 import image_utils as iu
 import os
+from perf_trace import span
+from session_memory import session_values
+from artifact_store import download_artifact
+from shared_cache import get_shared_cache
 
 class TabTimingDiagram:
     def __init__(self):
@@ -34,20 +39,13 @@ class TabTimingDiagram:
         # JSON 저장 버튼 (현재 탭의 JSON 저장)
         if st.sidebar.button("JSON 저장"):
             json_filename = f"{base_file_name}.json"
-            json_data = st.session_state.get(f'json_input_{self.current_tab_key}')
+            json_data = session_values().get(f'json_input_{self.current_tab_key}')
             if json_data:
                 ju.save_json(json_filename, json_data, selected_folder)
  
-        # JSON 파일 다운로드 버튼
+        # JSON 파일 다운로드 버튼 (파일을 rerun마다 다시 읽지 않고 저장소의 내용을 사용)
         json_path = os.path.join(selected_folder, f"{base_file_name}.json")
-        if os.path.exists(json_path):
-            with open(json_path, "r") as file:
-                st.sidebar.download_button(
-                    label="Download JSON",
-                    data=file.read(),
-                    file_name=f"{base_file_name}.json",
-                    mime="application/json"
-                )
+        download_artifact(json_path, "Download JSON", "application/json")
 
         # 선택한 폴더의 파일 목록 가져오기
         if os.path.exists(selected_folder):
@@ -57,9 +55,9 @@ class TabTimingDiagram:
                 if st.sidebar.button("선택한 JSON 파일 로드"):
                     load_path = os.path.join(selected_folder, selected_file)
                     try:
-                        with open(load_path, "r", encoding="utf-8") as f:
+                        with span("file.load", ext="json"), open(load_path, "r", encoding="utf-8") as f:
                             json_input_loaded = f.read()
-                        st.session_state[f'json_input_{self.current_tab_key}'] = json_input_loaded  # 세션 상태 업데이트
+                        session_values()[f'json_input_{self.current_tab_key}'] = json_input_loaded  # 세션 상태 업데이트
                         st.sidebar.success(f"{selected_file} 파일을 {selected_folder} 폴더에서 불러왔습니다.")
                     except Exception as e:
                         st.error(f"파일 로드 중 오류 발생: {e}")
@@ -78,7 +76,7 @@ class TabTimingDiagram:
             png_path = os.path.join(selected_folder, png_filename)
 
             # SVG 저장
-            svg_content = st.session_state.get('svg_content')
+            svg_content = session_values().get('svg_content')
             if svg_content:
                 iu.save_svg(svg_content, svg_path)
                 st.sidebar.success(f"SVG 저장 완료: {svg_path}")
@@ -87,27 +85,9 @@ class TabTimingDiagram:
             iu.convert_svg_to_png(svg_content, png_path)
             st.sidebar.success(f"PNG 저장 완료: {png_path}")
 
-        # SVG 파일 다운로드 버튼
-        svg_path = os.path.join(selected_folder, f"{base_file_name}.svg")
-        if os.path.exists(svg_path):
-            with open(svg_path, "r") as file:
-                st.sidebar.download_button(
-                    label="Download SVG",
-                    data=file.read(),
-                    file_name=f"{base_file_name}.svg",
-                    mime="image/svg+xml"
-                )
-
-        # PNG 파일 다운로드 버튼
-        png_path = os.path.join(selected_folder, f"{base_file_name}.png")
-        if os.path.exists(png_path):
-            with open(png_path, "rb") as file:
-                st.sidebar.download_button(
-                    label="Download PNG",
-                    data=file,
-                    file_name=f"{base_file_name}.png",
-                    mime="image/png"
-                )
+        # SVG / PNG 파일 다운로드 버튼
+        download_artifact(os.path.join(selected_folder, f"{base_file_name}.svg"), "Download SVG", "image/svg+xml")
+        download_artifact(os.path.join(selected_folder, f"{base_file_name}.png"), "Download PNG", "image/png")
 
         st.header("타이밍 다이어그램 에디터")
 
@@ -117,12 +97,18 @@ class TabTimingDiagram:
         # 다이어그램 렌더링 및 표시
         try:
             json_object = json.loads(json_input_raw)
-            diagram = wavedrom.render(json_input_raw)
-            svg_content = diagram.tostring()
+            with span("wavedrom.render") as attrs:
+                # 같은 JSON의 SVG는 모든 서버 프로세스가 공유 캐시에서 재사용
+                svg_content = get_shared_cache().get_or_compute(
+                    "wavedrom_svg",
+                    hashlib.sha256(json_input_raw.encode("utf-8")).hexdigest(),
+                    lambda: wavedrom.render(json_input_raw).tostring(),
+                )
+                attrs["svg_bytes"] = len(svg_content)
             st.markdown(svg_content, unsafe_allow_html=True)
 
             # SVG 콘텐츠를 세션에 저장 (이미지 저장에 사용)
-            st.session_state['svg_content'] = svg_content
+            session_values()['svg_content'] = svg_content
 
         except json.JSONDecodeError as e:
             st.stop()
@@ -0,0 +1,274 @@
+# artifact_store.py
+# 저장한 다이어그램/JSON/이미지 파일의 내용 주소 기반(content-addressed) 저장소
+# - 내용은 sha256 이름의 blob으로 한 번만 저장 (같은 내용을 여러 번 저장해도 중복 저장하지 않음)
+# - 사용자가 고른 경로(논리 파일)마다 버전 기록을 SQLite에 보관 (최근 max_versions개)
+# - 사용자 경로의 파일은 임시 파일 + rename으로 교체하여, 동시에 저장해도 파일이 깨지지 않고 모든 버전이 기록에 남음
+# - 다운로드 버튼은 파일을 rerun마다 다시 읽지 않고 메모리 LRU의 blob을 사용
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+import streamlit as st
+
+_lock = threading.Lock()
+_store = None
+
+
+def _atomic_write(path, data):
+    """같은 폴더의 임시 파일에 쓴 뒤 rename (읽는 쪽은 항상 이전 내용 또는 새 내용 전체를 봄)"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=os.path.basename(path))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class ArtifactStore:
+    """
+    논리 파일(사용자 경로)별 버전 기록과 내용 주소 기반 blob 저장소
+    여러 서버 프로세스가 같은 root를 공유해도 SQLite 트랜잭션으로 버전 번호가 겹치지 않는다.
+    """
+    def __init__(self, root="./.cache/artifacts", max_versions=20, memory_bytes=64 * 1024 * 1024):
+        self.root = root
+        self.max_versions = max_versions
+        self.memory_bytes = memory_bytes
+        self._memory = OrderedDict()  # sha256 -> bytes (LRU)
+        self._memory_size = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        # isolation_level=None: 트랜잭션을 직접 BEGIN IMMEDIATE로 시작
+        self._conn = sqlite3.connect(
+            os.path.join(root, "versions.sqlite"), check_same_thread=False, timeout=30, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS versions (
+                path TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                sha256 TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                file_mtime_ns INTEGER,
+                created REAL NOT NULL,
+                PRIMARY KEY (path, version)
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS versions_sha ON versions(sha256)")
+
+    @staticmethod
+    def _key(path):
+        return os.path.abspath(path)
+
+    def _object_path(self, sha):
+        return os.path.join(self.root, "objects", sha[:2], sha)
+
+    def _remember(self, sha, data):
+        """최근 사용한 blob을 메모리에 보관 (전체 크기 memory_bytes 이하)"""
+        if len(data) > self.memory_bytes:
+            return
+        with self._lock:
+            if sha in self._memory:
+                self._memory.move_to_end(sha)
+                return
+            self._memory[sha] = data
+            self._memory_size += len(data)
+            while self._memory_size > self.memory_bytes:
+                _, old = self._memory.popitem(last=False)
+                self._memory_size -= len(old)
+
+    def blob(self, sha):
+        """sha256에 해당하는 내용 (메모리에 없으면 objects에서 읽음)"""
+        with self._lock:
+            data = self._memory.get(sha)
+            if data is not None:
+                self._memory.move_to_end(sha)
+                return data
+        with open(self._object_path(sha), "rb") as f:
+            data = f.read()
+        self._remember(sha, data)
+        return data
+
+    def _latest(self, key):
+        row = self._conn.execute(
+            "SELECT version, sha256, size, file_mtime_ns FROM versions WHERE path = ? ORDER BY version DESC LIMIT 1",
+            (key,),
+        ).fetchone()
+        return dict(zip(("version", "sha256", "size", "file_mtime_ns"), row)) if row else None
+
+    def put(self, path, content):
+        """
+        내용을 저장하고 사용자 경로의 파일을 원자적으로 교체하는 함수
+        Args:
+            path: 논리 파일 경로 (사용자가 고른 저장 경로)
+            content: str 또는 bytes
+        Returns:
+            dict: {"path", "version", "sha256", "size", "deduplicated"}
+                  마지막 버전과 내용이 같고 파일도 그대로면 새 버전을 만들지 않음 (deduplicated=True)
+        """
+        data = content.encode("utf-8") if isinstance(content, str) else bytes(content)
+        sha = hashlib.sha256(data).hexdigest()
+        object_path = self._object_path(sha)
+        if not os.path.exists(object_path):
+            _atomic_write(object_path, data)
+        self._remember(sha, data)
+
+        key = self._key(path)
+        with self._lock:
+            # BEGIN IMMEDIATE: 다른 프로세스의 저장과 버전 번호/파일 교체 순서를 직렬화
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # 트랜잭션 밖에서 쓴 blob을 다른 프로세스가 참조가 없다고 보고 지웠을 수 있으므로 다시 확인
+                # (blob 삭제도 같은 쓰기 잠금 안에서 하므로, 이후에는 이 버전이 커밋될 때까지 지워지지 않음)
+                if not os.path.exists(object_path):
+                    _atomic_write(object_path, data)
+                latest = self._latest(key)
+                if latest and latest["sha256"] == sha and self._file_matches(path, latest):
+                    self._conn.execute("COMMIT")
+                    return {"path": path, "version": latest["version"], "sha256": sha, "size": len(data), "deduplicated": True}
+
+                _atomic_write(path, data)
+                version = (latest["version"] if latest else 0) + 1
+                self._conn.execute(
+                    "INSERT INTO versions (path, version, sha256, size, file_mtime_ns, created) VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, version, sha, len(data), os.stat(path).st_mtime_ns, time.time()),
+                )
+                pruned = self._prune(key)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        self._remove_unreferenced(pruned)
+        return {"path": path, "version": version, "sha256": sha, "size": len(data), "deduplicated": False}
+
+    def _file_matches(self, path, row):
+        """사용자 경로의 파일이 기록된 버전 그대로인지 (stat만 비교)"""
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return False
+        return stat.st_size == row["size"] and stat.st_mtime_ns == row["file_mtime_ns"]
+
+    def _prune(self, key):
+        """최근 max_versions개만 남기고, 지운 버전의 sha256 목록을 반환"""
+        rows = self._conn.execute(
+            "SELECT version, sha256 FROM versions WHERE path = ? ORDER BY version DESC LIMIT -1 OFFSET ?",
+            (key, self.max_versions),
+        ).fetchall()
+        if rows:
+            self._conn.execute("DELETE FROM versions WHERE path = ? AND version <= ?", (key, rows[0][0]))
+        return {sha for _, sha in rows}
+
+    def _remove_unreferenced(self, shas):
+        """
+        참조하는 버전이 없는 blob을 삭제
+        참조 확인과 삭제를 같은 BEGIN IMMEDIATE 트랜잭션 안에서 하여, 같은 내용을 동시에 저장하는 put과 겹치지 않게 함
+        """
+        if not shas:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for sha in shas:
+                    referenced = self._conn.execute("SELECT 1 FROM versions WHERE sha256 = ? LIMIT 1", (sha,)).fetchone()
+                    if not referenced and os.path.exists(self._object_path(sha)):
+                        os.remove(self._object_path(sha))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def read(self, path, version=None):
+        """
+        논리 파일의 내용 (version이 None이면 최신)
+        사용자 경로의 파일이 저장소 밖에서 바뀌었으면 그 내용을 새 버전으로 기록한 뒤 반환한다.
+        Returns:
+            bytes 또는 None: 파일이 없으면 None
+        """
+        key = self._key(path)
+        if version is not None:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT sha256 FROM versions WHERE path = ? AND version = ?", (key, version)
+                ).fetchone()
+            if row is None:
+                return None
+            try:
+                return self.blob(row[0])
+            except FileNotFoundError:
+                return None  # 조회한 뒤 다른 프로세스가 정리한 버전
+
+        with self._lock:
+            latest = self._latest(key)
+        if latest and self._file_matches(path, latest):
+            try:
+                return self.blob(latest["sha256"])
+            except FileNotFoundError:
+                pass  # 다른 프로세스가 정리한 blob은 파일에서 다시 읽음
+        if not os.path.exists(path):
+            return None
+        # 저장소를 거치지 않고 만들어졌거나 수정된 파일
+        with open(path, "rb") as f:
+            data = f.read()
+        self.put(path, data)
+        return data
+
+    def versions(self, path):
+        """논리 파일의 버전 기록 (최신 순)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT version, sha256, size, created FROM versions WHERE path = ? ORDER BY version DESC",
+                (self._key(path),),
+            ).fetchall()
+        return [dict(zip(("version", "sha256", "size", "created"), row)) for row in rows]
+
+
+def get_artifact_store():
+    """프로세스 전체에서 공유하는 저장소 (CDL_ARTIFACT_DIR로 위치 변경)"""
+    global _store
+    with _lock:
+        if _store is None:
+            _store = ArtifactStore(os.environ.get("CDL_ARTIFACT_DIR", "./.cache/artifacts"))
+        return _store
+
+
+def download_artifact(path, label, mime, file_name=None, container=None):
+    """
+    저장소의 최신 내용으로 다운로드 버튼을 표시하고, 이전 버전이 있으면 버전 선택 다운로드도 제공하는 함수
+    Args:
+        container: 버튼을 표시할 위치 (기본값: 사이드바)
+    """
+    container = container or st.sidebar
+    store = get_artifact_store()
+    data = store.read(path)
+    if data is None:
+        return
+    file_name = file_name or os.path.basename(path)
+    container.download_button(label=label, data=data, file_name=file_name, mime=mime, key=f"download_{path}")
+
+    history = store.versions(path)
+    if len(history) > 1:
+        with container.expander(f"{file_name} 이전 버전 ({len(history)})"):
+            options = {
+                f"v{row['version']} · {time.strftime('%m-%d %H:%M:%S', time.localtime(row['created']))} · {row['size']:,}B": row
+                for row in history
+            }
+            selected = options[st.selectbox("버전", list(options), key=f"version_{path}")]
+            selected_data = store.read(path, selected["version"])
+            if selected_data is None:
+                st.caption("이 버전은 방금 정리되어 다운로드할 수 없습니다.")
+                return
+            st.download_button(
+                label=f"v{selected['version']} 다운로드",
+                data=selected_data,
+                file_name=file_name,
+                mime=mime,
+                key=f"download_{path}_v",
+            )
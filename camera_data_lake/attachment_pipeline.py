@@ -0,0 +1,221 @@
+# attachment_pipeline.py
+import functools
+import hashlib
+import re
+import zlib
+import numpy as np
+import pandas as pd
+
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+EMBEDDING_DIM = 512
+
+
+def attachment_to_text(content, max_binary_bytes=4096):
+    """
+    첨부 파일 내용(문자열, 바이트, DataFrame, 피클 객체 등)을 프롬프트에 넣을 수 있는 텍스트로 변환하는 함수
+    Args:
+        content: FileManager.load_file 결과
+        max_binary_bytes: 텍스트가 아닌 바이너리에서 hex dump로 보여줄 최대 바이트 수
+    """
+    if isinstance(content, str):
+        return content
+
+    if isinstance(content, (bytes, bytearray)):
+        try:
+            return bytes(content).decode("utf-8")
+        except UnicodeDecodeError:
+            head = bytes(content[:max_binary_bytes])
+            lines = [f"바이너리 파일 ({len(content):,} bytes), 앞부분 {len(head):,} bytes hex dump:"]
+            for offset in range(0, len(head), 16):
+                row = head[offset:offset + 16]
+                lines.append(f"{offset:08x}  {row.hex(' ')}")
+            return "\n".join(lines)
+
+    if isinstance(content, pd.DataFrame):
+        return content.to_csv(index=False)
+
+    if isinstance(content, dict) and any(isinstance(v, pd.DataFrame) for v in content.values()):
+        parts = []
+        for name, value in content.items():
+            body = value.to_csv(index=False) if isinstance(value, pd.DataFrame) else str(value)
+            parts.append(f"### 시트: {name}\n{body}")
+        return "\n\n".join(parts)
+
+    return str(content)
+
+
+@functools.lru_cache(maxsize=1)
+def _encoder():
+    """tiktoken 인코더 (설치되어 있지 않거나 인코딩 파일을 받을 수 없으면 None, 프로세스에서 한 번만 확인)"""
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+def count_tokens(text):
+    """
+    토큰 수를 계산하는 함수
+    tiktoken이 설치되어 있으면 사용하고, 없으면 단어/기호 단위로 근사한다.
+    """
+    encoder = _encoder()
+    if encoder is None:
+        return len(TOKEN_PATTERN.findall(text))
+    return len(encoder.encode(text, disallowed_special=()))
+
+
+def _split_long_line(line, max_tokens):
+    """
+    한 청크에 들어가지 않는 긴 줄을 실제 토큰 수 기준으로 자르는 함수 (가능하면 공백 위치에서 자름)
+    Returns:
+        tuple: (max_tokens 이하로 자른 조각 목록, 한 청크에 들어가는 나머지)
+    """
+    pieces = []
+    while line:
+        # count_tokens(조각) + 1 <= max_tokens를 만족하는 가장 긴 앞부분을 이분 탐색 (토큰이 아무리 길어도 64자 이내로 가정)
+        limit = min(len(line), max_tokens * 64)
+        lo, hi = 1, min(limit, max_tokens * 4)
+        while hi < limit and count_tokens(line[:hi]) + 1 <= max_tokens:
+            lo, hi = hi, min(limit, hi * 2)
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if count_tokens(line[:mid]) + 1 <= max_tokens:
+                lo = mid
+            else:
+                hi = mid - 1
+        if lo == len(line):
+            break
+        space = line.rfind(" ", 0, lo + 1)
+        end = space if space > 0 and line[:space].strip() else lo
+        pieces.append(line[:end].rstrip())
+        line = line[end:].lstrip()
+    return pieces, line
+
+
+def chunk_text(text, max_tokens=300, overlap_lines=2):
+    """
+    텍스트를 줄 단위로 모아 max_tokens 이하의 청크로 나누는 함수
+    청크 경계의 문맥이 끊기지 않도록 이전 청크의 마지막 overlap_lines 줄을 다음 청크 앞에 붙인다.
+    Returns:
+        list: (청크 텍스트, 토큰 수) 목록
+    """
+    chunks = []
+    lines, tokens = [], 0
+    for line in text.splitlines():
+        line_tokens = count_tokens(line) + 1
+        if line_tokens > max_tokens:
+            # 한 줄이 너무 길면 잘라서 처리 (원문 순서가 유지되도록 쌓여 있던 줄을 먼저 청크로 내보냄)
+            if lines:
+                chunks.append(("\n".join(lines), tokens))
+                lines, tokens = [], 0
+            pieces, line = _split_long_line(line, max_tokens)
+            chunks.extend((piece, count_tokens(piece)) for piece in pieces)
+            if not line:
+                continue
+            line_tokens = count_tokens(line) + 1
+        if tokens + line_tokens > max_tokens and lines:
+            chunks.append(("\n".join(lines), tokens))
+            lines = lines[-overlap_lines:] if overlap_lines else []
+            tokens = sum(count_tokens(l) + 1 for l in lines)
+            # 겹치는 줄을 붙이면 넘치는 경우 (긴 줄의 나머지 등) 앞에서부터 버림
+            while lines and tokens + line_tokens > max_tokens:
+                tokens -= count_tokens(lines.pop(0)) + 1
+        lines.append(line)
+        tokens += line_tokens
+    if lines:
+        chunks.append(("\n".join(lines), tokens))
+    return chunks
+
+
+class HashingEmbedder:
+    """
+    외부 모델 없이 로컬에서 동작하는 임베딩 (토큰과 식별자 조각을 feature hashing 후 L2 정규화)
+    """
+    name = f"hashing-{EMBEDDING_DIM}"
+
+    def encode(self, texts):
+        vectors = np.zeros((len(texts), EMBEDDING_DIM), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in TOKEN_PATTERN.findall(text.lower()):
+                vectors[row, zlib.crc32(token.encode("utf-8")) % EMBEDDING_DIM] += 1.0
+        # 자주 나오는 토큰의 영향을 줄이기 위해 로그 스케일 적용
+        vectors = np.log1p(vectors)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+
+class SentenceTransformerEmbedder:
+    """sentence-transformers가 설치된 경우 사용하는 로컬 임베딩 모델"""
+    def __init__(self, model_name="all-MiniLM-L6-v2"):
+        from sentence_transformers import SentenceTransformer
+        self.name = model_name
+        self.model = SentenceTransformer(model_name)
+
+    def encode(self, texts):
+        return self.model.encode(texts, normalize_embeddings=True, convert_to_numpy=True).astype(np.float32)
+
+
+def get_embedder():
+    """사용 가능한 로컬 임베딩 모델을 반환 (sentence-transformers가 없으면 HashingEmbedder)"""
+    try:
+        return SentenceTransformerEmbedder()
+    except Exception:
+        return HashingEmbedder()
+
+
+def content_hash(content):
+    """첨부 내용의 sha256 해시 (파일 해시를 모를 때 캐시 키로 사용)"""
+    data = content if isinstance(content, (bytes, bytearray)) else attachment_to_text(content).encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+class AttachmentIndex:
+    """
+    첨부 파일 하나를 청크로 나누고 임베딩해 둔 인덱스
+    질문마다 관련도가 높은 청크만 골라 프롬프트에 넣는다.
+    """
+    def __init__(self, content, embedder, max_chunk_tokens=300):
+        text = attachment_to_text(content)
+        self.total_tokens = count_tokens(text)
+        self.text = text
+        chunks = chunk_text(text, max_tokens=max_chunk_tokens)
+        self.chunks = [chunk for chunk, _ in chunks]
+        self.chunk_tokens = np.array([tokens for _, tokens in chunks], dtype=np.int64)
+        self.embedder = embedder
+        self.embeddings = embedder.encode(self.chunks) if self.chunks else np.zeros((0, 1), dtype=np.float32)
+
+    def parts(self):
+        """공유 캐시에 저장할 값 (임베딩 배열은 mmap으로 공유하도록 따로 저장)"""
+        return {"text": self.text, "total_tokens": self.total_tokens, "chunks": self.chunks, "chunk_tokens": self.chunk_tokens}
+
+    @classmethod
+    def from_parts(cls, parts, embeddings, embedder):
+        """parts()와 임베딩 배열로 인덱스를 다시 만드는 함수 (청크 분할과 임베딩을 다시 계산하지 않음)"""
+        index = cls.__new__(cls)
+        index.__dict__.update(parts)
+        index.embedder = embedder
+        index.embeddings = embeddings
+        return index
+
+    def select(self, question, top_k=5, max_tokens=2000):
+        """
+        질문과 가장 관련 있는 청크를 최대 top_k개, 총 max_tokens 이내로 골라 원래 순서대로 반환
+        첨부 전체가 max_tokens 이내이면 전체를 그대로 반환한다.
+        Returns:
+            list: 청크 텍스트 목록
+        """
+        if self.total_tokens <= max_tokens:
+            return [self.text]
+        if not self.chunks:
+            return []
+
+        query = self.embedder.encode([question])[0]
+        scores = self.embeddings @ query
+        selected, used = [], 0
+        for i in np.argsort(-scores)[:top_k]:
+            if used + self.chunk_tokens[i] > max_tokens:
+                continue
+            selected.append(i)
+            used += self.chunk_tokens[i]
+        return [self.chunks[i] for i in sorted(selected)]
@@ -0,0 +1,678 @@
+# c_struct.py
+# 펌웨어 헤더의 C 구조체 정의(일부 문법)를 NumPy structured dtype으로 변환하고 메모리 덤프 위에 겹쳐 해석
+# 지원 문법:
+#   struct/union/enum 정의와 typedef (이름 없는 중첩 struct/union 포함), 다차원 배열, 포인터(pointer_size 크기의 주소)
+#   #define 정수 상수와 enum 값 (배열 크기 식에 사용), 비트필드 (GCC 배치 규칙)
+#   #pragma pack(N) / pack(push, N) / pack(pop), __attribute__((packed)), __attribute__((aligned(N))), __packed
+#   (구조체, 멤버, typedef에 붙은 속성 모두)
+# 지원하지 않는 것: 함수 포인터, sizeof 식, 매크로 함수, 가변 길이 배열
+import ast
+import operator
+import re
+import numpy as np
+import pandas as pd
+
+# 기본 타입: 이름 -> (크기, 부호 있는 정수 여부, 종류)  ("int"/"float"/"bool")
+_PRIMITIVES = {
+    "char": (1, True, "int"), "signed char": (1, True, "int"), "unsigned char": (1, False, "int"),
+    "short": (2, True, "int"), "unsigned short": (2, False, "int"),
+    "int": (4, True, "int"), "unsigned int": (4, False, "int"),
+    "long long": (8, True, "int"), "unsigned long long": (8, False, "int"),
+    "float": (4, True, "float"), "double": (8, True, "float"),
+    "_Bool": (1, False, "bool"), "bool": (1, False, "bool"),
+    "int8_t": (1, True, "int"), "uint8_t": (1, False, "int"),
+    "int16_t": (2, True, "int"), "uint16_t": (2, False, "int"),
+    "int32_t": (4, True, "int"), "uint32_t": (4, False, "int"),
+    "int64_t": (8, True, "int"), "uint64_t": (8, False, "int"),
+    "s8": (1, True, "int"), "u8": (1, False, "int"), "s16": (2, True, "int"), "u16": (2, False, "int"),
+    "s32": (4, True, "int"), "u32": (4, False, "int"), "s64": (8, True, "int"), "u64": (8, False, "int"),
+}
+_SPECIFIER_WORDS = {"signed", "unsigned", "short", "long", "int", "char", "float", "double", "_Bool", "bool"}
+_QUALIFIERS = {"const", "volatile", "static", "extern", "register", "restrict", "__restrict", "__volatile__"}
+_TOKEN = re.compile(r"0[xX][0-9a-fA-F]+[uUlL]*|\d+[uUlL]*|[A-Za-z_]\w*|<<|>>|[{}\[\];,*:()=+\-/%&|~^]")
+_BIN_OPS = {
+    ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.FloorDiv: operator.floordiv,
+    ast.Div: operator.floordiv, ast.Mod: operator.mod, ast.LShift: operator.lshift, ast.RShift: operator.rshift,
+    ast.BitOr: operator.or_, ast.BitAnd: operator.and_, ast.BitXor: operator.xor,
+}
+_UNARY_OPS = {ast.USub: operator.neg, ast.UAdd: operator.pos, ast.Invert: operator.invert}
+
+
+class CStructError(ValueError):
+    """구조체 정의를 해석할 수 없을 때 발생 (line: 원문 줄 번호)"""
+    def __init__(self, message, line=None):
+        super().__init__(f"{line}번째 줄: {message}" if line else message)
+        self.line = line
+
+
+class CType:
+    """
+    C 타입 하나
+    kind: "scalar" | "pointer" | "string"(char 배열) | "struct" | "union"
+    fields: [(이름, offset, CType, shape)] (struct/union)
+    bitfields: [(이름, 저장 바이트 필드, shift, width, signed, big_endian)] (저장 바이트를 정수로 합친 값의 shift 위치부터 width 비트)
+    """
+    def __init__(self, name, size, align, dtype, kind="scalar", fields=None, bitfields=None):
+        self.name = name
+        self.size = size
+        self.align = align
+        self.dtype = dtype
+        self.kind = kind
+        self.fields = fields or []
+        self.bitfields = bitfields or []
+
+    def __repr__(self):
+        return f"CType({self.name!r}, size={self.size}, align={self.align})"
+
+
+def _eval_int(expression, constants, line=None):
+    """정수 상수 식 계산 (#define/enum 상수, 사칙/비트 연산만 허용)"""
+    text = re.sub(r"\b(0[xX][0-9a-fA-F]+|\d+)[uUlL]+\b", r"\1", expression.strip())
+    text = text.replace("/", "//")  # C 정수 나눗셈
+    try:
+        node = ast.parse(text, mode="eval").body
+    except SyntaxError:
+        raise CStructError(f"정수 식을 해석할 수 없습니다: {expression}", line)
+
+    def visit(node):
+        if isinstance(node, ast.Constant) and isinstance(node.value, int):
+            return node.value
+        if isinstance(node, ast.Name) and node.id in constants:
+            return constants[node.id]
+        if isinstance(node, ast.BinOp) and type(node.op) in _BIN_OPS:
+            return _BIN_OPS[type(node.op)](visit(node.left), visit(node.right))
+        if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPS:
+            return _UNARY_OPS[type(node.op)](visit(node.operand))
+        raise CStructError(f"정수 식을 해석할 수 없습니다: {expression}", line)
+
+    return visit(node)
+
+
+def _align_up(value, align):
+    return (value + align - 1) // align * align
+
+
+class CStructParser:
+    """
+    C 헤더 텍스트 -> {타입 이름: CType}
+    Args:
+        byteorder: "<"(little endian) 또는 ">"(big endian)
+        pointer_size: 포인터/size_t/uintptr_t 크기 (32비트 펌웨어는 4)
+        long_size: long 크기 (ILP32는 4, LP64는 8)
+    """
+    def __init__(self, byteorder="<", pointer_size=4, long_size=4):
+        self.byteorder = byteorder
+        self.pointer_size = pointer_size
+        self.long_size = long_size
+        self.types = {}  # "struct tag"/"union tag"/"enum tag"/typedef 이름/기본 타입 이름 -> CType
+        self.constants = {}  # #define 정수 상수와 enum 값
+        self.defined = []  # 정의된 순서대로 사용자에게 보여줄 struct/union 타입 이름
+        self._units = 0  # 비트필드 저장 단위 필드 번호 (중첩 구조체를 펼쳐도 이름이 겹치지 않도록 전체에서 증가)
+        for name, (size, signed, kind) in _PRIMITIVES.items():
+            self.types[name] = self._scalar(name, size, signed, kind)
+        for name in ("long", "signed long", "long int"):
+            self.types[name] = self._scalar(name, long_size, True, "int")
+        for name in ("unsigned long", "unsigned long int"):
+            self.types[name] = self._scalar(name, long_size, False, "int")
+        for name in ("size_t", "uintptr_t"):
+            self.types[name] = self._scalar(name, pointer_size, False, "int")
+        for name in ("ssize_t", "intptr_t", "ptrdiff_t"):
+            self.types[name] = self._scalar(name, pointer_size, True, "int")
+        self.types["void"] = CType("void", 0, 1, np.dtype("u1"), kind="void")  # 포인터 대상으로만 사용
+
+    def _scalar(self, name, size, signed, kind):
+        if kind == "float":
+            dtype = np.dtype(f"{self.byteorder}f{size}")
+        elif kind == "bool":
+            dtype = np.dtype("u1")
+        else:
+            dtype = np.dtype(f"{self.byteorder}{'i' if signed else 'u'}{size}")
+        return CType(name, size, size, dtype)
+
+    def _pointer(self):
+        return CType("pointer", self.pointer_size, self.pointer_size, np.dtype(f"{self.byteorder}u{self.pointer_size}"), kind="pointer")
+
+    # ---- 전처리와 토큰 ----
+    def _tokenize(self, text):
+        """주석 제거, 전처리 줄 처리 후 (토큰, 줄 번호) 목록을 반환 (#pragma pack은 ("#pack", 값) 토큰으로 남김)"""
+        text = re.sub(r"/\*.*?\*/", lambda m: "\n" * m.group(0).count("\n"), text, flags=re.S)
+        text = re.sub(r"//[^\n]*", "", text)
+        tokens = []
+        for line_no, line in enumerate(text.splitlines(), start=1):
+            stripped = line.strip()
+            if stripped.startswith("#"):
+                self._directive(stripped, tokens, line_no)
+                continue
+            for match in _TOKEN.finditer(line):
+                tokens.append((match.group(0), line_no))
+        return tokens
+
+    def _directive(self, line, tokens, line_no):
+        define = re.match(r"#\s*define\s+([A-Za-z_]\w*)\s+(.+)$", line)
+        if define:
+            try:
+                self.constants[define.group(1)] = _eval_int(define.group(2), self.constants, line_no)
+            except CStructError:
+                pass  # 정수가 아닌 매크로는 무시
+            return
+        pack = re.match(r"#\s*pragma\s+pack\s*\((.*)\)", line)
+        if pack:
+            args = tuple(arg.strip() for arg in pack.group(1).split(",") if arg.strip())
+            tokens.append((("#pack", args), line_no))
+
+    # ---- 파서 ----
+    def parse(self, text):
+        """
+        헤더 텍스트를 해석하여 타입을 등록하는 함수
+        Returns:
+            dict: {타입 이름: CType} (이번에 정의된 struct/union만, 정의 순서)
+        """
+        self._tokens = self._tokenize(text)
+        self._pos = 0
+        self._pack_stack = []
+        self._pack = None
+        start = len(self.defined)
+        while self._pos < len(self._tokens):
+            token = self._peek()
+            if isinstance(token, tuple):
+                self._apply_pack(token[1])
+                self._pos += 1
+            elif token == ";":
+                self._pos += 1
+            elif token == "typedef":
+                self._pos += 1
+                self._parse_typedef()
+            else:
+                self._parse_top_declaration()
+        return {name: self.types[name] for name in self.defined[start:]}
+
+    def _peek(self, ahead=0):
+        index = self._pos + ahead
+        return self._tokens[index][0] if index < len(self._tokens) else None
+
+    def _line(self):
+        index = min(self._pos, len(self._tokens) - 1)
+        return self._tokens[index][1] if self._tokens else None
+
+    def _next(self):
+        if self._pos >= len(self._tokens):
+            raise CStructError("정의가 끝나지 않았습니다.", self._line())
+        token = self._tokens[self._pos][0]
+        self._pos += 1
+        return token
+
+    def _expect(self, expected):
+        token = self._next()
+        if token != expected:
+            raise CStructError(f"'{expected}'가 필요한 곳에 '{token}'이(가) 있습니다.", self._line())
+
+    def _apply_pack(self, args):
+        if not args:
+            self._pack = None
+        elif args[0] == "push":
+            self._pack_stack.append(self._pack)
+            if len(args) > 1:
+                self._pack = _eval_int(args[-1], self.constants, self._line())
+        elif args[0] == "pop":
+            self._pack = self._pack_stack.pop() if self._pack_stack else None
+        else:
+            self._pack = _eval_int(args[0], self.constants, self._line())
+
+    def _parse_attributes(self):
+        """__attribute__((...))/__packed를 읽어 (packed, aligned) 반환"""
+        packed, aligned = False, None
+        while self._peek() in ("__attribute__", "__packed", "__aligned"):
+            token = self._next()
+            if token == "__packed":
+                packed = True
+                continue
+            depth, words = 0, []
+            while True:
+                item = self._next()
+                if item == "(":
+                    depth += 1
+                elif item == ")":
+                    depth -= 1
+                    if depth == 0:
+                        break
+                else:
+                    words.append(item)
+            packed = packed or "packed" in words or "__packed__" in words
+            for key in ("aligned", "__aligned__"):
+                if key in words:
+                    value = words[words.index(key) + 1] if words.index(key) + 1 < len(words) else ","
+                    if value == ",":
+                        # 값 없는 aligned는 대상 아키텍처의 최대 정렬이라 헤더만으로는 알 수 없음
+                        raise CStructError(f"{key} 속성에는 정렬 값이 필요합니다. (예: {key}(8))", self._line())
+                    aligned = _eval_int(value, self.constants, self._line())
+            if token == "__aligned" and words:
+                aligned = _eval_int(words[0], self.constants, self._line())
+        return packed, aligned
+
+    def _parse_top_declaration(self):
+        """struct/union/enum 정의 (변수 선언이나 함수 원형 등 나머지는 ';'까지 건너뜀)"""
+        if self._peek() in ("struct", "union", "enum", "__packed"):
+            self._parse_type_specifier()
+            # 'struct tag { ... } var;' 처럼 뒤에 오는 변수 선언은 무시
+        depth = 0
+        while self._pos < len(self._tokens):
+            token = self._next()
+            if token in ("{", "("):
+                depth += 1
+            elif token in ("}", ")"):
+                depth -= 1
+            elif token == ";" and depth <= 0:
+                return
+
+    def _parse_typedef(self):
+        base = self._parse_type_specifier()
+        while True:
+            name, ctype, _, (_, aligned) = self._parse_declarator(base)
+            if aligned:
+                # typedef의 aligned는 크기는 그대로 두고 정렬만 바꿈 (GCC: 늘리거나 줄일 수 있음, packed는 무시)
+                ctype = CType(ctype.name, ctype.size, aligned, ctype.dtype, kind=ctype.kind, fields=ctype.fields, bitfields=ctype.bitfields)
+            self.types[name] = ctype
+            if ctype.kind in ("struct", "union") and name not in self.defined:
+                self.defined.append(name)
+            token = self._next()
+            if token == ";":
+                return
+            if token != ",":
+                raise CStructError(f"typedef 선언에서 '{token}'을(를) 해석할 수 없습니다.", self._line())
+
+    def _parse_type_specifier(self):
+        """타입 지정자(수식어, 기본 타입, struct/union/enum, typedef 이름)를 읽어 CType 반환"""
+        words = []
+        while True:
+            token = self._peek()
+            if token in _QUALIFIERS:
+                self._pos += 1
+            elif token in ("__attribute__", "__packed") and not words:
+                packed, aligned = self._parse_attributes()
+                if self._peek() in ("struct", "union"):
+                    return self._parse_record(self._next(), packed_prefix=packed, aligned_prefix=aligned)
+            elif token in ("struct", "union"):
+                self._pos += 1
+                return self._parse_record(token)
+            elif token == "enum":
+                self._pos += 1
+                return self._parse_enum()
+            elif token in _SPECIFIER_WORDS:
+                words.append(self._next())
+            elif not words and token in self.types:
+                self._pos += 1
+                return self._skip_qualifiers(self.types[token])
+            else:
+                break
+        if not words:
+            raise CStructError(f"알 수 없는 타입: '{self._peek()}'", self._line())
+        return self._skip_qualifiers(self.types[self._normalize(words)])
+
+    def _skip_qualifiers(self, ctype):
+        while self._peek() in _QUALIFIERS:
+            self._pos += 1
+        return ctype
+
+    def _normalize(self, words):
+        """'unsigned long int' 같은 기본 타입 단어 조합을 _PRIMITIVES 이름으로 변환"""
+        unsigned = "unsigned" in words
+        longs = words.count("long")
+        rest = [w for w in words if w not in ("signed", "unsigned", "long", "int")]
+        if "short" in rest:
+            base = "short"
+        elif "char" in rest:
+            return "unsigned char" if unsigned else ("signed char" if "signed" in words else "char")
+        elif rest:
+            base = rest[0] if not longs else f"long {rest[0]}"
+            if base == "long double":
+                raise CStructError("long double은 지원하지 않습니다.", self._line())
+        elif longs >= 2:
+            base = "long long"
+        elif longs == 1:
+            base = "long"
+        else:
+            base = "int"
+        return f"unsigned {base}" if unsigned else base
+
+    def _parse_enum(self):
+        tag = self._next() if self._peek() != "{" else None
+        if self._peek() == "{":
+            self._next()
+            value = 0
+            while self._peek() != "}":
+                name = self._next()
+                if self._peek() == "=":
+                    self._next()
+                    expression = []
+                    while self._peek() not in (",", "}"):
+                        expression.append(self._next())
+                    value = _eval_int(" ".join(expression), self.constants, self._line())
+                self.constants[name] = value
+                value += 1
+                if self._peek() == ",":
+                    self._next()
+            self._expect("}")
+        ctype = self._scalar(f"enum {tag}" if tag else "enum", 4, True, "int")
+        if tag:
+            self.types[f"enum {tag}"] = ctype
+        return ctype
+
+    def _parse_record(self, kind, packed_prefix=False, aligned_prefix=None):
+        """struct/union 지정자 ('struct tag', 'struct [tag] { ... }')"""
+        packed, aligned = self._parse_attributes()
+        packed, aligned = packed or packed_prefix, aligned or aligned_prefix
+        tag = None
+        if isinstance(self._peek(), str) and re.match(r"[A-Za-z_]\w*$", self._peek()):
+            tag = self._next()
+        if self._peek() != "{":
+            key = f"{kind} {tag}"
+            if key not in self.types:
+                raise CStructError(f"정의되지 않은 타입: {key} (사용하기 전에 정의해야 합니다)", self._line())
+            return self.types[key]
+
+        self._expect("{")
+        members = []  # (이름, CType, shape, bits, 멤버 속성 (packed, aligned))
+        while self._peek() != "}":
+            if isinstance(self._peek(), tuple):
+                self._apply_pack(self._peek()[1])
+                self._pos += 1
+                continue
+            member_type = self._parse_type_specifier()
+            if self._peek() == ";":
+                # 이름 없는 중첩 struct/union (C11): 멤버를 바깥 타입에 펼침
+                self._next()
+                members.append((None, member_type, (), None, (False, None)))
+                continue
+            while True:
+                if self._peek() == ":":
+                    name, ctype, shape, attributes = None, member_type, (), (False, None)  # 이름 없는 비트필드 (예: 'uint32_t : 0;')
+                else:
+                    name, ctype, shape, attributes = self._parse_declarator(member_type, allow_array_split=True)
+                bits = None
+                if self._peek() == ":":
+                    self._next()
+                    expression = []
+                    while self._peek() not in (",", ";"):
+                        expression.append(self._next())
+                    bits = _eval_int(" ".join(expression), self.constants, self._line())
+                members.append((name, ctype, shape, bits, attributes))
+                token = self._next()
+                if token == ";":
+                    break
+                if token != ",":
+                    raise CStructError(f"멤버 선언에서 '{token}'을(를) 해석할 수 없습니다.", self._line())
+        self._expect("}")
+        trailing_packed, trailing_aligned = self._parse_attributes()
+        packed = packed or trailing_packed
+        aligned = trailing_aligned or aligned
+
+        name = f"{kind} {tag}" if tag else f"{kind} <anonymous>"
+        ctype = self._layout(name, kind, members, self._pack, aligned, packed)
+        if tag:
+            self.types[name] = ctype
+            if name not in self.defined:
+                self.defined.append(name)
+        return ctype
+
+    def _parse_declarator(self, base, allow_array_split=False):
+        """
+        '*name[2][3]' 형식의 선언자를 읽어 (이름, CType, shape, (packed, aligned)) 반환
+        allow_array_split=True이면 배열을 shape로 따로 반환 (구조체 멤버), 아니면 배열 타입을 만들어 반환 (typedef)
+        선언자 앞뒤의 __attribute__((packed/aligned(N)))는 멤버/typedef 속성으로 함께 반환한다.
+        """
+        ctype = base
+        packed, aligned = False, None
+        while self._peek() in ("*", "__attribute__", "__packed", "__aligned") or self._peek() in _QUALIFIERS:
+            if self._peek() in ("__attribute__", "__packed", "__aligned"):
+                packed, aligned = self._merge_attributes((packed, aligned), self._parse_attributes())
+            elif self._next() == "*":
+                ctype = self._pointer()
+        if self._peek() == "(":
+            raise CStructError("함수 포인터는 지원하지 않습니다.", self._line())
+        name = self._next()
+        if not re.match(r"[A-Za-z_]\w*$", str(name)):
+            raise CStructError(f"이름이 필요한 곳에 '{name}'이(가) 있습니다.", self._line())
+        shape = []
+        while self._peek() == "[":
+            self._next()
+            expression = []
+            while self._peek() != "]":
+                expression.append(self._next())
+            self._next()
+            if not expression:
+                raise CStructError(f"{name}: 크기가 없는 배열은 지원하지 않습니다.", self._line())
+            shape.append(_eval_int(" ".join(expression), self.constants, self._line()))
+        packed, aligned = self._merge_attributes((packed, aligned), self._parse_attributes())
+        if ctype.kind == "void":
+            raise CStructError(f"{name}: void 타입 멤버는 선언할 수 없습니다.", self._line())
+        if allow_array_split:
+            return name, ctype, tuple(shape), (packed, aligned)
+        return name, self._array_type(ctype, tuple(shape)) if shape else ctype, (), (packed, aligned)
+
+    @staticmethod
+    def _merge_attributes(first, second):
+        return first[0] or second[0], second[1] or first[1]
+
+    def _array_type(self, ctype, shape):
+        """typedef로 정의한 배열 타입 (예: typedef uint8_t mac_t[6];)"""
+        count = int(np.prod(shape))
+        if ctype.kind == "scalar" and ctype.name == "char":
+            if len(shape) == 1:
+                return CType(f"char[{shape[0]}]", shape[0], 1, np.dtype(f"S{shape[0]}"), kind="string")
+        fields = [("", 0, ctype, shape)]
+        dtype = np.dtype((ctype.dtype, shape))
+        array = CType(f"{ctype.name}{''.join(f'[{n}]' for n in shape)}", ctype.size * count, ctype.align, dtype, kind="array", fields=fields)
+        return array
+
+    def _layout(self, name, kind, members, pack, aligned, packed=False):
+        """
+        멤버 offset과 크기, 정렬을 계산하고 structured dtype을 만드는 함수
+        Args:
+            pack: #pragma pack 값 (None이면 없음), 멤버의 aligned 속성보다도 우선
+            aligned: 구조체의 aligned(N) 속성
+            packed: 구조체의 packed 속성 (멤버 정렬을 1로, 멤버의 aligned(N)은 그대로 적용)
+        """
+        fields, bitfields = [], []
+        bit, size, align = 0, 0, 1  # bit: 다음 멤버를 놓을 위치 (비트필드 뒤에서는 바이트 경계가 아닐 수 있음)
+
+        def member_align(ctype, attributes=(False, None)):
+            # GCC: packed(구조체 또는 멤버)면 1, 멤버 aligned(N)은 그보다 크면 올리고, #pragma pack은 마지막에 상한 적용
+            member_packed, member_aligned = attributes
+            result = 1 if packed or member_packed else ctype.align
+            if member_aligned:
+                result = max(result, member_aligned)
+            return min(result, pack) if pack else result
+
+        for member_name, ctype, shape, bits, attributes in members:
+            if bits is not None:
+                if attributes != (False, None):
+                    raise CStructError(f"{name}.{member_name}: 비트필드 멤버의 packed/aligned 속성은 지원하지 않습니다.")
+                if ctype.kind not in ("scalar",) or ctype.dtype.kind not in "iub":
+                    raise CStructError(f"{name}.{member_name}: 정수 타입만 비트필드로 사용할 수 있습니다.")
+                if bits > ctype.size * 8:
+                    raise CStructError(f"{name}.{member_name}: 비트 수({bits})가 타입 크기보다 큽니다.")
+                if bits == 0:
+                    # 폭이 0인 비트필드: 다음 멤버를 타입 본래의 정렬 경계로 보냄 (packed/#pragma pack과 무관,
+                    # 구조체 정렬에는 영향 없음)
+                    if kind == "struct":
+                        bit = _align_up(bit, ctype.align * 8)
+                    continue
+                # GCC 배치 규칙: 현재 비트 위치에 이어서 놓되, 타입 정렬 단위를 타입 크기보다 많이 걸치게 되면
+                # 다음 정렬 경계로 이동 (packed/#pragma pack 구조체는 이동 없이 빈틈 없이 이어 붙임)
+                start = 0 if kind == "union" else bit
+                if not pack and not packed:
+                    unit_bits = ctype.align * 8
+                    if (start % unit_bits + bits + unit_bits - 1) // unit_bits > ctype.size * 8 // unit_bits:
+                        start = _align_up(start, unit_bits)
+                first, length = start // 8, (start % 8 + bits + 7) // 8
+                bit = max(bit, start + bits)
+                size = max(size, first + length)
+                if member_name is None:
+                    continue  # 이름 없는 비트필드는 자리만 차지하고 구조체 정렬에는 영향 없음
+                # 비트필드가 걸친 바이트들을 저장 단위 필드로 두고, 읽을 때 정수로 합쳐 시프트/마스크
+                unit_name = f"_bits{self._units}"
+                self._units += 1
+                fields.append((unit_name, first, self.types["uint8_t"], (length,)))
+                big_endian = self.byteorder == ">"
+                # little endian은 하위 비트부터, big endian은 상위 비트부터 배치 (GCC)
+                shift = length * 8 - start % 8 - bits if big_endian else start % 8
+                bitfields.append((member_name, unit_name, shift, bits, ctype.dtype.kind == "i", big_endian))
+                align = max(align, member_align(ctype))
+                continue
+
+            member_size = ctype.size * int(np.prod(shape)) if shape else ctype.size
+            member_offset = 0 if kind == "union" else _align_up((bit + 7) // 8, member_align(ctype, attributes))
+            if member_name is None:
+                # 이름 없는 중첩 struct/union: 멤버를 바깥 타입에 바로 배치
+                for sub_name, sub_offset, sub_type, sub_shape in ctype.fields:
+                    fields.append((sub_name, member_offset + sub_offset, sub_type, sub_shape))
+                bitfields.extend(ctype.bitfields)
+            else:
+                fields.append((member_name, member_offset, ctype, shape))
+            bit = max(bit, (member_offset + member_size) * 8)
+            size = max(size, member_offset + member_size)
+            align = max(align, member_align(ctype, attributes))
+
+        size = max(size, (bit + 7) // 8)  # 끝에 있는 폭 0 비트필드가 넓힌 자리 포함
+        if aligned:
+            align = max(align, aligned)
+        size = _align_up(size, align) if size else 0
+
+        names = [field[0] for field in fields]
+        duplicated = {n for n in names if names.count(n) > 1}
+        if duplicated:
+            raise CStructError(f"{name}: 멤버 이름이 중복되었습니다: {', '.join(sorted(duplicated))}")
+        dtype = np.dtype({
+            "names": names,
+            "formats": [self._field_dtype(ctype, shape) for _, _, ctype, shape in fields],
+            "offsets": [field[1] for field in fields],
+            "itemsize": max(size, 1),
+        })
+        return CType(name, size, align, dtype, kind=kind, fields=fields, bitfields=bitfields)
+
+    @staticmethod
+    def _field_dtype(ctype, shape):
+        if not shape:
+            return ctype.dtype
+        if ctype.kind == "scalar" and ctype.name == "char":
+            # char 배열은 마지막 차원을 문자열 하나로 표시
+            return np.dtype((f"S{shape[-1]}", shape[:-1])) if len(shape) > 1 else np.dtype(f"S{shape[-1]}")
+        return np.dtype((ctype.dtype, shape))
+
+
+def parse_structs(text, byteorder="<", pointer_size=4, long_size=4):
+    """
+    헤더 텍스트의 struct/union 정의를 해석하는 함수
+    Returns:
+        dict: {타입 이름: CType} (typedef 이름과 'struct tag' 이름 모두 포함, 정의 순서)
+    """
+    parser = CStructParser(byteorder=byteorder, pointer_size=pointer_size, long_size=long_size)
+    return parser.parse(text)
+
+
+def overlay(buffer, ctype, offset=0, count=None):
+    """
+    버퍼(mmap된 덤프 등) 위에 구조체 배열을 겹쳐 복사 없이 해석하는 함수
+    Args:
+        offset: 버퍼 시작 기준 첫 레코드 위치 (바이트)
+        count: 레코드 수 (None이면 버퍼 끝까지)
+    Returns:
+        np.ndarray: structured 배열 (버퍼를 참조하는 읽기 전용 view)
+    """
+    length = len(buffer)
+    if ctype.size <= 0:
+        raise CStructError(f"{ctype.name}: 크기가 0인 타입은 겹쳐 볼 수 없습니다.")
+    if offset < 0 or offset + ctype.size > length:
+        raise CStructError(f"주소가 덤프 범위를 벗어났습니다. (offset {offset:#x}, 덤프 크기 {length:#x})")
+    available = (length - offset) // ctype.size
+    count = available if count is None else min(count, available)
+    return np.frombuffer(buffer, dtype=ctype.dtype, count=count, offset=offset)
+
+
+def _native(values):
+    """pandas가 다룰 수 있도록 big endian 숫자 배열을 native byte order로 변환"""
+    if values.dtype.kind in "iuf" and not values.dtype.isnative:
+        return values.astype(values.dtype.newbyteorder("="))
+    return values
+
+
+def _bitfield(raw, shift, width, big_endian):
+    """비트필드가 걸친 바이트들(레코드 수 x 바이트 수)을 정수로 합친 뒤 shift/width로 값을 꺼냄 (최대 9바이트)"""
+    raw = raw.reshape(len(raw), -1).astype(np.uint64)
+    if big_endian:
+        raw = raw[:, ::-1]  # 하위 바이트부터
+    value = np.zeros(len(raw), dtype=np.uint64)
+    for i in range(min(raw.shape[1], 8)):
+        value |= raw[:, i] << np.uint64(8 * i)
+    value >>= np.uint64(shift)
+    if raw.shape[1] > 8:
+        # 9바이트에 걸친 64비트 필드 (shift는 항상 1 이상)
+        value |= raw[:, 8] << np.uint64(64 - shift)
+    return value & np.uint64((1 << width) - 1)
+
+
+def _flatten(ctype, values, prefix, columns, truncated, max_array_items):
+    """structured 배열을 '부모.자식', '배열[i]' 이름의 1차원 컬럼들로 펼침 (레코드 단위 반복 없이 벡터 연산)"""
+    if ctype.kind in ("struct", "union"):
+        for name, _, field_type, shape in ctype.fields:
+            if name.startswith("_bits"):
+                continue
+            _flatten_field(field_type, values[name], f"{prefix}{name}", shape, columns, truncated, max_array_items)
+        for name, unit_name, shift, width, signed, big_endian in ctype.bitfields:
+            field = _bitfield(values[unit_name], shift, width, big_endian)
+            if signed and width < 64:
+                field = field.astype(np.int64)
+                field = np.where(field >= 1 << (width - 1), field - (1 << width), field)
+            columns[f"{prefix}{name}"] = field
+    elif ctype.kind == "array":
+        _, _, element_type, shape = ctype.fields[0]
+        _flatten_field(element_type, values, prefix, shape, columns, truncated, max_array_items)
+    elif ctype.kind == "pointer":
+        columns[prefix] = np.char.mod(f"0x%0{ctype.size * 2}X", _native(values))
+    elif ctype.kind == "string" or ctype.dtype.kind == "S":
+        columns[prefix] = np.char.decode(values, "latin-1")
+    else:
+        columns[prefix] = _native(values)
+
+
+def _flatten_field(ctype, values, name, shape, columns, truncated, max_array_items):
+    if ctype.kind == "scalar" and ctype.name == "char" and shape:
+        shape = shape[:-1]  # 마지막 차원은 문자열
+        if not shape:
+            columns[name] = np.char.decode(values, "latin-1")
+            return
+        ctype = CType("char[]", 0, 1, values.dtype.base, kind="string")
+    if not shape:
+        prefix = f"{name}." if ctype.kind in ("struct", "union") else name
+        _flatten(ctype, values, prefix, columns, truncated, max_array_items)
+        return
+    count = int(np.prod(shape))
+    flat = values.reshape(len(values), count, *values.shape[1 + len(shape):])
+    if count > max_array_items:
+        truncated.append(f"{name}{''.join(f'[{n}]' for n in shape)}")
+    for i in range(min(count, max_array_items)):
+        index = "".join(f"[{k}]" for k in np.unravel_index(i, shape))
+        prefix = f"{name}{index}." if ctype.kind in ("struct", "union") else f"{name}{index}"
+        _flatten(ctype, flat[:, i], prefix, columns, truncated, max_array_items)
+
+
+def records_to_frame(records, ctype, base_address=0, max_array_items=16):
+    """
+    overlay 결과를 표로 변환하는 함수 (중첩 struct는 '부모.자식', 배열은 '이름[i]' 컬럼, 비트필드는 마스크/시프트로 추출)
+    Args:
+        base_address: 첫 레코드의 주소 ('address' 컬럼 계산)
+        max_array_items: 배열 멤버마다 펼칠 최대 원소 수 (넘는 원소는 생략)
+    Returns:
+        (pd.DataFrame, list): 표, 원소를 생략한 배열 멤버 이름 목록
+    """
+    n = len(records)
+    columns = {
+        "index": np.arange(n),
+        "address": np.char.mod("0x%08X", base_address + np.arange(n, dtype=np.uint64) * np.uint64(ctype.size)),
+    }
+    truncated = []
+    if ctype.kind in ("struct", "union"):
+        _flatten(ctype, records, "", columns, truncated, max_array_items)
+    else:
+        _flatten(ctype, records, "value", columns, truncated, max_array_items)
+    return pd.DataFrame(columns), truncated
@@ -0,0 +1,276 @@
+# call_graph.py
+import re
+import numpy as np
+import pandas as pd
+
+
+def _gather(indptr, indices, nodes):
+    """
+    CSR 인접 배열에서 여러 노드의 이웃을 한 번에 모아 반환하는 함수 (파이썬 반복 없이 벡터화)
+    Returns:
+        tuple: (이웃 노드 배열, 각 이웃의 출발 노드 배열)
+    """
+    starts = indptr[nodes]
+    counts = indptr[nodes + 1] - starts
+    total = int(counts.sum())
+    if total == 0:
+        empty = np.empty(0, dtype=indices.dtype)
+        return empty, empty
+    # 각 구간의 시작 오프셋을 반복시켜 연속 구간 인덱스를 만든다
+    offsets = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(total)
+    return indices[offsets], np.repeat(nodes, counts).astype(indices.dtype)
+
+
+def _build_csr(src, dst, n_nodes):
+    """(src, dst) 간선 목록으로 CSR(indptr, indices)을 생성"""
+    order = np.argsort(src, kind="stable")
+    indices = dst[order].astype(np.int32)
+    indptr = np.zeros(n_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=n_nodes), out=indptr[1:])
+    return indptr, indices
+
+
+class CallGraph:
+    """
+    Function Map 시트로부터 만든 호출 그래프
+    노드 이름은 정수 ID로 압축하고, 순방향(callee)과 역방향(caller) 인접 정보를 CSR 배열로 보관한다.
+    """
+    def __init__(self, callers, callees):
+        """
+        Args:
+            callers: 호출하는 함수 이름 목록
+            callees: 호출되는 함수 이름 목록 (callers와 같은 길이)
+        """
+        codes, names = pd.factorize(pd.concat([pd.Series(callers), pd.Series(callees)], ignore_index=True))
+        n_edges = len(callers)
+        src = codes[:n_edges]
+        dst = codes[n_edges:]
+
+        # 중복 간선 제거
+        edges = np.unique(np.stack([src, dst], axis=1), axis=0) if n_edges else np.empty((0, 2), dtype=np.int64)
+
+        self.names = np.asarray(names, dtype=object)
+        self.node_of = {name: i for i, name in enumerate(self.names)}
+        self.n_nodes = len(self.names)
+        self.n_edges = len(edges)
+        self.out_indptr, self.out_indices = _build_csr(edges[:, 0], edges[:, 1], self.n_nodes)
+        self.in_indptr, self.in_indices = _build_csr(edges[:, 1], edges[:, 0], self.n_nodes)
+        self._scc_labels = None
+
+    @classmethod
+    def from_dataframes(cls, frames, caller_col, callee_col, separator=r"[,;\n]"):
+        """
+        여러 시트의 DataFrame에서 호출 관계를 읽어 그래프를 생성하는 함수
+        callee 셀에 여러 함수가 구분자로 나열된 경우 각각의 간선으로 분리한다.
+        Args:
+            frames: DataFrame 목록 (두 컬럼이 모두 있는 시트만 사용)
+            caller_col: 호출하는 함수 컬럼 이름
+            callee_col: 호출되는 함수 컬럼 이름
+            separator: callee 셀 내부 구분자 정규식
+        """
+        pairs = []
+        for df in frames:
+            if caller_col not in df.columns or callee_col not in df.columns:
+                continue
+            pair = df[[caller_col, callee_col]].dropna()
+            pair.columns = ["caller", "callee"]
+            pair = pair.assign(callee=pair["callee"].astype(str).str.split(separator)).explode("callee")
+            pair["caller"] = pair["caller"].astype(str).str.strip()
+            pair["callee"] = pair["callee"].str.strip()
+            pairs.append(pair[(pair["caller"] != "") & (pair["callee"] != "")])
+
+        edges = pd.concat(pairs, ignore_index=True) if pairs else pd.DataFrame(columns=["caller", "callee"])
+        return cls(edges["caller"].to_numpy(), edges["callee"].to_numpy())
+
+    def node_id(self, name):
+        if name not in self.node_of:
+            raise KeyError(f"그래프에 없는 함수입니다: {name}")
+        return self.node_of[name]
+
+    def find_nodes(self, pattern, limit=50):
+        """이름에 pattern이 포함된 노드 이름 목록을 반환 (대소문자 무시)"""
+        regex = re.compile(re.escape(pattern), re.IGNORECASE)
+        return [name for name in self.names if regex.search(str(name))][:limit]
+
+    def callees(self, name):
+        """name이 직접 호출하는 함수 목록"""
+        node = self.node_id(name)
+        return list(self.names[self.out_indices[self.out_indptr[node]:self.out_indptr[node + 1]]])
+
+    def callers(self, name):
+        """name을 직접 호출하는 함수 목록"""
+        node = self.node_id(name)
+        return list(self.names[self.in_indices[self.in_indptr[node]:self.in_indptr[node + 1]]])
+
+    def _adjacency(self, reverse):
+        return (self.in_indptr, self.in_indices) if reverse else (self.out_indptr, self.out_indices)
+
+    def _bfs(self, sources, reverse=False, max_depth=None):
+        """
+        단계별(level-synchronous) BFS
+        Returns:
+            tuple: (각 노드의 깊이 배열(-1은 미도달), 각 노드의 부모 배열)
+        """
+        indptr, indices = self._adjacency(reverse)
+        depth = np.full(self.n_nodes, -1, dtype=np.int32)
+        parent = np.full(self.n_nodes, -1, dtype=np.int64)
+        frontier = np.unique(np.asarray(sources, dtype=np.int64))
+        depth[frontier] = 0
+        level = 0
+
+        while len(frontier) and (max_depth is None or level < max_depth):
+            neighbors, origins = _gather(indptr, indices, frontier)
+            unseen = depth[neighbors] < 0
+            neighbors, origins = neighbors[unseen], origins[unseen]
+            # 같은 노드가 여러 번 나오면 첫 번째 부모만 사용
+            neighbors, first = np.unique(neighbors, return_index=True)
+            level += 1
+            depth[neighbors] = level
+            parent[neighbors] = origins[first]
+            frontier = neighbors.astype(np.int64)
+
+        return depth, parent
+
+    def reachable(self, name, reverse=False, max_depth=None):
+        """
+        name에서 (reverse=True이면 name으로) 전이적으로 도달 가능한 함수 목록
+        Returns:
+            list: (함수 이름, 깊이) 목록 (깊이 순)
+        """
+        depth, _ = self._bfs([self.node_id(name)], reverse, max_depth)
+        nodes = np.flatnonzero(depth > 0)
+        nodes = nodes[np.argsort(depth[nodes], kind="stable")]
+        return list(zip(self.names[nodes], depth[nodes]))
+
+    def shortest_path(self, source, target):
+        """
+        source에서 target까지의 최단 호출 경로
+        Returns:
+            list: 함수 이름 경로 (도달할 수 없으면 빈 목록)
+        """
+        src, dst = self.node_id(source), self.node_id(target)
+        depth, parent = self._bfs([src])
+        if depth[dst] < 0:
+            return []
+        path = [dst]
+        while path[-1] != src:
+            path.append(parent[path[-1]])
+        return list(self.names[path[::-1]])
+
+    def scc_labels(self):
+        """
+        강한 연결 요소(SCC) 라벨 배열을 반환 (반복형 Tarjan 알고리즘, 결과는 캐시)
+        """
+        if self._scc_labels is not None:
+            return self._scc_labels
+
+        indptr, indices = self.out_indptr, self.out_indices
+        n = self.n_nodes
+        index_of = [-1] * n
+        lowlink = [0] * n
+        on_stack = [False] * n
+        labels = [-1] * n
+        stack = []
+        counter = 0
+        n_labels = 0
+        indptr_list = indptr.tolist()
+        indices_list = indices.tolist()
+
+        for root in range(n):
+            if index_of[root] >= 0:
+                continue
+            # (노드, 다음에 볼 간선 위치) 쌍으로 재귀를 대신한다
+            work = [(root, indptr_list[root])]
+            index_of[root] = lowlink[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = True
+
+            while work:
+                node, edge = work[-1]
+                if edge < indptr_list[node + 1]:
+                    work[-1] = (node, edge + 1)
+                    nxt = indices_list[edge]
+                    if index_of[nxt] < 0:
+                        index_of[nxt] = lowlink[nxt] = counter
+                        counter += 1
+                        stack.append(nxt)
+                        on_stack[nxt] = True
+                        work.append((nxt, indptr_list[nxt]))
+                    elif on_stack[nxt]:
+                        lowlink[node] = min(lowlink[node], index_of[nxt])
+                    continue
+
+                work.pop()
+                if work:
+                    up = work[-1][0]
+                    lowlink[up] = min(lowlink[up], lowlink[node])
+                if lowlink[node] == index_of[node]:
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = False
+                        labels[member] = n_labels
+                        if member == node:
+                            break
+                    n_labels += 1
+
+        self._scc_labels = np.asarray(labels, dtype=np.int64)
+        return self._scc_labels
+
+    def cycles(self, min_size=2):
+        """
+        순환 호출(재귀) 그룹 목록을 반환
+        Args:
+            min_size: 포함할 SCC 최소 크기 (1이면 자기 자신을 호출하는 함수도 포함)
+        Returns:
+            list: 함수 이름 목록의 목록 (큰 그룹 순)
+        """
+        labels = self.scc_labels()
+        sizes = np.bincount(labels, minlength=1)
+        order = np.argsort(labels, kind="stable")
+        bounds = np.concatenate([[0], np.cumsum(sizes)])
+        groups = []
+        for label in np.flatnonzero(sizes >= max(min_size, 1)):
+            members = order[bounds[label]:bounds[label + 1]]
+            if len(members) == 1:
+                node = members[0]
+                neighbors = self.out_indices[self.out_indptr[node]:self.out_indptr[node + 1]]
+                if node not in neighbors:
+                    continue
+            groups.append(list(self.names[members]))
+        return sorted(groups, key=len, reverse=True)
+
+    def neighborhood(self, name, depth=2, max_nodes=200):
+        """
+        name 주변(caller/callee 양방향)으로 depth 단계 이내의 부분 그래프를 반환
+        노드 수가 max_nodes를 넘으면 가까운 노드부터 자른다.
+        Returns:
+            tuple: (노드 이름 목록, (caller, callee) 간선 목록)
+        """
+        center = self.node_id(name)
+        down, _ = self._bfs([center], reverse=False, max_depth=depth)
+        up, _ = self._bfs([center], reverse=True, max_depth=depth)
+        distance = np.where(down < 0, up, np.where(up < 0, down, np.minimum(down, up)))
+        nodes = np.flatnonzero(distance >= 0)
+        nodes = nodes[np.argsort(distance[nodes], kind="stable")][:max_nodes]
+
+        selected = np.zeros(self.n_nodes, dtype=bool)
+        selected[nodes] = True
+        dst, src = _gather(self.out_indptr, self.out_indices, nodes)
+        keep = selected[dst]
+        edges = list(zip(self.names[src[keep]], self.names[dst[keep]]))
+        return list(self.names[nodes]), edges
+
+    def to_dot(self, nodes, edges, highlight=None):
+        """neighborhood 결과를 Graphviz DOT 문자열로 변환"""
+        def quote(value):
+            return '"' + str(value).replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+        lines = ["digraph callgraph {", "  rankdir=LR;", "  node [shape=box, fontsize=10];"]
+        for node in nodes:
+            style = ' [style=filled, fillcolor="#ffd966"]' if node == highlight else ""
+            lines.append(f"  {quote(node)}{style};")
+        for caller, callee in edges:
+            lines.append(f"  {quote(caller)} -> {quote(callee)};")
+        lines.append("}")
+        return "\n".join(lines)
@@ -1,38 +1,373 @@
+import hashlib
+import json
+import os
+import time
 import streamlit as st
 from file_manager import FileManager
+from perf_trace import span
+from session_memory import session_values
+from shared_cache import get_shared_cache
+import attachment_pipeline as ap
+from token_budget import TokenBudget
+from response_cache import ResponseCache
+from mk_vector_store import INDEX_FILE, MANIFEST_FILE
+from log_store import LogStore, format_log_context
+from vector_store import SEARCH_MODES, CodeVectorStore, format_source, format_context
+
+
+@st.cache_resource
+def get_embedder():
+    """첨부 파일 청크 임베딩 모델 (프로세스당 한 번만 로드)"""
+    return ap.get_embedder()
+
+
+@st.cache_resource(max_entries=32, show_spinner="첨부 파일을 청크로 나누고 임베딩하는 중...")
+def get_attachment_index(file_hash, _load_content):
+    """
+    첨부 파일 해시별로 청크와 임베딩을 캐시 (같은 파일은 다시 계산하지 않음)
+    내용은 캐시에 없을 때만 _load_content()로 읽는다. (디스크로 내보낸 첨부 파일을 질문마다 다시 불러오지 않음)
+    다른 서버 프로세스가 이미 만든 인덱스는 공유 캐시에서 가져온다. (임베딩 배열은 mmap으로 공유)
+    """
+    embedder = get_embedder()
+    cache = get_shared_cache()
+    key = f"{file_hash}|{embedder.name}"
+    parts = cache.get("attachment_index", key)
+    embeddings = cache.get("attachment_embeddings", key)
+    if parts is not None and embeddings is not None:
+        return ap.AttachmentIndex.from_parts(parts, embeddings, embedder)
+
+    index = ap.AttachmentIndex(_load_content(), embedder)
+    cache.put("attachment_embeddings", key, index.embeddings)
+    cache.put("attachment_index", key, index.parts())
+    return index
+
+
+@st.cache_resource
+def get_response_cache():
+    """프로세스 전체에서 공유하는 디스크 응답 캐시"""
+    return ResponseCache(embedder=get_embedder())
+
+
+@st.cache_resource(show_spinner="코드 인덱스를 로드하는 중...")
+def get_code_vector_store(index_dir, index_mtime):
+    """코드 인덱스와 질문 임베딩 모델을 프로세스당 한 번만 로드 (manifest가 바뀌면 다시 로드)"""
+    return CodeVectorStore(index_dir)
+
+
+@st.cache_resource(max_entries=8, show_spinner="로그 파일을 색인하는 중...")
+def get_log_store(log_path, size, mtime):
+    """로그 파일 색인 (파일 크기/수정 시간이 바뀌면 추가된 부분만 이어서 색인)"""
+    store = LogStore(log_path)
+    if store.is_stale():
+        store.build()  # build가 갱신한 색인을 열어 둠
+    else:
+        store.open()
+    return store
+
 
 class ChatbotBase:
-    def __init__(self, base_dir="./project/CDL/"):
+    def __init__(self, base_dir="./project/CDL/", context_tokens=2000, top_k_chunks=5, max_prompt_tokens=6000, code_index_dir="."):
         self.file_manager = FileManager(base_dir)
+        self.token_budget = TokenBudget(max_tokens=max_prompt_tokens)
         self.file_content = None  # 파일 내용을 저장할 변수
+        self.context_tokens = context_tokens  # 첨부 파일에서 프롬프트에 넣을 최대 토큰 수
+        self.top_k_chunks = top_k_chunks  # 질문마다 넣을 최대 청크 수
+        self.cache_enabled = True  # 응답 캐시 사용 여부
+        self.pending_cache_key = None  # 이번 질문의 캐시 조회에 사용한 컨텍스트 키 (응답 저장에 같은 키 사용)
+        self.similarity_threshold = None  # 유사 질문 캐시 임계값 (None이면 정확 일치만)
+        self.code_index_dir = code_index_dir  # mk_vector_store.py로 만든 코드 인덱스 폴더
+        self.rag_enabled = False  # 코드 검색(RAG) 사용 여부
+        self.rag_top_k = 5  # 질문마다 넣을 코드 스니펫 수
+        self.rag_mode = "hybrid"  # 검색 방식 (hybrid: 벡터 + BM25 식별자 검색)
+        self.log_path = None  # 질문과 관련된 구간을 넣을 로그 파일
+        self.log_max_lines = 200
 
-        # session_state에 file_content가 없으면 초기화
-        if "file_content" not in st.session_state:
-            st.session_state.file_content = None
+        # 첨부 파일 해시가 없으면 초기화 (파일 내용은 session_values()에 보관하며, 첨부하지 않았으면 키가 없음)
+        if "file_hash" not in st.session_state:
+            st.session_state.file_hash = None
 
     def load_file_content(self, selected_folder, selected_file):
         """
-        파일을 로드하여 st.session_state.file_content에 저장하는 함수
+        파일을 로드하여 세션 값 저장소(session_values)의 file_content에 저장하는 함수
+        (큰 파일은 세션 메모리 상한에 따라 디스크로 내보내질 수 있음)
         Args:
             selected_folder: 선택된 폴더 경로
             selected_file: 선택된 파일 이름
         """
         file_path = f"{selected_folder}/{selected_file}"
-        st.session_state.file_content = self.file_manager.load_file(file_path)
+        # 네트워크에서 큰 파일을 받는 동안 진행률을 표시
+        progress_bar = st.sidebar.progress(0.0, text=f"{selected_file} 받는 중...")
+
+        def progress(done, total):
+            progress_bar.progress(done / total if total else 1.0, text=f"{selected_file} 받는 중... {done / 2 ** 20:.0f}/{total / 2 ** 20:.0f}MB")
+
+        content = self.file_manager.load_file(file_path, progress)
+        progress_bar.empty()
+        values = session_values()
+        if content is None:
+            values.pop("file_content")
+            st.session_state.file_hash = None
+        else:
+            values["file_content"] = content
+            st.session_state.file_hash = self.file_manager.file_hash(file_path)
+
+    def get_attachment_context(self, user_prompt):
+        """
+        첨부 파일에서 질문과 관련된 청크만 골라 하나의 문자열로 반환하는 함수
+        Args:
+            user_prompt: 사용자가 입력한 질문
+        """
+        values = session_values()
+        file_hash = st.session_state.get("file_hash") or ap.content_hash(values["file_content"])
+        index = get_attachment_index(file_hash, lambda: values["file_content"])
+        chunks = index.select(user_prompt, top_k=self.top_k_chunks, max_tokens=self.context_tokens)
+        return "\n...\n".join(chunks)
 
     def initialize_messages(self):
         """
         세션 상태에 메시지 저장소가 없으면 초기화하는 함수
         """
-        if "messages" not in st.session_state:
-            st.session_state["messages"] = [{"role": "assistant", "content": "How can I help you?"}]
+        session_values().setdefault("messages", [{"role": "assistant", "content": "How can I help you?"}])
 
     def display_messages(self):
         """
         기존 대화 기록을 화면에 표시하는 함수
         """
-        for msg in st.session_state["messages"]:
-            st.chat_message(msg["role"]).write(msg["content"])
+        metrics = st.session_state.get("response_metrics", {})
+        for i, msg in enumerate(session_values()["messages"]):
+            with st.chat_message(msg["role"]):
+                st.write(msg["content"])
+                if i in metrics:
+                    st.caption(self.format_metrics(metrics[i]))
+                    self.display_sources(metrics[i])
+
+    def format_metrics(self, metrics):
+        """응답 속도 지표를 한 줄 문자열로 변환"""
+        if metrics.get("cached"):
+            similarity = metrics["similarity"]
+            match = "정확 일치" if similarity >= 1.0 else f"유사도 {similarity:.2f}"
+            return f"⚡ 캐시된 응답 ({match}) · {metrics['total'] * 1000:.1f}ms"
+
+        ttft = metrics.get("ttft")
+        ttft_text = f"{ttft:.2f}s" if ttft is not None else "-"
+        text = (
+            f"첫 토큰 {ttft_text} · {metrics['tokens']} tokens · "
+            f"{metrics['tokens_per_s']:.1f} tokens/s · 전체 {metrics['total']:.2f}s"
+        )
+        retrieval = metrics.get("retrieval")
+        if retrieval:
+            text += f" · 코드 검색 {retrieval['latency'] * 1000:.1f}ms ({len(retrieval['sources'])}개)"
+        log_window = metrics.get("log")
+        if log_window:
+            text += f" · 로그 {log_window['lines']}줄 ({log_window['latency'] * 1000:.1f}ms)"
+        prompt = metrics.get("prompt")
+        if prompt:
+            text += (
+                f" · 프롬프트 {prompt['prompt_tokens']} tokens "
+                f"(최근 {prompt['recent_turns']}개, 요약 {prompt['summarized_turns']}개"
+                f"{', 질문 ' + str(prompt['trimmed_tokens']) + ' tokens 생략' if prompt.get('trimmed_tokens') else ''})"
+            )
+        return text
+
+    def display_sources(self, metrics):
+        """RAG로 프롬프트에 넣은 코드 스니펫의 출처를 접힌 목록으로 표시"""
+        retrieval = metrics.get("retrieval")
+        if retrieval and retrieval["sources"]:
+            with st.expander(f"참조한 코드 ({len(retrieval['sources'])})"):
+                for source in retrieval["sources"]:
+                    st.markdown(f"- `{source}`")
+
+    def stream_response(self, chunks):
+        """
+        스트리밍 응답 조각을 화면에 순차적으로 표시하고 대화 기록에 추가하는 공통 함수
+        첫 토큰까지의 시간(TTFT)과 초당 토큰 수를 측정하여 st.session_state.response_metrics에 기록한다.
+        (API로 다시 보내는 messages에는 추가 필드를 넣지 않기 위해 별도로 저장)
+        Args:
+            chunks: 응답 텍스트 조각을 반환하는 generator (조각 하나를 토큰 하나로 계산)
+        Returns:
+            str: 전체 응답
+        """
+        metrics = {
+            "ttft": None,
+            "tokens": 0,
+            "prompt": st.session_state.get("last_prompt_stats"),
+            "retrieval": st.session_state.get("last_retrieval"),
+            "log": st.session_state.get("last_log_window"),
+        }
+        start = time.perf_counter()
+
+        def timed_chunks():
+            for chunk in chunks:
+                if not chunk:
+                    continue
+                if metrics["ttft"] is None:
+                    metrics["ttft"] = time.perf_counter() - start
+                metrics["tokens"] += 1
+                yield chunk
+
+        with st.chat_message("assistant"):
+            with span("llm.stream", backend=type(self).__name__) as attrs:
+                response = st.write_stream(timed_chunks())
+                attrs.update(ttft_ms=round((metrics["ttft"] or 0.0) * 1000, 1), tokens=metrics["tokens"])
+            metrics["total"] = time.perf_counter() - start
+            generation_time = metrics["total"] - (metrics["ttft"] or 0.0)
+            metrics["tokens_per_s"] = metrics["tokens"] / generation_time if generation_time > 0 else 0.0
+            st.caption(self.format_metrics(metrics))
+            self.display_sources(metrics)
+
+        if not isinstance(response, str):
+            response = "".join(str(part) for part in response)
+
+        session_values()["messages"].append({"role": "assistant", "content": response})
+        st.session_state.setdefault("response_metrics", {})[len(session_values()["messages"]) - 1] = metrics
+        return response
+
+    def cache_settings(self):
+        """사이드바에서 응답 캐시 사용 여부와 유사 질문 임계값을 설정하는 UI 제공"""
+        st.sidebar.subheader("응답 캐시")
+        self.cache_enabled = st.sidebar.checkbox("응답 캐시 사용", value=True, key="response_cache_enabled")
+        use_similarity = st.sidebar.checkbox("유사 질문도 캐시에서 찾기", value=False, key="response_cache_similar")
+        self.similarity_threshold = st.sidebar.slider(
+            "유사도 임계값", min_value=0.80, max_value=1.0, value=0.95, step=0.01, key="response_cache_threshold"
+        ) if use_similarity else None
+
+    def answer_from_cache(self, user_prompt, model, temperature):
+        """
+        캐시에 같은(또는 유사한) 질문의 응답이 있으면 화면에 표시하고 대화 기록에 추가하는 함수
+        Returns:
+            bool: 캐시 응답을 사용했는지 여부
+        """
+        if not self.cache_enabled:
+            return False
+
+        start = time.perf_counter()
+        # 응답을 저장할 때는 이번 질문과 답이 대화 기록에 추가되어 있으므로 조회 시점의 키를 보관해 둠
+        self.pending_cache_key = self.cache_context_key(session_values().get("messages", []))
+        hit = get_response_cache().get(model, temperature, user_prompt, self.pending_cache_key, self.similarity_threshold)
+        if hit is None:
+            return False
+
+        metrics = {"cached": True, "similarity": hit["similarity"], "total": time.perf_counter() - start}
+        session_values()["messages"].append({"role": "user", "content": user_prompt})
+        st.chat_message("user").write(user_prompt)
+        with st.chat_message("assistant"):
+            st.write(hit["response"])
+            st.caption(self.format_metrics(metrics))
+
+        session_values()["messages"].append({"role": "assistant", "content": hit["response"]})
+        st.session_state.setdefault("response_metrics", {})[len(session_values()["messages"]) - 1] = metrics
+        return True
+
+    def store_in_cache(self, user_prompt, model, temperature, response):
+        """오류가 아닌 응답만 캐시에 저장"""
+        if self.cache_enabled and response and not response.startswith("Error:"):
+            get_response_cache().put(model, temperature, user_prompt, response, self.pending_cache_key)
+
+    def cache_context_key(self, history):
+        """
+        응답에 영향을 주는 컨텍스트(첨부 파일, 코드 인덱스, 로그, 이전 대화)를 캐시 범위로 사용
+        이전 대화가 있으면 그 해시를 넣어 후속 질문이 다른 대화의 답을 받지 않도록 함
+        Args:
+            history: 이번 질문 이전의 대화 기록
+        """
+        key = st.session_state.get("file_hash") or ""
+        if history:
+            turns = json.dumps([(msg["role"], msg["content"]) for msg in history], ensure_ascii=False)
+            key += f"|history:{hashlib.sha256(turns.encode('utf-8')).hexdigest()[:16]}"
+        if self.rag_enabled:
+            key += f"|rag:{self.rag_mode}:{self.rag_top_k}:{self.code_index_mtime()}"
+        if self.log_path:
+            key += f"|log:{os.path.abspath(self.log_path)}:{os.path.getmtime(self.log_path)}"
+        return key or None
+
+    def code_index_mtime(self):
+        """
+        코드 인덱스의 수정 시간 (없으면 None)
+        mk_vector_store가 마지막에 쓰는 manifest를 기준으로 하여 갱신이 끝난 뒤에만 다시 로드되게 함
+        (manifest가 없는 예전 인덱스는 FAISS 인덱스 파일 기준)
+        """
+        for name in (MANIFEST_FILE, INDEX_FILE):
+            path = os.path.join(self.code_index_dir, name)
+            if os.path.exists(path):
+                return os.path.getmtime(path)
+        return None
+
+    def log_settings(self):
+        """사이드바에서 질문에 참고할 로그 파일을 지정하는 UI 제공"""
+        st.sidebar.subheader("로그")
+        base_dir = self.file_manager.base_dir
+        log_path = st.sidebar.text_input(
+            "로그 파일 경로", key="log_path",
+            help=f"{base_dir} 기준 상대 경로. 질문에 나온 시간/태그/레벨(에러, 경고 등)에 맞는 줄만 골라 질문에 포함합니다."
+        ).strip()
+        if log_path:
+            log_path = self.resolve_log_path(log_path)
+            if log_path is None:
+                st.sidebar.warning(f"로그 파일은 {base_dir} 아래에 있어야 합니다.")
+            elif not os.path.isfile(log_path):
+                st.sidebar.warning("로그 파일이 존재하지 않습니다.")
+                log_path = None
+        self.log_path = log_path or None
+        if self.log_path:
+            self.log_max_lines = st.sidebar.slider("최대 로그 줄 수", 20, 1000, 200, step=20, key="log_max_lines")
+
+    def resolve_log_path(self, log_path):
+        """
+        입력한 로그 경로를 데이터 레이크(base_dir) 기준 실제 경로로 변환하는 함수
+        Returns:
+            str 또는 None: base_dir 밖(절대 경로, ../, 심볼릭 링크 포함)을 가리키면 None
+        """
+        base = os.path.realpath(self.file_manager.base_dir)
+        path = os.path.realpath(os.path.join(base, log_path))
+        return path if os.path.commonpath([base, path]) == base else None
+
+    def get_log_context(self, user_prompt):
+        """
+        질문과 관련된 로그 구간을 프롬프트용 문자열로 반환하는 함수
+        조회 조건, 줄 수, 조회 시간은 st.session_state.last_log_window에 기록한다.
+        Returns:
+            str 또는 None: 로그 컨텍스트 (조회 실패 시 None)
+        """
+        try:
+            stat = os.stat(self.log_path)
+            store = get_log_store(self.log_path, stat.st_size, stat.st_mtime)
+            text, info = format_log_context(store, user_prompt, self.log_max_lines)
+        except Exception as e:
+            st.warning(f"로그 조회 실패: {e}")
+            return None
+        st.session_state["last_log_window"] = info
+        return text
+
+    def rag_settings(self):
+        """사이드바에서 코드 검색(RAG) 사용 여부와 검색할 스니펫 수를 설정하는 UI 제공"""
+        st.sidebar.subheader("코드 검색 (RAG)")
+        if self.code_index_mtime() is None:
+            st.sidebar.caption("코드 인덱스가 없습니다. mk_vector_store.py로 먼저 생성하세요.")
+            self.rag_enabled = False
+            return
+        self.rag_enabled = st.sidebar.checkbox("관련 코드를 검색하여 질문에 포함", value=False, key="rag_enabled")
+        if self.rag_enabled:
+            self.rag_top_k = st.sidebar.slider("검색할 코드 스니펫 수", 1, 20, 5, key="rag_top_k")
+            self.rag_mode = st.sidebar.selectbox(
+                "검색 방식", SEARCH_MODES, key="rag_mode",
+                help="hybrid: 임베딩 검색과 BM25 식별자 검색을 RRF로 결합, vector: 임베딩만, lexical: BM25만"
+            )
+
+    def retrieve_code_context(self, user_prompt):
+        """
+        질문과 관련된 코드 스니펫을 검색하여 프롬프트용 문자열로 반환하는 함수
+        검색 시간과 출처는 st.session_state.last_retrieval에 기록한다.
+        Returns:
+            str 또는 None: 코드 컨텍스트 (검색 실패 시 None)
+        """
+        try:
+            store = get_code_vector_store(self.code_index_dir, self.code_index_mtime())
+            results, latency = store.search(user_prompt, self.rag_top_k, mode=self.rag_mode)
+        except Exception as e:
+            st.warning(f"코드 검색 실패: {e}")
+            return None
+        st.session_state["last_retrieval"] = {"latency": latency, "sources": [format_source(r) for r in results]}
+        return format_context(results)
 
     def select_file(self):
         """
@@ -44,6 +379,9 @@ class ChatbotBase:
         if folders:
             selected_folder = st.sidebar.selectbox("폴더를 선택하세요", [""] + folders)
             files = self.file_manager.get_files_in_folder(selected_folder)
+            if selected_folder and files:
+                # 파일을 고르는 동안 폴더의 파일들을 로컬 캐시에 미리 받아 둠
+                self.file_manager.prefetch_folder(selected_folder)
 
             if files:
                 selected_file = st.sidebar.selectbox("파일을 선택하세요", [""] + files)
@@ -60,15 +398,47 @@ class ChatbotBase:
             str: 파일 내용을 포함한 질문 또는 일반 질문
         """
         # 사용자의 질문을 대화 히스토리에 추가
-        st.session_state["messages"].append({"role": "user", "content": user_prompt})
+        session_values()["messages"].append({"role": "user", "content": user_prompt})
         st.chat_message("user").write(user_prompt)
 
-        if st.session_state.file_content:
-            combined_prompt = f"파일 내용: {st.session_state.file_content}\n\n질문: {user_prompt}"
-        else:
-            combined_prompt = user_prompt
+        sections = []
+        if "file_content" in session_values():
+            # 첨부 파일 전체 대신 질문과 관련된 청크만 포함
+            sections.append(f"파일 내용: {self.get_attachment_context(user_prompt)}")
+
+        st.session_state["last_log_window"] = None
+        if self.log_path:
+            log_context = self.get_log_context(user_prompt)
+            if log_context:
+                sections.append(f"로그 데이터:\n{log_context}")
+
+        st.session_state["last_retrieval"] = None
+        if self.rag_enabled:
+            code_context = self.retrieve_code_context(user_prompt)
+            if code_context:
+                sections.append(f"관련 코드:\n{code_context}")
+
+        combined_prompt = "\n\n".join(sections + [f"질문: {user_prompt}"]) if sections else user_prompt
 
-        messages = st.session_state.messages.copy() if "messages" in st.session_state else []
-        messages.append({"role": "user", "content": combined_prompt})
+        # 최근 대화는 그대로, 오래된 대화는 요약하여 토큰 예산 안으로 맞춤
+        messages, stats = self.token_budget.build(
+            session_values().get("messages", []),
+            {"role": "user", "content": combined_prompt},
+            st.session_state.setdefault("history_summary", {}),
+            self.timed_summarize_history,
+        )
+        st.session_state["last_prompt_stats"] = stats
 
         return messages
+
+    def timed_summarize_history(self, text, max_tokens):
+        """대화 요약 LLM 호출 시간을 기록하는 래퍼"""
+        with span("llm.summarize", backend=type(self).__name__):
+            return self.summarize_history(text, max_tokens)
+
+    def summarize_history(self, text, max_tokens):
+        """
+        오래된 대화를 요약하는 함수 (각 챗봇에서 모델을 사용하도록 재정의)
+        None을 반환하면 TokenBudget이 단순 축약으로 대신한다.
+        """
+        return None
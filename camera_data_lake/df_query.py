@@ -0,0 +1,211 @@
+# df_query.py
+import numpy as np
+import pandas as pd
+
+
+_SHARED_ARRAYS = ("codes", "order", "bounds")  # 공유 캐시에서 mmap으로 공유하는 ColumnIndex 배열
+
+
+class ColumnIndex:
+    """
+    단일 컬럼에 대한 사전 계산 인덱스
+    - codes: 각 행의 값을 정렬된 고유값 순서(dense rank)로 변환한 정수 배열 (NaN은 가장 뒤)
+    - uniques: 정렬된 고유값 배열
+    - order/bounds: 코드 기준 안정 정렬 순서와 코드별 구간 경계 (역색인 겸 정렬 순서)
+    """
+    def __init__(self, series):
+        self.is_string = not (pd.api.types.is_numeric_dtype(series) or pd.api.types.is_datetime64_any_dtype(series))
+
+        try:
+            codes, uniques = pd.factorize(series, sort=True)
+        except TypeError:
+            # 타입이 섞인 object 컬럼은 문자열로 변환하여 정렬
+            codes, uniques = pd.factorize(series.astype(str), sort=True)
+            self.is_string = True
+
+        codes = np.asarray(codes, dtype=np.int64)
+        # 결측값(-1)은 정렬 시 맨 뒤로 보낸다
+        codes[codes < 0] = len(uniques)
+
+        self.codes = codes
+        self.uniques = np.asarray(uniques)
+        self.order = np.argsort(codes, kind="stable")
+        self.bounds = np.searchsorted(codes[self.order], np.arange(len(uniques) + 2))
+
+        if self.is_string:
+            # 부분 문자열 검색용 소문자 고유값과 정확 일치용 값→코드 사전
+            self.lower_uniques = pd.Series(self.uniques, dtype=object).astype(str).str.lower()
+            self.code_of = {value: code for code, value in enumerate(self.uniques)}
+
+    def rows_for_codes(self, code_list):
+        """코드 목록에 해당하는 행 번호 배열을 반환 (역색인 조회)"""
+        if len(code_list) == 0:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([self.order[self.bounds[c]:self.bounds[c + 1]] for c in code_list])
+
+    def rows_equal(self, values):
+        """값 목록과 정확히 일치하는 행 번호 배열을 반환"""
+        if self.is_string:
+            code_list = [self.code_of[v] for v in values if v in self.code_of]
+        else:
+            positions = np.searchsorted(self.uniques, values)
+            code_list = [p for p, v in zip(positions, values) if p < len(self.uniques) and self.uniques[p] == v]
+        return self.rows_for_codes(code_list)
+
+    def rows_containing(self, term):
+        """문자열 컬럼에서 term을 (대소문자 무시) 포함하는 행 번호 배열을 반환"""
+        matched = np.flatnonzero(self.lower_uniques.str.contains(term.lower(), regex=False).to_numpy())
+        return self.rows_for_codes(matched)
+
+    def rows_between(self, low=None, high=None):
+        """숫자/날짜 컬럼에서 low <= 값 <= high 인 행 번호 배열을 반환 (정렬 순서 구간 슬라이스)"""
+        start = 0 if low is None else np.searchsorted(self.uniques, low, side="left")
+        end = len(self.uniques) if high is None else np.searchsorted(self.uniques, high, side="right")
+        return self.order[self.bounds[start]:self.bounds[end]]
+
+
+def _unique_columns(columns):
+    """중복 컬럼 이름 뒤에 번호를 붙여 컬럼을 하나씩 조회할 수 있게 만든다"""
+    names = []
+    seen = {}
+    for col in columns:
+        name = str(col)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}_{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+class DataFrameQuery:
+    """
+    대용량 DataFrame에 대해 서버 측에서 페이징, 컬럼 필터, 다중 컬럼 정렬, 전체 텍스트 검색을 수행하는 클래스
+    인덱스는 생성 시 한 번만 계산되므로 st.cache_resource 등으로 재사용하는 것을 전제로 한다.
+    """
+    def __init__(self, df):
+        self.df = df.reset_index(drop=True)
+        self.columns = _unique_columns(self.df.columns)
+        self.df.columns = self.columns
+        self.indexes = {col: ColumnIndex(self.df[col]) for col in self.columns}
+
+    def __len__(self):
+        return len(self.df)
+
+    def parts(self):
+        """
+        공유 캐시에 저장할 값 (컬럼 인덱스의 정수 배열은 mmap으로 공유하도록 한 배열로 이어 붙여 따로 반환)
+        Returns:
+            (dict, np.ndarray): pickle로 저장할 나머지 값, int64 인덱스 배열
+        """
+        arrays, indexes, offset = [], {}, 0
+        for col, index in self.indexes.items():
+            state = {name: value for name, value in index.__dict__.items() if name not in _SHARED_ARRAYS}
+            spans = {}
+            for name in _SHARED_ARRAYS:
+                array = np.asarray(getattr(index, name), dtype=np.int64)
+                spans[name] = (offset, len(array))
+                arrays.append(array)
+                offset += len(array)
+            indexes[col] = (state, spans)
+        flat = np.concatenate(arrays) if arrays else np.empty(0, dtype=np.int64)
+        return {"df": self.df, "columns": self.columns, "indexes": indexes}, flat
+
+    @classmethod
+    def from_parts(cls, parts, flat):
+        """parts()의 값과 인덱스 배열(mmap 가능)로 다시 만드는 함수 (인덱스 배열은 복사하지 않고 view로 사용)"""
+        query = cls.__new__(cls)
+        query.df = parts["df"]
+        query.columns = parts["columns"]
+        query.indexes = {}
+        for col, (state, spans) in parts["indexes"].items():
+            index = ColumnIndex.__new__(ColumnIndex)
+            index.__dict__.update(state)
+            for name, (start, length) in spans.items():
+                setattr(index, name, flat[start:start + length])
+            query.indexes[col] = index
+        return query
+
+    def string_columns(self):
+        return [col for col in self.columns if self.indexes[col].is_string]
+
+    def filter_mask(self, filters=None, search=None):
+        """
+        필터와 검색어를 적용한 행 선택 마스크를 반환하는 함수
+        Args:
+            filters: {컬럼: 조건} 사전
+                - str: 부분 문자열 포함 (문자열 컬럼)
+                - list/set: 값 목록과 정확히 일치
+                - tuple (low, high): 구간 (숫자/날짜 컬럼, None은 열린 구간)
+            search: 모든 문자열 컬럼을 대상으로 하는 전체 텍스트 검색어
+        Returns:
+            np.ndarray: bool 마스크 (필터가 없으면 None)
+        """
+        n = len(self.df)
+        mask = None
+
+        for col, cond in (filters or {}).items():
+            if cond is None or cond == "" or cond == []:
+                continue
+            index = self.indexes[col]
+            if isinstance(cond, str):
+                rows = index.rows_containing(cond) if index.is_string else index.rows_equal([cond])
+            elif isinstance(cond, tuple):
+                rows = index.rows_between(*cond)
+            else:
+                rows = index.rows_equal(list(cond))
+
+            col_mask = np.zeros(n, dtype=bool)
+            col_mask[rows] = True
+            mask = col_mask if mask is None else (mask & col_mask)
+
+        if search:
+            search_mask = np.zeros(n, dtype=bool)
+            for col in self.string_columns():
+                search_mask[self.indexes[col].rows_containing(search)] = True
+            mask = search_mask if mask is None else (mask & search_mask)
+
+        return mask
+
+    def select_rows(self, filters=None, sort_by=None, search=None):
+        """
+        필터/검색/정렬을 적용한 행 번호 배열을 반환하는 함수
+        Args:
+            filters: filter_mask 참고
+            sort_by: [(컬럼, 오름차순 여부), ...] 앞쪽 컬럼이 우선순위가 높다
+            search: 전체 텍스트 검색어
+        Returns:
+            np.ndarray: 정렬된 행 번호 배열
+        """
+        mask = self.filter_mask(filters, search)
+        rows = np.arange(len(self.df)) if mask is None else np.flatnonzero(mask)
+
+        if sort_by:
+            # np.lexsort는 마지막 키가 1순위이므로 역순으로 전달
+            keys = []
+            for col, ascending in reversed(sort_by):
+                index = self.indexes[col]
+                codes = index.codes[rows]
+                if not ascending:
+                    # 내림차순에서도 결측값은 맨 뒤에 둔다
+                    n_uniques = len(index.uniques)
+                    codes = np.where(codes == n_uniques, n_uniques, n_uniques - 1 - codes)
+                keys.append(codes)
+            rows = rows[np.lexsort(keys)]
+
+        return rows
+
+    def page(self, rows, page=0, page_size=100):
+        """select_rows 결과에서 요청한 페이지의 DataFrame만 잘라서 반환"""
+        start = max(page, 0) * page_size
+        return self.df.iloc[rows[start:start + page_size]]
+
+    def query(self, filters=None, sort_by=None, search=None, page=0, page_size=100):
+        """
+        필터/검색/정렬을 적용한 뒤 요청한 페이지만 잘라서 반환하는 함수
+        Returns:
+            tuple: (페이지 DataFrame, 조건에 맞는 전체 행 수)
+        """
+        rows = self.select_rows(filters, sort_by, search)
+        return self.page(rows, page, page_size), len(rows)
@@ -0,0 +1,163 @@
+# dir_catalog.py
+import os
+import threading
+
+IGNORED_DIRS = {".git", "__pycache__", ".cache"}
+
+# 프로세스 전체에서 공유하는 catalog {루트 절대 경로: DirectoryCatalog}
+_lock = threading.Lock()
+_catalogs = {}
+
+
+class DirectoryCatalog:
+    """
+    데이터 레이크 폴더 구조를 메모리에 유지하는 catalog
+    - 백그라운드 스레드가 scandir로 주기적으로 갱신하고, 요청 처리 중에는 디스크를 탐색하지 않음
+    - 폴더의 수정 시간(mtime)이 바뀐 폴더만 다시 목록을 읽음 (바뀌지 않은 폴더는 stat 한 번)
+    - 변경이 생길 때마다 version을 올림
+    """
+    def __init__(self, root, interval=5.0, ignored=IGNORED_DIRS):
+        self.root = os.path.abspath(root)
+        self.interval = interval
+        self.ignored = set(ignored)
+        self.version = 0
+        self.last_error = None
+        self._dirs = {}  # 절대 경로 -> {"mtime", "dirs": [이름], "files": [이름]}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """초기 목록을 만든 뒤 갱신 스레드를 시작"""
+        self.refresh()
+        self._thread = threading.Thread(target=self._run, name="directory-catalog", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.refresh()
+                self.last_error = None
+            except Exception as e:
+                # 갱신 스레드는 오류가 나도 계속 동작해야 한다
+                self.last_error = e
+
+    def _list(self, path):
+        dirs, files = [], []
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    # 폴더 심볼릭 링크는 따라가지 않음 (링크 순환 방지)
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in self.ignored:
+                            dirs.append(entry.name)
+                    elif entry.is_file():
+                        files.append(entry.name)
+                except OSError:
+                    # 깨진 링크 등 상태를 확인할 수 없는 항목은 건너뜀
+                    continue
+        return sorted(dirs), sorted(files)
+
+    def refresh(self):
+        """
+        폴더 구조를 한 번 갱신하는 함수
+        Returns:
+            bool: 변경이 있었는지 여부
+        """
+        with self._lock:
+            previous = self._dirs
+        current = {}
+        changed = False
+        stack = [self.root]
+        while stack:
+            path = stack.pop()
+            try:
+                mtime = os.stat(path).st_mtime
+                cached = previous.get(path)
+                if cached is not None and cached["mtime"] == mtime:
+                    entry = cached
+                else:
+                    dirs, files = self._list(path)
+                    entry = {"mtime": mtime, "dirs": dirs, "files": files}
+                    changed = True
+            except OSError:
+                # 사라졌거나 권한이 없거나 읽을 수 없는 폴더는 건너뛰고 나머지 폴더는 계속 갱신
+                continue
+            current[path] = entry
+            stack.extend(os.path.join(path, name) for name in reversed(entry["dirs"]))
+
+        if set(current) != set(previous):
+            changed = True
+        if changed:
+            with self._lock:
+                self._dirs = current
+                self.version += 1
+        return changed
+
+    def _resolve(self, path):
+        """None이면 루트, 그 외에는 os 함수와 같이 현재 폴더 기준 경로로 해석"""
+        return self.root if path is None else os.path.abspath(path)
+
+    def contains(self, path):
+        path = os.path.abspath(path)
+        return path == self.root or path.startswith(self.root + os.sep)
+
+    def walk(self, base=None):
+        """os.walk와 같은 (폴더 경로, 하위 폴더 이름, 파일 이름) 목록 (디스크 탐색 없음, base가 None이면 루트)"""
+        with self._lock:
+            snapshot = self._dirs
+        stack = [self._resolve(base)]
+        while stack:
+            path = stack.pop()
+            entry = snapshot.get(path)
+            if entry is None:
+                continue
+            yield path, entry["dirs"], entry["files"]
+            stack.extend(os.path.join(path, name) for name in reversed(entry["dirs"]))
+
+    def folders(self, base=None):
+        """base 아래 모든 폴더의 base 기준 상대 경로"""
+        start = self._resolve(base)
+        return [os.path.relpath(path, start) for path, _, _ in self.walk(base) if path != start]
+
+    def files_in(self, folder):
+        """
+        폴더 안의 파일 이름 목록
+        Returns:
+            list 또는 None: catalog에 없는 폴더(새로 생겨 아직 갱신되지 않은 경우 등)는 None
+        """
+        with self._lock:
+            entry = self._dirs.get(self._resolve(folder))
+        return list(entry["files"]) if entry else None
+
+    def iter_files(self, base=None, extensions=None):
+        """base 아래 모든 파일의 전체 경로 (extensions가 있으면 해당 확장자만)"""
+        for path, _, files in self.walk(base):
+            for name in files:
+                if extensions is None or name.lower().endswith(extensions):
+                    yield os.path.join(path, name)
+
+    def find(self, filename, base=None):
+        """base 아래에서 처음 찾은 파일의 경로 (없으면 None)"""
+        for path, _, files in self.walk(base):
+            if filename in files:
+                return os.path.join(path, filename)
+        return None
+
+
+def get_directory_catalog(path="."):
+    """
+    path를 포함하는 공용 catalog를 반환하는 함수 (없으면 path를 루트로 새로 만들어 갱신 시작)
+    여러 탭과 세션이 같은 catalog를 공유하므로, 하위 폴더 요청은 상위 catalog를 재사용한다.
+    """
+    path = os.path.abspath(path)
+    with _lock:
+        for catalog in _catalogs.values():
+            if catalog.contains(path):
+                return catalog
+        catalog = _catalogs[path] = DirectoryCatalog(path).start()
+        return catalog
@@ -1,25 +1,33 @@
 import os
 import pickle
+import threading
 import streamlit as st
+from dir_catalog import get_directory_catalog
+from storage import get_storage
+from perf_trace import span
+
+# 미리 읽기를 요청한 폴더 {(저장소 id, 폴더 절대 경로): catalog version} (rerun마다 같은 폴더를 다시 요청하지 않음)
+_prefetch_lock = threading.Lock()
+_prefetched = {}
 
 class FileManager:
-    def __init__(self, base_dir="./project/CDL"):
+    def __init__(self, base_dir="./project/CDL", storage=None, prefetch_max_bytes=64 * 1024 * 1024):
         """
         base_dir: 네트워크 디바이스의 경로 또는 로컬 경로
+        storage: 파일 읽기 계층 (기본값은 프로세스 공용 캐시 저장소)
+        prefetch_max_bytes: 폴더 선택 시 미리 받아 둘 파일의 최대 크기
         """
         self.base_dir = base_dir  # 네트워크 디바이스 또는 로컬 경로 설정
+        self.storage = storage if storage is not None else get_storage()
+        self.prefetch_max_bytes = prefetch_max_bytes
 
     def get_all_folders_in_directory(self):
         """
         base_dir에서 모든 폴더 목록을 반환하는 함수
         """
-        folder_paths = []
         try:
-            # base_dir의 하위 폴더들 탐색
-            for root, dirs, files in os.walk(self.base_dir):
-                for dir_name in dirs:
-                    full_path = os.path.relpath(os.path.join(root, dir_name), self.base_dir)
-                    folder_paths.append(full_path)
+            # base_dir의 하위 폴더들 (공용 폴더 catalog에서 조회, 디스크 탐색 없음)
+            folder_paths = get_directory_catalog(self.base_dir).folders(self.base_dir)
 
             if not folder_paths:
                 st.sidebar.warning("선택할 폴더가 없습니다.")
@@ -35,38 +43,70 @@ class FileManager:
             folder_path: 사용자가 선택한 폴더의 경로
         """
         try:
+            files = get_directory_catalog(self.base_dir).files_in(os.path.join(self.base_dir, folder_path))
+            if files is not None:
+                return files
+            # catalog가 아직 갱신되지 않은 새 폴더는 직접 조회
             files = [f for f in os.listdir(os.path.join(self.base_dir, folder_path)) if os.path.isfile(os.path.join(self.base_dir, folder_path, f))]
             return files
         except Exception as e:
             st.sidebar.error(f"파일 목록을 불러오는 중 오류가 발생했습니다: {e}")
             return []
 
-    def load_file(self, file_path):
+    def prefetch_folder(self, folder_path):
+        """
+        선택한 폴더의 파일들을 백그라운드에서 로컬 캐시에 미리 받아 두는 함수 (Attach 시 대기 시간 감소)
+        Args:
+            folder_path: 사용자가 선택한 폴더의 경로
+        """
+        catalog = get_directory_catalog(self.base_dir)
+        folder = os.path.abspath(os.path.join(self.base_dir, folder_path))
+        # 폴더 내용이 바뀌었을 때(catalog version 변경)만 다시 요청
+        with _prefetch_lock:
+            if _prefetched.get((id(self.storage), folder)) == catalog.version:
+                return
+            _prefetched[(id(self.storage), folder)] = catalog.version
+        files = catalog.files_in(folder) or []
+        self.storage.prefetch(
+            [os.path.join(self.base_dir, folder_path, f) for f in files], max_file_bytes=self.prefetch_max_bytes
+        )
+
+    def load_file(self, file_path, progress=None):
         """
-        파일을 로드하여 내용을 반환하는 함수
+        파일을 로드하여 내용을 반환하는 함수 (로컬 캐시를 거쳐 읽고, 큰 파일은 병렬 청크로 받음)
         Args:
             file_path: 사용자가 선택한 파일의 경로 (네트워크 경로 포함)
+            progress: (받은 바이트, 전체 바이트) 콜백 - 진행 표시용
         """
         try:
             file_extension = file_path.split('.')[-1].lower()
             full_path = os.path.join(self.base_dir, file_path)
+            with span("file.load", ext=file_extension) as attrs:
+                data = self.storage.read(full_path, progress)
+                attrs["bytes"] = len(data)
 
-            if file_extension == "txt":
-                # 텍스트 파일 로드
-                with open(full_path, "r", encoding="utf-8") as file:
-                    return file.read()
+            with span("file.decode", ext=file_extension):
+                if file_extension == "txt":
+                    # 텍스트 파일 로드
+                    return data.decode("utf-8")
 
-            elif file_extension == "pkl":
-                # 피클 파일 로드
-                with open(full_path, "rb") as file:
-                    return pickle.load(file)
+                elif file_extension == "pkl":
+                    # 피클 파일 로드
+                    return pickle.loads(data)
 
-            else:
-                # 다른 파일 형식은 바이너리로 처리
-                with open(full_path, "rb") as file:
-                    return file.read()
+                else:
+                    # 다른 파일 형식은 바이너리로 처리
+                    return data
 
         except Exception as e:
             st.sidebar.error(f"파일을 로드하는 중 오류가 발생했습니다: {e}")
             return None
 
+    def file_hash(self, file_path):
+        """
+        파일 내용의 sha256 해시를 반환하는 함수 (첨부 파일 청크/임베딩 캐시 키로 사용)
+        Args:
+            file_path: 사용자가 선택한 파일의 경로 (네트워크 경로 포함)
+        """
+        # 캐시 저장소가 받으면서 계산한 해시를 사용 (파일을 다시 읽지 않음)
+        return self.storage.checksum(os.path.join(self.base_dir, file_path))
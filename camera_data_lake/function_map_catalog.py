@@ -0,0 +1,258 @@
+# function_map_catalog.py
+import os
+import pickle
+import threading
+import pandas as pd
+from df_query import DataFrameQuery
+
+PICKLE_EXTENSIONS = ('.pkl', '.pickle')
+EXCEL_EXTENSIONS = ('.xlsx', '.xlsm')
+
+
+def read_function_map(file_path):
+    """
+    피클 파일을 로드하고 시트별 DataFrameQuery 인덱스를 생성하는 함수
+    Returns:
+        dict 또는 DataFrameQuery: 시트 이름별 쿼리 객체 (단일 DataFrame이면 쿼리 객체 하나)
+    """
+    with open(file_path, "rb") as f:
+        data = pickle.load(f)
+
+    if isinstance(data, dict):
+        return {name: DataFrameQuery(df) if isinstance(df, pd.DataFrame) else df for name, df in data.items()}
+    elif isinstance(data, pd.DataFrame):
+        return DataFrameQuery(data)
+    return data
+
+
+def describe_schema(data):
+    """로드된 데이터의 시트 이름과 컬럼 목록을 요약 ({시트 이름: [컬럼]})"""
+    if isinstance(data, dict):
+        return {str(name): table.columns if isinstance(table, DataFrameQuery) else [] for name, table in data.items()}
+    if isinstance(data, DataFrameQuery):
+        return {"": data.columns}
+    return {}
+
+
+def _split_shared(data):
+    """
+    read_function_map 결과를 공유 캐시에 저장할 형태로 나누는 함수
+    Returns:
+        (tuple, dict): pickle로 저장할 구조, {이름: mmap으로 공유할 인덱스 배열}
+    """
+    arrays = {}
+
+    def split(value, name):
+        if isinstance(value, DataFrameQuery):
+            parts, arrays[name] = value.parts()
+            return ("query", parts, name)
+        return ("value", value)
+
+    if isinstance(data, dict):
+        return ("dict", {sheet: split(value, str(i)) for i, (sheet, value) in enumerate(data.items())}), arrays
+    return ("single", split(data, "")), arrays
+
+
+def _restore_shared(layout, get_array):
+    """_split_shared로 나눈 값을 되돌리는 함수 (인덱스 배열이 캐시에서 삭제되었으면 None)"""
+    def restore(entry):
+        if entry[0] == "value":
+            return entry[1]
+        flat = get_array(entry[2])
+        if flat is None:
+            raise KeyError(entry[2])
+        return DataFrameQuery.from_parts(entry[1], flat)
+
+    try:
+        if layout[0] == "dict":
+            return {sheet: restore(entry) for sheet, entry in layout[1].items()}
+        return restore(layout[1])
+    except KeyError:
+        return None
+
+
+class FunctionMapCatalog:
+    """
+    function_map 폴더를 백그라운드 스레드로 감시하며 파일 목록(경로, 크기, 수정 시각, 스키마)을 메모리에 유지하는 클래스
+    - 요청 처리 중에는 디스크를 탐색하지 않고 catalog의 목록만 사용한다.
+    - 새로 생기거나 변경된 피클 파일은 바로 미리 로드하고, 엑셀 파일은 피클로 변환한다.
+    - 변경이 생길 때마다 version을 올려 열린 세션이 새로고침 여부를 판단할 수 있게 한다.
+    """
+    def __init__(self, base_dir, interval=2.0, convert_excel=True, directory=None, cache=None):
+        self.base_dir = base_dir
+        self.directory = directory  # 공용 DirectoryCatalog (없으면 직접 scandir)
+        self.cache = cache  # 여러 서버 프로세스가 공유하는 SharedCache (없으면 프로세스마다 로드)
+        self.interval = interval
+        self.convert_excel = convert_excel
+        self.entries = {}  # 경로 -> {"path", "size", "mtime", "schema"}
+        self.version = 0
+        self.last_error = None
+        self._data = {}  # 경로 -> (mtime, 로드된 데이터)
+        self._failed_excel = {}  # 변환에 실패한 엑셀 경로 -> mtime (파일이 바뀔 때까지 다시 시도하지 않음)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """초기 목록을 만든 뒤 감시 스레드를 시작"""
+        self.scan(preload=False)
+        self._thread = threading.Thread(target=self._run, name="function-map-catalog", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.scan(preload=True)
+                self.last_error = None
+            except Exception as e:
+                # 감시 스레드는 오류가 나도 계속 동작해야 한다
+                self.last_error = e
+
+    def _walk(self, path):
+        """scandir로 하위 폴더까지 파일의 (경로, stat)을 반환 (공용 catalog가 있으면 대상 확장자 파일만 stat)"""
+        if self.directory is not None:
+            base = os.path.abspath(path)
+            for full_path in self.directory.iter_files(path, PICKLE_EXTENSIONS + EXCEL_EXTENSIONS):
+                # 목록에는 scandir를 쓸 때와 같이 base_dir 기준 경로를 사용
+                file_path = os.path.join(path, os.path.relpath(full_path, base))
+                try:
+                    yield file_path, os.stat(file_path)
+                except FileNotFoundError:
+                    continue
+            return
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        yield from self._walk(entry.path)
+                    elif entry.is_file():
+                        yield entry.path, entry.stat()
+        except FileNotFoundError:
+            return
+
+    def scan(self, preload=True):
+        """
+        폴더를 한 번 탐색하여 목록을 갱신하는 함수
+        Args:
+            preload: True이면 새로 생기거나 변경된 피클 파일을 즉시 로드
+        Returns:
+            bool: 목록에 변경이 있었는지 여부
+        """
+        found = {}
+        excel_files = []
+        for path, stat in self._walk(self.base_dir):
+            lower = path.lower()
+            if lower.endswith(PICKLE_EXTENSIONS):
+                found[path] = (stat.st_size, stat.st_mtime)
+            elif lower.endswith(EXCEL_EXTENSIONS) and not os.path.basename(path).startswith("~$"):
+                excel_files.append((path, stat.st_mtime))
+
+        if self.convert_excel:
+            converted = self._convert_new_excel(excel_files, found)
+            for path in converted:
+                stat = os.stat(path)
+                found[path] = (stat.st_size, stat.st_mtime)
+
+        changed = False
+        for path, (size, mtime) in found.items():
+            entry = self.entries.get(path)
+            if entry and entry["size"] == size and entry["mtime"] == mtime:
+                continue
+            schema = None
+            if preload:
+                try:
+                    schema = describe_schema(self._load(path, mtime))
+                except Exception as e:
+                    # 아직 쓰는 중이거나 손상된 파일은 목록에만 올리고 요청 시 다시 로드
+                    self.last_error = e
+            with self._lock:
+                self.entries[path] = {"path": path, "size": size, "mtime": mtime, "schema": schema}
+            changed = True
+
+        removed = set(self.entries) - set(found)
+        if removed:
+            with self._lock:
+                for path in removed:
+                    self.entries.pop(path, None)
+                    self._data.pop(path, None)
+            changed = True
+
+        if changed:
+            self.version += 1
+        return changed
+
+    def _convert_new_excel(self, excel_files, found):
+        """
+        피클이 없거나 엑셀보다 오래된 경우에만 엑셀 파일을 같은 폴더의 피클로 변환
+        변환에 실패한 파일은 (경로, 수정 시각)을 기록해 두고 파일이 바뀔 때까지 다시 시도하지 않음
+        """
+        from makepkl import convert_workbook
+
+        current = dict(excel_files)
+        self._failed_excel = {path: mtime for path, mtime in self._failed_excel.items() if current.get(path) == mtime}
+        converted = []
+        for path, mtime in excel_files:
+            pickle_path = os.path.splitext(path)[0] + ".pkl"
+            if pickle_path in found and found[pickle_path][1] >= mtime:
+                continue
+            if self._failed_excel.get(path) == mtime:
+                continue
+            try:
+                output_path, _ = convert_workbook(path, os.path.dirname(path))
+                converted.append(output_path)
+            except Exception as e:
+                self._failed_excel[path] = mtime
+                self.last_error = e
+        return converted
+
+    def _load(self, path, mtime):
+        data = read_function_map(path) if self.cache is None else self._load_shared(path, mtime)
+        with self._lock:
+            self._data[path] = (mtime, data)
+        return data
+
+    def _load_shared(self, path, mtime):
+        """
+        검색 인덱스까지 만든 결과를 공유 캐시로 다른 프로세스와 공유 (다른 프로세스는 인덱스 생성을 건너뜀)
+        - 컬럼 인덱스의 정수 배열은 .npy로 저장하여 mmap으로 복사 없이 공유
+        - DataFrame과 나머지 값은 pickle로 저장 (읽을 때 프로세스마다 역직렬화)
+        """
+        key = f"{os.path.abspath(path)}|{mtime}"
+        layout = self.cache.get("function_map", key)
+        if layout is not None:
+            data = _restore_shared(layout, lambda name: self.cache.get("function_map_index", f"{key}|{name}"))
+            if data is not None:
+                return data
+
+        data = read_function_map(path)
+        layout, arrays = _split_shared(data)
+        for name, array in arrays.items():
+            self.cache.put("function_map_index", f"{key}|{name}", array)
+        self.cache.put("function_map", key, layout)
+        return data
+
+    def files(self):
+        """피클 파일 경로 목록 (디스크 탐색 없음)"""
+        with self._lock:
+            return sorted(self.entries)
+
+    def get(self, path):
+        """
+        파일의 로드된 데이터를 반환하는 함수 (미리 로드되어 있지 않거나 변경되었으면 로드)
+        """
+        with self._lock:
+            entry = self.entries.get(path)
+            cached = self._data.get(path)
+        mtime = entry["mtime"] if entry else os.path.getmtime(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        data = self._load(path, mtime)
+        if entry and entry["schema"] is None:
+            with self._lock:
+                entry["schema"] = describe_schema(data)
+        return data
@@ -1,20 +1,17 @@
 # image_utils.py
 #import cairosvg
 import streamlit as st
+from artifact_store import get_artifact_store, download_artifact
 
 def save_svg(svg_content, file_name):
-    with open(file_name, "w") as f:
-        f.write(svg_content)
+    # 임시 파일 + rename으로 저장하고 버전 기록에 추가 (내용이 같으면 다시 쓰지 않음)
+    return get_artifact_store().put(file_name, svg_content)
 
 def convert_svg_to_png(svg_content, file_name):
-    cairosvg.svg2png(bytestring=svg_content.encode('utf-8'), write_to=file_name)
+    png_content = cairosvg.svg2png(bytestring=svg_content.encode('utf-8'))
+    return get_artifact_store().put(file_name, png_content)
 
 def download_image(file_name, file_type="svg"):
     mime_type = "image/svg+xml" if file_type == "svg" else "image/png"
-    with open(file_name, "rb") as f:
-        st.download_button(
-            label=f"{file_type.upper()} 이미지 다운로드",
-            data=f,
-            file_name=file_name,
-            mime=mime_type
-        )
+    # 파일을 rerun마다 다시 읽지 않고 저장소의 blob을 사용
+    download_artifact(file_name, f"{file_type.upper()} 이미지 다운로드", mime_type, container=st)
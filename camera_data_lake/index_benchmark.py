@@ -0,0 +1,143 @@
+# index_benchmark.py
+# 코드 인덱스 종류별(flat, ivfpq, hnsw) 검색 정확도(recall@k), 지연 시간(p50/p99), 메모리를 비교하는 벤치마크
+# 사용 예:
+#   python index_benchmark.py --index-dir .                      # mk_vector_store.py가 저장한 임베딩으로 측정
+#   python index_benchmark.py --synthetic 1000000 --dim 768      # 임의 벡터로 대규모 측정
+#   python index_benchmark.py --index-dir . --config ivfpq:nlist=4096,pq_m=32,nprobe=32 --config hnsw:ef_search=128
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from mk_vector_store import EMBEDDINGS_FILE, build_index, set_search_params
+
+DEFAULT_CONFIGS = [
+    "ivfpq:nprobe=8",
+    "ivfpq:nprobe=32",
+    "hnsw:ef_search=32",
+    "hnsw:ef_search=128",
+]
+
+
+def parse_config(text):
+    """'ivfpq:nlist=4096,nprobe=32' 형식의 설정 문자열을 (종류, 빌드 옵션, 검색 옵션)으로 변환"""
+    index_type, _, params = text.partition(":")
+    options = {}
+    for item in filter(None, params.split(",")):
+        key, _, value = item.partition("=")
+        options[key.strip()] = int(value)
+    search = {key: options.pop(key) for key in ("nprobe", "ef_search") if key in options}
+    return index_type, options, search
+
+
+def rss_bytes():
+    """현재 프로세스의 상주 메모리 (Linux /proc 기준, 없으면 0)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+
+def recall_at_k(found, truth):
+    """정답(flat 인덱스) 상위 k개 중 찾은 비율의 평균"""
+    hits = [len(set(f[f >= 0]) & set(t)) / len(t) for f, t in zip(found, truth)]
+    return float(np.mean(hits))
+
+
+def time_queries(index, queries, k):
+    """질문을 하나씩 검색하여 (결과 id, 질문별 지연 시간 배열)을 반환 (챗봇과 같은 단건 검색 기준)"""
+    ids = np.empty((len(queries), k), dtype=np.int64)
+    latencies = np.empty(len(queries))
+    for i, query in enumerate(queries):
+        start = time.perf_counter()
+        _, ids[i] = index.search(query[None, :], k)
+        latencies[i] = time.perf_counter() - start
+    return ids, latencies
+
+
+def benchmark(embeddings, queries, configs, k=10, log=print):
+    """
+    인덱스 설정별 성능을 측정하는 함수
+    인덱스는 디스크에 저장한 뒤 메모리 맵으로 다시 열어 실제 조회 경로와 같은 조건에서 측정한다.
+    Args:
+        embeddings: 인덱싱할 벡터 (N x D float32)
+        queries: 질문 벡터 (Q x D float32)
+        configs: parse_config 형식 문자열 목록 (flat은 기준으로 항상 포함)
+    Returns:
+        list: 설정별 결과 dict
+    """
+    import faiss
+
+    results = []
+    truth = None
+    built = {}  # 검색 옵션만 다른 설정은 같은 인덱스 파일을 재사용
+    with tempfile.TemporaryDirectory() as tmp:
+        for config in ["flat"] + [c for c in configs if c != "flat"]:
+            index_type, options, search = parse_config(config)
+            build_key = (index_type, tuple(sorted(options.items())))
+            if build_key not in built:
+                start = time.perf_counter()
+                index, resolved = build_index(embeddings, index_type, options)
+                path = os.path.join(tmp, f"bench_{len(built)}.idx")
+                faiss.write_index(index, path)
+                del index
+                built[build_key] = (path, resolved, time.perf_counter() - start)
+            path, resolved, build_time = built[build_key]
+
+            before = rss_bytes()
+            index = faiss.read_index(path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+            set_search_params(index, **search)
+            ids, latencies = time_queries(index, queries, k)
+            if truth is None:
+                truth = ids
+
+            result = {
+                "config": config,
+                "index": resolved,
+                "build_s": build_time,
+                f"recall@{k}": recall_at_k(ids, truth),
+                "p50_ms": float(np.percentile(latencies, 50) * 1000),
+                "p99_ms": float(np.percentile(latencies, 99) * 1000),
+                "index_mb": os.path.getsize(path) / 2 ** 20,
+                "rss_delta_mb": max(0, rss_bytes() - before) / 2 ** 20,
+            }
+            log(
+                f"{config:<28} recall@{k}={result[f'recall@{k}']:.3f}  p50={result['p50_ms']:.2f}ms  "
+                f"p99={result['p99_ms']:.2f}ms  index={result['index_mb']:.1f}MB  "
+                f"rss+={result['rss_delta_mb']:.1f}MB  build={build_time:.1f}s"
+            )
+            results.append(result)
+            del index
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FAISS 인덱스 종류별 recall/지연 시간/메모리 비교")
+    parser.add_argument("--index-dir", default=".", help=f"{EMBEDDINGS_FILE}이 있는 폴더")
+    parser.add_argument("--synthetic", type=int, default=0, help="저장된 임베딩 대신 임의 벡터 N개로 측정")
+    parser.add_argument("--dim", type=int, default=768, help="임의 벡터 차원")
+    parser.add_argument("--queries", type=int, default=200, help="측정할 질문 수")
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--config", action="append", dest="configs", help="측정할 설정 (여러 번 지정 가능)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    if args.synthetic:
+        embeddings = rng.standard_normal((args.synthetic, args.dim), dtype=np.float32)
+    else:
+        embeddings = np.load(os.path.join(args.index_dir, EMBEDDINGS_FILE)).astype(np.float32)
+
+    # 질문은 인덱싱된 벡터에 잡음을 더해 만듦 (실제 질문 분포를 흉내)
+    picks = rng.choice(len(embeddings), size=min(args.queries, len(embeddings)), replace=False)
+    noise = rng.standard_normal((len(picks), embeddings.shape[1]), dtype=np.float32)
+    queries = embeddings[picks] + 0.1 * noise * embeddings.std()
+
+    print(f"벡터 {len(embeddings)}개 x {embeddings.shape[1]}차원, 질문 {len(queries)}개")
+    benchmark(embeddings, queries, args.configs or DEFAULT_CONFIGS, k=args.k)
+
+
+if __name__ == "__main__":
+    main()
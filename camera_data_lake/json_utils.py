@@ -4,26 +4,32 @@ import json
 import re
 import streamlit as st
 from streamlit_ace import st_ace
+from dir_catalog import get_directory_catalog
+from perf_trace import span
+from session_memory import session_values
+from artifact_store import get_artifact_store
 
 BASE_DIR = "."
 
 def get_folder_options(current_dir):
     folder_options = []
-    for root, dirs, files in os.walk(current_dir):
-        for dir_name in dirs:
-            folder_path = os.path.join(root, dir_name)
-            # 상대 경로로 표시
-            relative_folder_path = os.path.relpath(folder_path, BASE_DIR)
-            folder_options.append(relative_folder_path)
+    # 공용 폴더 catalog에서 하위 폴더 조회 (rerun마다 os.walk하지 않음)
+    for folder in get_directory_catalog(current_dir).folders(current_dir):
+        # 상대 경로로 표시
+        relative_folder_path = os.path.relpath(os.path.join(current_dir, folder), BASE_DIR)
+        folder_options.append(relative_folder_path)
     # 루트 디렉토리도 추가
     folder_options.insert(0, current_dir)
     return folder_options
 
 def save_json(file_name, content, selected_folder="."):
     save_path = os.path.join(BASE_DIR, selected_folder, file_name)
-    with open(save_path, "w") as f:
-        f.write(content)
-    st.success(f"파일 저장 완료: {save_path}")
+    # 임시 파일 + rename으로 저장하고 버전 기록에 추가 (내용이 같으면 다시 쓰지 않음)
+    result = get_artifact_store().put(save_path, content)
+    if result["deduplicated"]:
+        st.info(f"변경 사항 없음: {save_path} (v{result['version']})")
+    else:
+        st.success(f"파일 저장 완료: {save_path} (v{result['version']})")
 
 def load_json(file_name, selected_folder="."):
     load_path = os.path.join(BASE_DIR, selected_folder, file_name)
@@ -95,12 +101,12 @@ def json_editor(default_json, tab_key, height=300):
     Ace 에디터를 사용하여 JSON 입력을 위한 UI를 제공하고,
     자동으로 JSON을 교정하는 함수.
     """
-    if f'json_input_{tab_key}' not in st.session_state:
-        st.session_state[f'json_input_{tab_key}'] = default_json
+    # 편집 버퍼는 세션 값 저장소에 보관 (세션 메모리 상한/유휴 세션 정리 대상)
+    buffer = session_values().setdefault(f'json_input_{tab_key}', default_json)
 
     # Streamlit Ace 에디터
     json_input_raw = st_ace(
-        value=st.session_state[f'json_input_{tab_key}'],
+        value=buffer,
         language='json',
         theme='monokai',
         height=height,
@@ -108,4 +114,5 @@ def json_editor(default_json, tab_key, height=300):
     )
 
     # 자동으로 JSON 교정
-    return correct_json(json_input_raw)
+    with span("json.correct", chars=len(json_input_raw or "")):
+        return correct_json(json_input_raw)
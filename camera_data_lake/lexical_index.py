@@ -0,0 +1,187 @@
+# lexical_index.py
+# 코드 청크용 BM25 역색인 (레지스터 이름, 함수 심볼처럼 임베딩 검색이 놓치는 정확한 식별자 검색용)
+import os
+import re
+import tempfile
+from functools import lru_cache
+
+import numpy as np
+
+IDENTIFIER_PATTERN = re.compile(r"[A-Za-z_][A-Za-z0-9_]*|0[xX][0-9A-Fa-f]+|\d+")
+CAMEL_PATTERN = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+
+
+@lru_cache(maxsize=1 << 18)
+def split_identifier(identifier):
+    """식별자 하나를 토큰 목록으로 변환 (코드에는 같은 식별자가 반복되므로 결과를 캐시)"""
+    lower = identifier.lower()
+    if not (identifier[0].isalpha() or identifier[0] == "_"):
+        return (lower,)
+    parts = [p.lower() for word in identifier.split("_") for p in CAMEL_PATTERN.findall(word)]
+    return (lower, *parts) if len(parts) > 1 else (lower,)
+
+
+def tokenize(text):
+    """
+    식별자를 인식하는 토크나이저
+    전체 식별자(소문자)와 함께 snake_case/camelCase 조각도 토큰으로 만든다.
+    예: "ispSetAEGain(ISP_AE_CTRL)" -> ispsetaegain, isp, set, ae, gain, isp_ae_ctrl, isp, ae, ctrl
+    """
+    return [token for identifier in IDENTIFIER_PATTERN.findall(text) for token in split_identifier(identifier)]
+
+
+def _gather_rows(indptr, values, rows):
+    """CSR에서 여러 행을 이어 붙여 (새 indptr, 값 목록)으로 반환"""
+    rows = np.asarray(rows, dtype=np.int64)
+    lengths = indptr[rows + 1] - indptr[rows]
+    new_indptr = np.concatenate(([0], np.cumsum(lengths))).astype(np.int64)
+    offsets = np.repeat(indptr[rows] - new_indptr[:-1], lengths)
+    positions = np.arange(new_indptr[-1], dtype=np.int64) + offsets
+    return new_indptr, [v[positions] for v in values]
+
+
+class LexicalIndex:
+    """
+    BM25 역색인
+    - 단어는 정수 id로 바꾸고, 문서별 (단어 id, 빈도)와 단어별 게시 목록(문서 id, 빈도)을 CSR 정수 배열(int32 + uint16)로 저장
+    - 단어 사전은 추가만 하므로, 변경되지 않은 문서의 (단어 id, 빈도)는 다음 색인에서 그대로 재사용
+    """
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.vocab = {}
+        self.doc_indptr = np.zeros(1, dtype=np.int64)
+        self.doc_terms = np.zeros(0, dtype=np.int32)
+        self.doc_tfs = np.zeros(0, dtype=np.uint16)
+        self._build_postings()
+
+    @property
+    def n_docs(self):
+        return len(self.doc_indptr) - 1
+
+    def _encode(self, texts):
+        """
+        문서 목록을 문서별 (단어 id, 빈도) CSR로 변환 (새 단어는 사전에 추가)
+        문서마다 식별자를 번호로 바꾸는 것까지만 파이썬으로 하고, 토큰 전개와 빈도 계산은 numpy로 한 번에 처리한다.
+        Returns:
+            tuple: (indptr, 단어 id 배열, 빈도 배열)
+        """
+        identifier_ids = {}
+        doc_identifiers = []
+        for text in texts:
+            doc_identifiers.append([identifier_ids.setdefault(i, len(identifier_ids)) for i in IDENTIFIER_PATTERN.findall(text)])
+
+        # 식별자 -> 단어 id 목록 (CSR)
+        expansions = [[self.vocab.setdefault(t, len(self.vocab)) for t in split_identifier(i)] for i in identifier_ids]
+        expansion_indptr = np.concatenate(([0], np.cumsum([len(e) for e in expansions], dtype=np.int64)))
+        expansion_terms = np.fromiter((t for e in expansions for t in e), np.int64, expansion_indptr[-1])
+
+        lengths = np.fromiter((len(ids) for ids in doc_identifiers), np.int64, len(doc_identifiers))
+        identifiers = np.fromiter((i for ids in doc_identifiers for i in ids), np.int64, lengths.sum())
+        docs = np.repeat(np.arange(len(texts), dtype=np.int64), lengths)
+
+        per_identifier = expansion_indptr[identifiers + 1] - expansion_indptr[identifiers]
+        _, (terms,) = _gather_rows(expansion_indptr, [expansion_terms], identifiers)
+        docs = np.repeat(docs, per_identifier)
+
+        # (문서, 단어) 쌍별 빈도
+        keys, tfs = np.unique(docs * max(len(self.vocab), 1) + terms, return_counts=True)
+        docs, terms = np.divmod(keys, max(len(self.vocab), 1))
+        indptr = np.concatenate(([0], np.cumsum(np.bincount(docs, minlength=len(texts))))).astype(np.int64)
+        return indptr, terms.astype(np.int32), np.minimum(tfs, np.iinfo(np.uint16).max).astype(np.uint16)
+
+    def rebuild(self, keep_ids, new_texts):
+        """
+        색인을 갱신하는 함수 (기존 문서 중 keep_ids 순서대로 남기고, 그 뒤에 new_texts를 새 문서로 추가)
+        mk_vector_store.run_indexer의 청크 번호 부여 순서와 같다.
+        """
+        indptr, (terms, tfs) = _gather_rows(self.doc_indptr, [self.doc_terms, self.doc_tfs], keep_ids)
+        new_indptr, new_terms, new_tfs = self._encode(new_texts)
+        self.doc_indptr = np.concatenate((indptr, indptr[-1] + new_indptr[1:]))
+        self.doc_terms = np.concatenate((terms, new_terms)).astype(np.int32)
+        self.doc_tfs = np.concatenate((tfs, new_tfs)).astype(np.uint16)
+        self._build_postings()
+
+    def _build_postings(self):
+        """문서별 CSR을 단어별 게시 목록 CSR로 전치 (문서 id 오름차순 유지)"""
+        docs = np.repeat(np.arange(self.n_docs, dtype=np.int32), np.diff(self.doc_indptr))
+        order = np.argsort(self.doc_terms, kind="stable")
+        self.post_docs = docs[order]
+        self.post_tfs = self.doc_tfs[order]
+        counts = np.bincount(self.doc_terms, minlength=len(self.vocab))
+        self.term_indptr = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+        doc_len = np.bincount(docs, weights=self.doc_tfs, minlength=self.n_docs)
+        self.doc_len = doc_len.astype(np.float32)
+        self.avg_doc_len = float(doc_len.mean()) if self.n_docs else 0.0
+
+    def search(self, query, top_k=10):
+        """
+        BM25 점수 상위 문서를 찾는 함수
+        Returns:
+            tuple: (문서 id 배열, 점수 배열) - 점수 내림차순
+        """
+        term_ids = sorted({self.vocab[t] for t in tokenize(query) if t in self.vocab})
+        if not term_ids or not self.n_docs:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        docs, weights = [], []
+        for term in term_ids:
+            start, end = self.term_indptr[term], self.term_indptr[term + 1]
+            term_docs = self.post_docs[start:end]
+            tf = self.post_tfs[start:end].astype(np.float32)
+            idf = np.log(1.0 + (self.n_docs - len(term_docs) + 0.5) / (len(term_docs) + 0.5))
+            norm = self.k1 * (1.0 - self.b + self.b * self.doc_len[term_docs] / self.avg_doc_len)
+            docs.append(term_docs)
+            weights.append(idf * tf * (self.k1 + 1.0) / (tf + norm))
+
+        docs = np.concatenate(docs)
+        scores = np.bincount(docs, weights=np.concatenate(weights))
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > top_k:
+            candidates = candidates[np.argpartition(-scores[candidates], top_k - 1)[:top_k]]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return candidates, scores[candidates].astype(np.float32)
+
+    def save(self, path):
+        """색인을 npz 파일 하나로 원자적으로 저장"""
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        # 고정 폭 문자열 배열 대신 줄바꿈으로 이은 UTF-8 바이트로 저장 (긴 식별자가 있어도 크기가 늘지 않음)
+        vocab = np.frombuffer("\n".join(sorted(self.vocab, key=self.vocab.get)).encode("utf-8"), dtype=np.uint8)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, vocab=vocab, doc_indptr=self.doc_indptr, doc_terms=self.doc_terms, doc_tfs=self.doc_tfs,
+                         params=np.array([self.k1, self.b]))
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            k1, b = data["params"]
+            index = cls(float(k1), float(b))
+            terms = data["vocab"].tobytes().decode("utf-8").split("\n") if data["vocab"].size else []
+            index.vocab = {term: i for i, term in enumerate(terms)}
+            index.doc_indptr = data["doc_indptr"]
+            index.doc_terms = data["doc_terms"]
+            index.doc_tfs = data["doc_tfs"]
+        index._build_postings()
+        return index
+
+
+def reciprocal_rank_fusion(rankings, k=60, top_k=10):
+    """
+    여러 검색 결과 순위를 RRF(점수 = Σ 1 / (k + 순위))로 합치는 함수
+    Args:
+        rankings: 문서 id 목록의 목록 (각각 관련도 내림차순)
+    Returns:
+        list: (문서 id, 점수) 목록 - 점수 내림차순
+    """
+    fused = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            fused[int(doc_id)] = fused.get(int(doc_id), 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: -item[1])[:top_k]
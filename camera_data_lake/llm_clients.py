@@ -0,0 +1,139 @@
+# llm_clients.py
+# 프로세스 전체에서 공유하는 LLM 클라이언트 저장소
+# 탭 객체는 세션마다 따로 만들어지므로, 클라이언트를 여기서 (backend, model, params) 키로 재사용하여
+# 여러 세션이 HTTP 연결(keep-alive)과 모델 로드 상태를 공유한다.
+import hashlib
+import os
+import re
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_OLLAMA_URL = os.environ.get("OLLAMA_BASE_URL", "http://localhost:11434")
+DEFAULT_KEEP_ALIVE = "30m"  # Ollama 서버가 모델을 메모리에 유지하는 시간
+
+# Go time.ParseDuration 단위 (Ollama keep_alive 형식)
+DURATION_UNITS = {"ns": 1e-9, "us": 1e-6, "µs": 1e-6, "ms": 1e-3, "s": 1, "m": 60, "h": 3600}
+DURATION_PART_PATTERN = re.compile(r"(\d+(?:\.\d*)?|\.\d+)(ns|us|µs|ms|s|m|h)")
+DURATION_PATTERN = re.compile(rf"(?:{DURATION_PART_PATTERN.pattern})+")
+
+_lock = threading.Lock()
+_clients = {}
+_warmups = {}  # (base_url, model) -> {"status": "loading"|"ready"|"error", "error": str, "until": 상태 유지 시각, "failures": 연속 실패 수}
+WARMUP_RETRY_SECONDS = 5.0  # warm-up 실패 후 첫 재시도까지의 대기 시간 (연속 실패마다 두 배, 최대 WARMUP_MAX_RETRY_SECONDS)
+WARMUP_MAX_RETRY_SECONDS = 300.0
+
+
+def _registry_key(backend, model, **params):
+    return (backend, model, tuple(sorted(params.items())))
+
+
+def _get_or_create(key, factory):
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            client = factory()
+            _clients[key] = client
+        return client
+
+
+def get_openai_client(api_key, base_url=None, max_connections=20):
+    """
+    API 키별로 하나의 OpenAI 클라이언트를 재사용 (httpx 연결 풀 공유)
+    API 키 원문 대신 해시를 키로 사용한다.
+    """
+    from openai import OpenAI
+    import httpx
+
+    key_hash = hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+    key = _registry_key("openai", None, key_hash=key_hash, base_url=base_url)
+
+    def factory():
+        http_client = httpx.Client(
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=httpx.Timeout(120.0, connect=10.0),
+        )
+        return OpenAI(api_key=api_key, base_url=base_url, http_client=http_client)
+
+    return _get_or_create(key, factory)
+
+
+def get_ollama_chat(model, temperature, base_url=DEFAULT_OLLAMA_URL, keep_alive=DEFAULT_KEEP_ALIVE):
+    """(모델, temperature, 서버 주소)별로 하나의 ChatOllama 인스턴스를 재사용"""
+    from langchain_community.chat_models import ChatOllama
+
+    key = _registry_key("ollama", model, temperature=temperature, base_url=base_url, keep_alive=keep_alive)
+    return _get_or_create(
+        key,
+        lambda: ChatOllama(model=model, temperature=temperature, base_url=base_url, keep_alive=keep_alive),
+    )
+
+
+def get_http_session(base_url):
+    """서버 주소별로 연결을 유지하는 requests.Session (Ollama API 직접 호출용)"""
+    def factory():
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    return _get_or_create(_registry_key("http", None, base_url=base_url), factory)
+
+
+def keep_alive_seconds(keep_alive):
+    """
+    Ollama keep_alive 값("30m", "1h30m", "2m30s", "500ms", 300 등, Go duration 형식)을 초로 변환
+    Returns:
+        float: 초 (음수는 계속 유지를 뜻하고, 해석할 수 없는 값은 서버가 정한 시간을 알 수 없으므로 None)
+    """
+    text = str(keep_alive).strip()
+    try:
+        value = float(text)
+    except ValueError:
+        sign = -1 if text.startswith("-") else 1
+        body = text.lstrip("+-")
+        if not DURATION_PATTERN.fullmatch(body):
+            return None
+        value = sign * sum(float(number) * DURATION_UNITS[unit] for number, unit in DURATION_PART_PATTERN.findall(body))
+    return None if value < 0 else value
+
+
+def warm_up_ollama(model, base_url=DEFAULT_OLLAMA_URL, keep_alive=DEFAULT_KEEP_ALIVE):
+    """
+    선택된 Ollama 모델을 백그라운드에서 미리 메모리에 올리는 함수
+    빈 프롬프트로 /api/generate를 호출하면 Ollama는 답변 없이 모델만 로드한다.
+    - "ready"는 keep_alive가 지나면 서버가 모델을 내렸을 수 있으므로 만료시키고 다시 로드한다.
+    - "error"는 연속 실패 수에 따라 대기 시간을 늘려 가며 다시 시도한다 (rerun마다 요청하지 않음).
+    Returns:
+        dict: 현재 warm-up 상태
+    """
+    key = (base_url, model)
+    now = time.time()
+    with _lock:
+        state = _warmups.get(key)
+        if state is not None and (state["status"] == "loading" or state["until"] is None or now < state["until"]):
+            return state
+        failures = state["failures"] if state is not None and state["status"] == "error" else 0
+        state = {"status": "loading", "error": None, "until": None, "failures": failures}
+        _warmups[key] = state
+
+    def run():
+        try:
+            response = get_http_session(base_url).post(
+                f"{base_url}/api/generate",
+                json={"model": model, "prompt": "", "keep_alive": keep_alive},
+                timeout=600,
+            )
+            response.raise_for_status()
+            seconds = keep_alive_seconds(keep_alive)
+            state.update(failures=0, until=None if seconds is None else time.time() + seconds)
+            state["status"] = "ready"
+        except Exception as e:
+            delay = min(WARMUP_RETRY_SECONDS * 2 ** state["failures"], WARMUP_MAX_RETRY_SECONDS)
+            state.update(error=str(e), failures=state["failures"] + 1, until=time.time() + delay)
+            state["status"] = "error"
+
+    threading.Thread(target=run, name=f"ollama-warmup-{model}", daemon=True).start()
+    return state
@@ -0,0 +1,256 @@
+# load_test.py
+# 여러 세션 동시 접속 부하 테스트 (Streamlit AppTest 기반, 브라우저 없이 한 대의 Linux 서버에서 실행)
+# - main.py의 TABS에 등록된 모든 탭을 탭별 시나리오로 조작 (탭 선택, 입력, 버튼, 챗봇 질문 등)
+# - 세션 N개를 스레드로 동시에 실행 (Streamlit 서버처럼 한 프로세스에서 모든 세션을 처리하므로 캐시/공용 자원도 공유됨)
+# - OpenAI/Ollama 대신 ollama_stub.py의 로컬 스텁 서버를 사용
+# - 탭별 처리량(actions/s), 동작 지연 p50/p95/p99, 오류 수, RSS 증가량을 출력
+# 사용 예:
+#   python load_test.py --sessions 20 --iterations 5
+#   python load_test.py --sessions 50 --tabs "GPT Chatbot" "OpenSource Chatbot" --token-delay 0.02 --json result.json
+# 참고: AppTest는 file_uploader와 커스텀 컴포넌트(st_ace)를 조작할 수 없으므로 Image Viewer 디코딩과 JSON 편집은 제외된다.
+import argparse
+import ast
+import gc
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from index_benchmark import rss_bytes
+from ollama_stub import start_stub_server
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+MAIN_SCRIPT = os.path.join(APP_DIR, "main.py")
+
+
+def load_tabs(script_path=MAIN_SCRIPT):
+    """main.py를 실행하지 않고 TABS 정의(탭 이름: (모듈, 클래스))만 읽는 함수"""
+    with open(script_path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(getattr(t, "id", None) == "TABS" for t in node.targets):
+            return ast.literal_eval(node.value)
+    raise ValueError(f"{script_path}에서 TABS를 찾을 수 없습니다.")
+
+
+def find_widget(widgets, label):
+    """라벨로 위젯 찾기 (없으면 None)"""
+    for widget in widgets:
+        if widget.label == label:
+            return widget
+    return None
+
+
+class SessionDriver:
+    """
+    AppTest 하나 = 브라우저 세션 하나
+    step()으로 실행한 동작마다 (탭, 동작, 초, 오류)를 기록한다.
+    """
+    def __init__(self, session_index, timeout=120):
+        from streamlit.testing.v1 import AppTest
+
+        self.index = session_index
+        self.at = AppTest.from_file(MAIN_SCRIPT, default_timeout=timeout)
+        self.records = []
+        self.opened = False
+
+    def step(self, tab, action, fn):
+        """fn(at)을 실행하고 rerun 결과를 기록 (fn 안에서 .run()을 호출해야 함)"""
+        start = time.perf_counter()
+        error = None
+        try:
+            fn(self.at)
+            if self.at.exception:
+                error = self.at.exception[0].message
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        self.records.append({"tab": tab, "action": action, "seconds": time.perf_counter() - start, "error": error})
+
+    def open_tab(self, tab):
+        """탭 선택 (첫 동작이면 앱 최초 실행 포함)"""
+        if not self.opened:
+            self.step(tab, "first_load", lambda at: at.run())
+            self.opened = True
+        self.step(tab, "open", lambda at: find_widget(at.sidebar.selectbox, "탭 선택").select(tab).run())
+
+
+# 탭별 시나리오: (driver, tab, iteration) -> None
+def scenario_timing_diagram(driver, tab, iteration):
+    driver.step(tab, "file_name", lambda at: find_widget(at.sidebar.text_input, "파일 이름 입력").input(f"lt_{driver.index}_{iteration}").run())
+    driver.step(tab, "rerun", lambda at: at.run())
+
+
+def scenario_memory(driver, tab, iteration):
+    driver.step(tab, "rerun", lambda at: at.run())
+
+
+def scenario_function_map(driver, tab, iteration):
+    selectbox = find_widget(driver.at.sidebar.selectbox, "피클 파일 선택")
+    if selectbox is None or not selectbox.options:
+        driver.step(tab, "rerun", lambda at: at.run())
+        return
+    option = selectbox.options[(driver.index + iteration) % len(selectbox.options)]
+    driver.step(tab, "select_file", lambda at: find_widget(at.sidebar.selectbox, "피클 파일 선택").select(option).run())
+    driver.step(tab, "load_file", lambda at: find_widget(at.sidebar.button, "피클 파일 로드").click().run())
+
+    def search(at):
+        text_input = find_widget(at.text_input, "전체 검색")
+        (text_input.input("a") if text_input is not None else at).run()
+
+    driver.step(tab, "search", search)
+
+
+def scenario_gpt_chatbot(driver, tab, iteration):
+    if iteration == 0:
+        driver.step(tab, "api_key", lambda at: at.text_input(key="chatbot_api_key").input("stub-key").run())
+    question = f"session {driver.index} question {iteration}: explain the ISP pipeline timing"
+    driver.step(tab, "ask", lambda at: at.chat_input[0].set_value(question).run())
+
+
+def scenario_opensource_chatbot(driver, tab, iteration):
+    question = f"session {driver.index} question {iteration}: summarize the sensor driver log"
+    driver.step(tab, "ask", lambda at: at.chat_input[0].set_value(question).run())
+
+
+def scenario_image_viewer(driver, tab, iteration):
+    driver.step(tab, "width", lambda at: find_widget(at.sidebar.number_input, "Width").set_value(640 + iteration).run())
+    driver.step(tab, "display", lambda at: find_widget(at.sidebar.button, "Display Image").click().run())
+
+
+SCENARIOS = {
+    "TabTimingDiagram": scenario_timing_diagram,
+    "TabMemoryFootprint": scenario_memory,
+    "TabFunctionMap": scenario_function_map,
+    "TabGPTChatbot": scenario_gpt_chatbot,
+    "CameraChatbotMistral7b": scenario_opensource_chatbot,
+    "TabImageViewer": scenario_image_viewer,
+}
+
+
+def default_scenario(driver, tab, iteration):
+    """시나리오가 없는 새 탭은 rerun만 반복"""
+    driver.step(tab, "rerun", lambda at: at.run())
+
+
+def run_session(session_index, tabs, iterations, timeout):
+    driver = SessionDriver(session_index, timeout)
+    for tab, (module_name, _) in tabs.items():
+        driver.open_tab(tab)
+        scenario = SCENARIOS.get(module_name, default_scenario)
+        for iteration in range(iterations):
+            scenario(driver, tab, iteration)
+    return driver.records
+
+
+class RssSampler:
+    """백그라운드에서 RSS 최댓값을 기록"""
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak = rss_bytes()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, rss_bytes())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def summarize(tab, records, wall_seconds, rss_before, rss_after, rss_peak):
+    seconds = np.array([r["seconds"] for r in records]) if records else np.zeros(1)
+    by_action = {}
+    for r in records:
+        by_action.setdefault(r["action"], []).append(r["seconds"])
+    return {
+        "tab": tab,
+        "actions": len(records),
+        "errors": sum(1 for r in records if r["error"]),
+        "first_error": next((r["error"] for r in records if r["error"]), None),
+        "throughput": len(records) / wall_seconds if wall_seconds > 0 else 0.0,
+        "p50_ms": float(np.percentile(seconds, 50) * 1000),
+        "p95_ms": float(np.percentile(seconds, 95) * 1000),
+        "p99_ms": float(np.percentile(seconds, 99) * 1000),
+        "actions_p95_ms": {action: float(np.percentile(values, 95) * 1000) for action, values in by_action.items()},
+        "rss_growth_mb": (rss_after - rss_before) / 2 ** 20,
+        "rss_peak_mb": rss_peak / 2 ** 20,
+        "wall_s": wall_seconds,
+    }
+
+
+def run_load_test(tabs, sessions, iterations, timeout=120, log=print):
+    """
+    탭마다 세션 N개를 동시에 실행하여 탭별 결과를 반환하는 함수
+    (탭을 차례로 측정해야 탭별 RSS 증가량을 구분할 수 있음)
+    """
+    results = []
+    for tab, spec in tabs.items():
+        gc.collect()
+        rss_before = rss_bytes()
+        start = time.perf_counter()
+        with RssSampler() as sampler, ThreadPoolExecutor(max_workers=sessions) as pool:
+            futures = [pool.submit(run_session, i, {tab: spec}, iterations, timeout) for i in range(sessions)]
+            records = [record for future in futures for record in future.result()]
+        wall = time.perf_counter() - start
+        gc.collect()
+        result = summarize(tab, records, wall, rss_before, rss_bytes(), sampler.peak)
+        results.append(result)
+        log(
+            f"{tab}: {result['actions']} actions, {result['errors']} errors, {result['throughput']:.1f}/s, "
+            f"p50 {result['p50_ms']:.0f}ms p95 {result['p95_ms']:.0f}ms p99 {result['p99_ms']:.0f}ms, "
+            f"RSS +{result['rss_growth_mb']:.1f}MB (peak {result['rss_peak_mb']:.0f}MB)"
+        )
+        if result["first_error"]:
+            log(f"  첫 오류: {result['first_error'][:200]}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streamlit 앱 다중 세션 부하 테스트")
+    parser.add_argument("--sessions", type=int, default=10, help="동시 세션 수")
+    parser.add_argument("--iterations", type=int, default=3, help="세션마다 탭 시나리오 반복 횟수")
+    parser.add_argument("--tabs", nargs="*", default=None, help="테스트할 탭 이름 (기본값: TABS 전체)")
+    parser.add_argument("--token-delay", type=float, default=0.01, help="스텁 LLM의 토큰 간격(초)")
+    parser.add_argument("--tokens", type=int, default=40, help="스텁 LLM 응답 토큰 수")
+    parser.add_argument("--timeout", type=float, default=120, help="rerun 하나의 최대 시간(초)")
+    parser.add_argument("--perf-log", default="", help="perf_trace 기록 파일 (기본값: 기록하지 않음)")
+    parser.add_argument("--json", default=None, help="결과를 저장할 JSON 파일")
+    args = parser.parse_args()
+
+    # LLM 클라이언트가 스텁 서버를 사용하도록 앱 모듈을 import하기 전에 환경 변수 설정
+    server, base_url = start_stub_server(token_delay=args.token_delay, n_tokens=args.tokens)
+    os.environ["OLLAMA_BASE_URL"] = base_url
+    os.environ["OPENAI_BASE_URL"] = f"{base_url}/v1"
+    os.environ["CDL_PERF_LOG"] = os.path.abspath(args.perf_log) if args.perf_log else ""
+    json_path = os.path.abspath(args.json) if args.json else None
+    os.chdir(APP_DIR)  # 앱은 실행 폴더 기준 상대 경로를 사용
+
+    tabs = load_tabs()
+    if args.tabs:
+        unknown = set(args.tabs) - set(tabs)
+        if unknown:
+            parser.error(f"알 수 없는 탭: {', '.join(sorted(unknown))}")
+        tabs = {tab: tabs[tab] for tab in args.tabs}
+
+    print(f"세션 {args.sessions}개 x 반복 {args.iterations}회, LLM 스텁 {base_url}, 시작 RSS {rss_bytes() / 2 ** 20:.0f}MB")
+    start = time.perf_counter()
+    results = run_load_test(tabs, args.sessions, args.iterations, args.timeout)
+    total_actions = sum(r["actions"] for r in results)
+    wall = time.perf_counter() - start
+    print(f"전체: {total_actions} actions, {total_actions / wall:.1f}/s, 최종 RSS {rss_bytes() / 2 ** 20:.0f}MB")
+    server.shutdown()
+
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump({"sessions": args.sessions, "iterations": args.iterations, "results": results}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
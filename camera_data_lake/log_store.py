@@ -0,0 +1,443 @@
+# log_store.py
+# 카메라/커널 로그를 한 줄씩 읽어 (시간, 태그, 레벨, 파일 위치)를 디스크 색인으로 저장하고,
+# 질문과 관련된 구간만 원본 로그에서 골라 읽는 로그 저장소
+# 사용 예:
+#   python log_store.py /data/logs/camera_20240105.log                     # 색인 생성/갱신
+#   python log_store.py /data/logs/camera_20240105.log --tag CamX --level E
+#   python log_store.py /data/logs/camera_20240105.log --question "12:03:05쯤 CamX 에러 원인은?"
+import argparse
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from functools import lru_cache
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: 프로세스 간 잠금 없이 진행
+    fcntl = None
+
+LEVELS = "VDIWEF"  # verbose, debug, info, warning, error, fatal
+LEVEL_NAMES = {"V": "verbose", "D": "debug", "I": "info", "W": "warning", "E": "error", "F": "fatal"}
+RECORD_DTYPE = np.dtype([("ts", "<f8"), ("offset", "<u8"), ("length", "<u4"), ("tag", "<u4"), ("level", "u1")])
+DEFAULT_INDEX_ROOT = "./.cache/log_index"
+
+# Android logcat (threadtime): "01-05 12:03:04.123  1234  1250 E CamX    : message"
+LOGCAT_PATTERN = re.compile(
+    rb"^(\d\d)-(\d\d) (\d\d):(\d\d):(\d\d)\.(\d+)\s+\d+\s+\d+\s+([VDIWEF])\s+([^:]*?)\s*: ?(.*)$"
+)
+# 날짜 포함 로그: "2024-01-05 12:03:04.123 E CamX: message", "2024-01-05T12:03:04.123 [E] [CamX] message"
+ISO_PATTERN = re.compile(
+    rb"^(\d{4})-(\d\d)-(\d\d)[ T](\d\d):(\d\d):(\d\d)(?:[.,](\d+))?\s+\[?([VDIWEF])\]?\s+\[?([\w.\-/]+?)\]?:?\s+(.*)$"
+)
+# 커널 로그: "<3>[  123.456789] msm_isp: message", "[  123.456789][  T123] cam_sensor: message"
+KERNEL_PATTERN = re.compile(rb"^(?:<(\d)>)?\[\s*(\d+\.\d+)\](?:\[[^\]]*\])*\s*(.*)$")
+KERNEL_TAG_PATTERN = re.compile(rb"^([\w.\-]{1,32}):\s*(.*)$")
+KERNEL_LEVELS = "FFFEWIID"  # 커널 priority(0~7) -> 레벨
+
+
+def _fraction(digits):
+    return int(digits) / (10 ** len(digits)) if digits else 0.0
+
+
+@lru_cache(maxsize=4096)
+def _minute_start(year, month, day, hour, minute):
+    """분 단위 시작 시각 (datetime 변환은 느리므로 같은 분의 줄은 캐시된 값에 초만 더함)"""
+    return datetime(year, month, day, hour, minute).timestamp()
+
+
+def parse_line(line, year):
+    """
+    로그 한 줄을 (시간, 레벨, 태그, 메시지)로 분해하는 함수
+    Args:
+        line: 줄바꿈을 뺀 bytes
+        year: 연도가 없는 logcat 로그에 사용할 연도
+    Returns:
+        tuple 또는 None: 형식에 맞지 않는 줄(여러 줄 메시지의 이어지는 줄 등)은 None
+    """
+    match = LOGCAT_PATTERN.match(line)
+    if match:
+        month, day, hour, minute, second, frac, level, tag, message = match.groups()
+        ts = _minute_start(year, int(month), int(day), int(hour), int(minute)) + int(second) + _fraction(frac)
+        return ts, level.decode(), tag.decode("utf-8", "replace").strip() or "-", message
+
+    match = ISO_PATTERN.match(line)
+    if match:
+        y, month, day, hour, minute, second, frac, level, tag, message = match.groups()
+        ts = _minute_start(int(y), int(month), int(day), int(hour), int(minute)) + int(second) + _fraction(frac)
+        return ts, level.decode(), tag.decode("utf-8", "replace"), message
+
+    match = KERNEL_PATTERN.match(line)
+    if match:
+        priority, seconds, rest = match.groups()
+        level = KERNEL_LEVELS[int(priority)] if priority else "I"
+        tag_match = KERNEL_TAG_PATTERN.match(rest)
+        tag = tag_match.group(1).decode("utf-8", "replace") if tag_match else "kernel"
+        return float(seconds), level, tag, rest
+    return None
+
+
+@contextmanager
+def _file_lock(path, exclusive=True):
+    """
+    잠금 파일로 여러 프로세스/인스턴스의 색인 갱신(배타)과 열기(공유)를 직렬화
+    파일을 닫으면 잠금이 풀린다.
+    """
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        yield
+
+
+def index_dir_for(log_path, index_root=DEFAULT_INDEX_ROOT):
+    """로그 파일별 색인 폴더 (원본 폴더가 읽기 전용일 수 있으므로 로컬 캐시 폴더 아래에 생성)"""
+    key = hashlib.sha256(os.path.abspath(log_path).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(index_root, f"{os.path.basename(log_path)}-{key}")
+
+
+class LogStore:
+    """
+    로그 파일 색인
+    - records.bin: 줄마다 (시간, 파일 위치, 길이, 태그 id, 레벨) 고정 크기 레코드 (np.memmap으로 읽음)
+    - meta.json: 태그 목록, 원본 크기/수정 시간, 마지막으로 읽은 위치
+    - 로그가 뒤에 계속 추가되는 경우 마지막 위치부터 이어서 색인
+    - 갱신은 임시 파일에 쓴 뒤 교체하므로 records.bin을 메모리 맵으로 열어 둔 다른 인스턴스/프로세스에 영향이 없음
+    - 메시지 본문은 복사하지 않고 질의 결과의 줄만 원본에서 seek하여 읽음
+    """
+    def __init__(self, log_path, index_root=DEFAULT_INDEX_ROOT):
+        self.log_path = log_path
+        self.index_dir = index_dir_for(log_path, index_root)
+        self.records_path = os.path.join(self.index_dir, "records.bin")
+        self.meta_path = os.path.join(self.index_dir, "meta.json")
+        self.lock_path = os.path.join(self.index_dir, "build.lock")
+        self.meta = None
+        self.records = np.zeros(0, dtype=RECORD_DTYPE)
+        self.tags = []
+
+    def _load_meta(self):
+        if not os.path.exists(self.meta_path):
+            return None
+        with open(self.meta_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save_meta(self, meta):
+        fd, tmp_path = tempfile.mkstemp(dir=self.index_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(meta, f, ensure_ascii=False)
+            os.replace(tmp_path, self.meta_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def build(self, batch_lines=200_000, log=None):
+        """
+        색인을 생성하거나 갱신하는 함수 (원본이 앞부분까지 같으면 새로 추가된 부분만 읽음)
+        갱신 후 새 색인을 연다.
+        Returns:
+            int: 새로 색인한 줄 수
+        """
+        os.makedirs(self.index_dir, exist_ok=True)
+        with _file_lock(self.lock_path):
+            added = self._build_locked(batch_lines, log)
+        self.open()
+        return added
+
+    def _build_locked(self, batch_lines, log):
+        stat = os.stat(self.log_path)
+        head = self._head_hash()
+        meta = self._load_meta()
+        if meta is not None and os.path.exists(self.records_path) and not self._is_stale(meta, stat):
+            return 0  # 잠금을 기다리는 동안 다른 인스턴스가 이미 갱신함
+        fresh = (meta is None or stat.st_size < meta["parsed_bytes"] or meta.get("head") != head
+                 or not os.path.exists(self.records_path))
+        if fresh:
+            # 처음이거나 로그가 잘리거나 교체된 경우 처음부터
+            meta = {"parsed_bytes": 0, "records": 0, "tags": [], "head": head,
+                    "year": datetime.fromtimestamp(stat.st_mtime).year}
+
+        tag_ids = {tag: i for i, tag in enumerate(meta["tags"])}
+        added = 0
+        last = self._last_record(meta["records"])
+        fd, tmp_path = tempfile.mkstemp(dir=self.index_dir, suffix=".tmp")
+        try:
+            with open(self.log_path, "rb") as src, os.fdopen(fd, "wb") as out:
+                if not fresh:
+                    # 기존 레코드 중 meta에 기록된 부분만 복사 (이전 갱신이 meta 저장 전에 중단된 경우 뒷부분은 버림)
+                    with open(self.records_path, "rb") as old:
+                        remaining = meta["records"] * RECORD_DTYPE.itemsize
+                        while remaining:
+                            chunk = old.read(min(remaining, 1 << 24))
+                            if not chunk:
+                                break
+                            out.write(chunk)
+                            remaining -= len(chunk)
+                src.seek(meta["parsed_bytes"])
+                offset = meta["parsed_bytes"]
+                batch = []
+                for raw in src:
+                    if not raw.endswith(b"\n"):
+                        break  # 아직 쓰는 중인 마지막 줄은 다음 갱신 때 처리
+                    parsed = parse_line(raw.rstrip(b"\r\n"), meta["year"])
+                    if parsed is not None:
+                        ts, level, tag, _ = parsed
+                        last = (ts, tag_ids.setdefault(tag, len(tag_ids)), LEVELS.index(level))
+                    elif last is None:
+                        last = (0.0, tag_ids.setdefault("-", len(tag_ids)), LEVELS.index("I"))
+                    # 시간 정보가 없는 줄(스택 트레이스 등)은 앞 줄의 시간/태그/레벨을 이어받음
+                    batch.append((last[0], offset, len(raw), last[1], last[2]))
+                    offset += len(raw)
+                    if len(batch) >= batch_lines:
+                        np.array(batch, dtype=RECORD_DTYPE).tofile(out)
+                        added += len(batch)
+                        batch = []
+                        if log:
+                            log(f"{added:,} lines indexed ({offset / 2 ** 20:.0f} MB)")
+                if batch:
+                    np.array(batch, dtype=RECORD_DTYPE).tofile(out)
+                    added += len(batch)
+            # 기존 파일을 열어 둔 쪽은 이전 내용을 계속 보고, 새로 여는 쪽은 새 파일을 봄
+            os.replace(tmp_path, self.records_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        meta.update({
+            "parsed_bytes": offset,
+            "records": meta["records"] + added,
+            "tags": sorted(tag_ids, key=tag_ids.get),
+            "source_size": stat.st_size,
+            "source_mtime": stat.st_mtime,
+        })
+        self._save_meta(meta)
+        return added
+
+    def _head_hash(self, size=4096):
+        """원본 앞부분의 해시 (같은 이름의 다른 로그로 교체되었는지 확인)"""
+        with open(self.log_path, "rb") as f:
+            return hashlib.sha256(f.read(size)).hexdigest()
+
+    def _last_record(self, count):
+        """이어서 색인할 때 첫 줄이 이어지는 줄이면 물려받을 마지막 레코드 (count: meta에 기록된 레코드 수)"""
+        if not count or not os.path.exists(self.records_path) or os.path.getsize(self.records_path) < count * RECORD_DTYPE.itemsize:
+            return None
+        last = np.fromfile(self.records_path, dtype=RECORD_DTYPE, count=1, offset=(count - 1) * RECORD_DTYPE.itemsize)[0]
+        return float(last["ts"]), int(last["tag"]), int(last["level"])
+
+    def open(self):
+        """색인을 메모리 맵으로 열고 시간순 정렬/태그별 목록을 준비"""
+        # 갱신 중인 meta와 records.bin이 섞이지 않도록 공유 잠금 안에서 함께 읽음 (맵을 연 뒤에는 교체되어도 안전)
+        with _file_lock(self.lock_path, exclusive=False):
+            self.meta = self._load_meta()
+            self.tags = self.meta["tags"]
+            n = min(self.meta["records"], os.path.getsize(self.records_path) // RECORD_DTYPE.itemsize)
+            self.records = np.memmap(self.records_path, dtype=RECORD_DTYPE, mode="r", shape=(n,)) if n else np.zeros(0, RECORD_DTYPE)
+        ts = self.records["ts"]
+        # 로그는 대부분 시간순이므로 이미 정렬되어 있으면 정렬 배열을 만들지 않음
+        self.time_order = None if n < 2 or np.all(ts[1:] >= ts[:-1]) else np.argsort(ts, kind="stable")
+        self.sorted_ts = ts if self.time_order is None else ts[self.time_order]
+        tags = self.records["tag"]
+        self.tag_order = np.argsort(tags, kind="stable")
+        self.tag_indptr = np.concatenate(([0], np.cumsum(np.bincount(tags, minlength=len(self.tags)))))
+        return self
+
+    def is_stale(self):
+        """원본 로그가 마지막 색인 이후 바뀌었는지 여부"""
+        meta = self._load_meta()
+        return meta is None or self._is_stale(meta, os.stat(self.log_path))
+
+    @staticmethod
+    def _is_stale(meta, stat):
+        return stat.st_size != meta.get("source_size") or stat.st_mtime != meta.get("source_mtime")
+
+    @property
+    def time_range(self):
+        if not len(self.records):
+            return None
+        return float(self.sorted_ts[0]), float(self.sorted_ts[-1])
+
+    def select(self, start=None, end=None, tags=None, min_level=None, limit=200, latest=True):
+        """
+        조건에 맞는 레코드 번호를 찾는 함수 (원본은 읽지 않음)
+        Args:
+            start, end: 시간 범위 (epoch 초, 커널 로그는 부팅 후 초)
+            tags: 태그 이름 목록
+            min_level: 최소 레벨 문자 ("W"면 W/E/F)
+            limit: 최대 줄 수
+            latest: limit을 넘을 때 마지막 줄들을 남길지(True) 처음 줄들을 남길지(False)
+        Returns:
+            np.ndarray: 파일 순서대로 정렬된 레코드 번호
+        """
+        if tags:
+            tag_ids = [self.tags.index(t) for t in tags if t in self.tags]
+            rows = np.sort(np.concatenate([self.tag_order[self.tag_indptr[i]:self.tag_indptr[i + 1]] for i in tag_ids] or [[]]).astype(np.int64))
+            ts = self.records["ts"][rows]
+            mask = np.ones(len(rows), dtype=bool)
+            if start is not None:
+                mask &= ts >= start
+            if end is not None:
+                mask &= ts <= end
+            rows = rows[mask]
+        else:
+            lo = 0 if start is None else np.searchsorted(self.sorted_ts, start, side="left")
+            hi = len(self.sorted_ts) if end is None else np.searchsorted(self.sorted_ts, end, side="right")
+            rows = np.arange(lo, hi) if self.time_order is None else np.sort(self.time_order[lo:hi])
+
+        if min_level is not None:
+            rows = rows[self.records["level"][rows] >= LEVELS.index(min_level)]
+        if limit is not None and len(rows) > limit:
+            rows = rows[-limit:] if latest else rows[:limit]
+        return rows
+
+    def read_lines(self, rows):
+        """레코드 번호의 원본 줄을 읽음 (필요한 위치만 seek)"""
+        lines = []
+        with open(self.log_path, "rb") as f:
+            for record in self.records[rows]:
+                f.seek(int(record["offset"]))
+                lines.append(f.read(int(record["length"])).decode("utf-8", "replace").rstrip("\r\n"))
+        return lines
+
+    def query(self, **conditions):
+        """select 조건에 맞는 원본 줄 목록"""
+        return self.read_lines(self.select(**conditions))
+
+    def summary(self):
+        """레벨/태그별 줄 수 요약 (질문에 조건이 없을 때 LLM에 주는 개요)"""
+        levels = np.bincount(self.records["level"], minlength=len(LEVELS))
+        tag_counts = np.diff(self.tag_indptr)
+        top_tags = np.argsort(-tag_counts)[:10]
+        time_range = self.time_range
+        return {
+            "lines": len(self.records),
+            "time_range": time_range,
+            "levels": {LEVEL_NAMES[l]: int(c) for l, c in zip(LEVELS, levels) if c},
+            "top_tags": {self.tags[i]: int(tag_counts[i]) for i in top_tags if tag_counts[i]},
+        }
+
+
+TIME_HINT_PATTERN = re.compile(r"(?:(\d\d)-(\d\d)\s+)?(\d{1,2}):(\d\d)(?::(\d\d))?")
+KERNEL_TIME_HINT_PATTERN = re.compile(r"\[\s*(\d+(?:\.\d+)?)\s*\]")
+LEVEL_HINTS = [
+    ("F", ("fatal", "crash", "panic", "크래시", "죽")),
+    ("E", ("error", "fail", "에러", "오류", "실패")),
+    ("W", ("warn", "경고")),
+]
+
+
+def conditions_from_question(store, question, window=10.0):
+    """
+    질문에서 시간(HH:MM[:SS], MM-DD HH:MM:SS, 커널 [초]), 태그 이름, 레벨 단어를 찾아 select 조건으로 변환
+    Args:
+        window: 시간이 지정된 경우 앞뒤로 포함할 초
+    """
+    conditions = {}
+    lowered = question.lower()
+
+    tags = [tag for tag in store.tags if len(tag) > 1 and re.search(rf"(?<![\w]){re.escape(tag.lower())}(?![\w])", lowered)]
+    if tags:
+        conditions["tags"] = tags
+
+    for level, words in LEVEL_HINTS:
+        if any(word in lowered for word in words):
+            conditions["min_level"] = level
+            break
+
+    time_range = store.time_range
+    kernel_hint = KERNEL_TIME_HINT_PATTERN.search(question)
+    if kernel_hint:
+        center = float(kernel_hint.group(1))
+        conditions.update(start=center - window, end=center + window)
+    elif time_range:
+        hint = _time_hint(question, datetime.fromtimestamp(time_range[0]))
+        if hint:
+            hinted, month, second = hint
+            if not month and hinted < time_range[0] - window:
+                hinted += 24 * 3600  # 자정을 넘긴 로그
+            span = window if second else 60.0
+            conditions.update(start=hinted - window, end=hinted + span)
+    return conditions
+
+
+def _time_hint(question, base):
+    """
+    질문에서 시각으로 해석 가능한 첫 번째 HH:MM[:SS] 힌트 (파일:줄:열 같은 범위 밖 값은 건너뜀)
+    Returns:
+        tuple 또는 None: (timestamp, 월 문자열, 초 문자열)
+    """
+    for match in TIME_HINT_PATTERN.finditer(question):
+        month, day, hour, minute, second = match.groups()
+        if int(hour) > 23 or int(minute) > 59 or int(second or 0) > 59:
+            continue
+        if month and not (1 <= int(month) <= 12 and 1 <= int(day) <= 31):
+            continue
+        try:
+            hinted = base.replace(
+                month=int(month) if month else base.month,
+                day=int(day) if day else base.day,
+                hour=int(hour), minute=int(minute), second=int(second or 0), microsecond=0,
+            )
+        except ValueError:
+            continue  # 02-30처럼 없는 날짜
+        return hinted.timestamp(), month, second
+    return None
+
+
+def format_log_context(store, question, max_lines=200):
+    """
+    질문과 관련된 로그 구간을 프롬프트용 문자열로 만드는 함수
+    조건을 찾지 못하면 경고 이상 줄의 마지막 부분과 로그 개요를 사용한다.
+    Returns:
+        tuple: (문자열, {"conditions", "lines", "latency"})
+    """
+    start = time.perf_counter()
+    conditions = conditions_from_question(store, question)
+    header = ""
+    if not conditions:
+        conditions = {"min_level": "W"}
+        header = f"로그 개요: {json.dumps(store.summary(), ensure_ascii=False)}\n"
+    lines = store.query(limit=max_lines, **conditions)
+    info = {"conditions": conditions, "lines": len(lines), "latency": time.perf_counter() - start}
+    return header + "\n".join(lines), info
+
+
+def main():
+    parser = argparse.ArgumentParser(description="로그 파일 색인 생성 및 조회")
+    parser.add_argument("log_path")
+    parser.add_argument("--index-root", default=DEFAULT_INDEX_ROOT)
+    parser.add_argument("--tag", action="append", dest="tags")
+    parser.add_argument("--level", choices=list(LEVELS), help="최소 레벨")
+    parser.add_argument("--question", help="질문에서 조건을 찾아 조회")
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+
+    store = LogStore(args.log_path, args.index_root)
+    start = time.perf_counter()
+    added = 0
+    if store.is_stale():
+        added = store.build(log=print)
+    else:
+        store.open()
+    print(f"색인: {len(store.records):,}줄 (새로 {added:,}줄, {time.perf_counter() - start:.2f}s), 태그 {len(store.tags)}개")
+
+    if args.question:
+        text, info = format_log_context(store, args.question, args.limit)
+        print(info)
+        print(text)
+    elif args.tags or args.level:
+        for line in store.query(tags=args.tags, min_level=args.level, limit=args.limit):
+            print(line)
+    else:
+        print(json.dumps(store.summary(), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,9 @@
 # app.py
 import streamlit as st
 from sidebar_utils import Sidebar
-from TabTimingDiagram import TabTimingDiagram
-from TabMemoryFootprint import TabMemoryFootprint
-from TabGPTChatbot import TabGPTChatbot
-from CameraChatbotMistral7b import CameraChatbotMistral7b
-from TabFunctionMap import TabFunctionMap
-from TabImageViewer import TabImageViewer
+from tab_registry import TabRegistry
+import perf_trace
+import session_memory
 
 # 페이지 설정
 st.set_page_config(
@@ -16,15 +13,16 @@ st.set_page_config(
     initial_sidebar_state="auto"
 )
 
-# Tab definitions
+# Tab definitions (탭 이름: (모듈, 클래스)) - 모듈은 탭을 처음 선택할 때 import
 TABS = {
-    "타이밍 다이어그램": TabTimingDiagram,
-    "메모리": TabMemoryFootprint,
-    "Function Map Loader": TabFunctionMap,
-    "GPT Chatbot": TabGPTChatbot,
-    "OpenSource Chatbot": CameraChatbotMistral7b,
-    "Image Viewer": TabImageViewer,
+    "타이밍 다이어그램": ("TabTimingDiagram", "TabTimingDiagram"),
+    "메모리": ("TabMemoryFootprint", "TabMemoryFootprint"),
+    "Function Map Loader": ("TabFunctionMap", "TabFunctionMap"),
+    "GPT Chatbot": ("TabGPTChatbot", "TabGPTChatbot"),
+    "OpenSource Chatbot": ("CameraChatbotMistral7b", "CameraChatbotMistral7b"),
+    "Image Viewer": ("TabImageViewer", "TabImageViewer"),
 }
+tab_registry = TabRegistry(TABS)
 
 #st.title("CDL")
 
@@ -35,10 +33,22 @@ sidebar = Sidebar(base_dir=".")
 if 'current_tab_key' not in st.session_state:
     st.session_state['current_tab_key'] = 'tab1'  # 기본값은 tab1
 
-selected_tab = sidebar.render(list(TABS.keys()), st.session_state['current_tab_key'])
+# rerun 전체와 주요 구간의 시간을 기록 (st.stop()으로 중단된 rerun도 기록됨)
+# 끝나면 세션 값 저장소의 크기를 측정하고 세션/전체 메모리 상한을 적용
+with perf_trace.run(perf_trace.session_id()), session_memory.run():
+    with perf_trace.span("sidebar.render"):
+        selected_tab = sidebar.render(list(TABS.keys()), st.session_state['current_tab_key'])
 
-# Render the selected tab
-if selected_tab in TABS:
-    tab_class = TABS[selected_tab]
-    tab_instance = tab_class()
-    tab_instance.render()
+    # 디버그 패널은 마지막으로 끝난 rerun의 기록을 표시
+    perf_trace.render_panel()
+    if st.session_state.get("perf_debug"):
+        session_memory.render_panel()
+
+    # Render the selected tab (탭 객체는 세션마다 한 번만 생성)
+    if selected_tab in TABS:
+        with perf_trace.span("tab.load", tab=selected_tab):
+            tab_instance = tab_registry.get_instance(selected_tab)
+        with perf_trace.span(f"tab.render/{selected_tab}"):
+            tab_instance.render()
+
+    tab_registry.render_import_times()
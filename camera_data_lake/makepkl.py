@@ -1,29 +1,195 @@
-import win32com.client as win32
+# makepkl.py
+# 엑셀(.xlsx) Function Map을 TabFunctionMap에서 읽는 피클 파일({시트 이름: DataFrame})로 변환하는 명령
+# 사용 예:
+#   python makepkl.py ./exports/Haley_DDM.xlsx -o ./project/CDL/function_map
+#   python makepkl.py ./exports -o ./project/CDL/function_map --password secret --workers 4
+import argparse
+import io
+import os
+import pickle
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
 import pandas as pd
+from openpyxl import load_workbook
+
+EXCEL_EXTENSIONS = (".xlsx", ".xlsm")
+
+
+def _is_encrypted(file_path):
+    """암호화된 xlsx는 zip이 아닌 OLE 컨테이너이므로 시그니처로 판별"""
+    with open(file_path, "rb") as f:
+        return f.read(8) == b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+
+
+def decrypt_workbook(file_path, password):
+    """
+    암호가 걸린 워크북을 메모리에서 복호화하여 파일 객체로 반환하는 함수 (msoffcrypto-tool 사용)
+    암호화되지 않은 파일이면 None을 반환한다.
+    """
+    import msoffcrypto
+
+    with open(file_path, "rb") as f:
+        office_file = msoffcrypto.OfficeFile(f)
+        if not office_file.is_encrypted():
+            return None
+        if password is None:
+            raise ValueError(f"암호가 걸린 파일입니다. --password 옵션이 필요합니다: {file_path}")
+        office_file.load_key(password=password)
+        decrypted = io.BytesIO()
+        office_file.decrypt(decrypted)
+    decrypted.seek(0)
+    return decrypted
+
+
+def unique_headers(header_row):
+    """빈 헤더와 중복 헤더에 이름을 붙여 컬럼 이름 목록을 만드는 함수"""
+    headers = []
+    seen = {}
+    for i, value in enumerate(header_row):
+        name = str(value).strip() if value is not None and str(value).strip() else f"col_{i}"
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}_{seen[name]}"
+        else:
+            seen[name] = 0
+        headers.append(name)
+    return headers
+
+
+def read_sheet(worksheet):
+    """
+    read-only 워크시트를 한 행씩 읽어 컬럼 단위 리스트로 쌓은 뒤 DataFrame으로 만드는 함수
+    (UsedRange 전체를 행 리스트로 복사하지 않는다)
+    """
+    rows = worksheet.iter_rows(values_only=True)
+    header_row = next(rows, None)
+    if header_row is None:
+        return pd.DataFrame()
+
+    headers = unique_headers(header_row)
+    columns = [[] for _ in headers]
+    for row in rows:
+        # 완전히 빈 행은 건너뜀
+        if row is None or all(value is None for value in row):
+            continue
+        for i, column in enumerate(columns):
+            column.append(row[i] if i < len(row) else None)
+
+    return pd.DataFrame(dict(zip(headers, columns)))
+
+
+def write_pickle_atomic(data, output_path):
+    """임시 파일에 쓴 뒤 이름을 바꿔서, 읽는 쪽이 쓰다 만 파일을 보지 않도록 저장"""
+    output_dir = os.path.dirname(output_path) or "."
+    os.makedirs(output_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=output_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def convert_workbook(file_path, output_dir, password=None, sheets=None):
+    """
+    워크북 하나를 피클 파일로 변환하는 함수
+    Args:
+        file_path: 엑셀 파일 경로
+        output_dir: 피클 파일을 저장할 폴더
+        password: 암호화된 파일의 암호
+        sheets: 변환할 시트 이름 목록 (None이면 전체)
+    Returns:
+        tuple: (출력 파일 경로, {시트 이름: 행 수})
+    """
+    source = decrypt_workbook(file_path, password) if _is_encrypted(file_path) else None
+    workbook = load_workbook(source or file_path, read_only=True, data_only=True)
+    try:
+        data = {}
+        for worksheet in workbook.worksheets:
+            if sheets and worksheet.title not in sheets:
+                continue
+            data[worksheet.title] = read_sheet(worksheet)
+    finally:
+        workbook.close()
+
+    base_name = os.path.splitext(os.path.basename(file_path))[0]
+    output_path = os.path.join(output_dir, f"{base_name}.pkl")
+    write_pickle_atomic(data, output_path)
+    return output_path, {name: len(df) for name, df in data.items()}
+
+
+def find_workbooks(path):
+    """파일이면 그대로, 폴더면 하위의 엑셀 파일 목록을 반환 (엑셀 임시 파일 ~$ 제외)"""
+    if os.path.isfile(path):
+        return [path]
+    workbooks = []
+    for root, dirs, files in os.walk(path):
+        for file in files:
+            if file.lower().endswith(EXCEL_EXTENSIONS) and not file.startswith("~$"):
+                workbooks.append(os.path.join(root, file))
+    return sorted(workbooks)
+
+
+def output_dir_for(file_path, input_path, output_dir):
+    """폴더를 변환할 때는 입력 폴더 기준 하위 경로를 output_dir 아래에 그대로 만들어 같은 이름의 워크북이 겹치지 않게 함"""
+    if os.path.isfile(input_path):
+        return output_dir
+    relative = os.path.relpath(os.path.dirname(file_path), input_path)
+    return output_dir if relative == os.curdir else os.path.join(output_dir, relative)
 
-# Excel 애플리케이션 열기
-excel = win32.Dispatch("Excel.Application")
-excel.Visible = False  # 엑셀 창을 숨김
 
-# 보안 걸린 엑셀 파일 열기
-file_path = 'path_to_your_protected_excel.xlsx'
-password = 'your_password'
-workbook = excel.Workbooks.Open(file_path, False, False, None, password)
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="엑셀 Function Map을 피클 파일로 변환합니다.")
+    parser.add_argument("input", help="엑셀 파일 또는 엑셀 파일이 있는 폴더")
+    parser.add_argument("-o", "--output-dir", default="./project/CDL/function_map", help="피클 파일 저장 폴더")
+    parser.add_argument("--password", default=os.environ.get("CDL_EXCEL_PASSWORD"), help="암호화된 파일의 암호")
+    parser.add_argument("--sheet", action="append", dest="sheets", help="변환할 시트 이름 (여러 번 지정 가능)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="병렬 처리 프로세스 수")
+    args = parser.parse_args(argv)
 
-# 첫 번째 시트를 선택하여 읽음
-sheet = workbook.Sheets(1)
+    workbooks = find_workbooks(args.input)
+    if not workbooks:
+        print(f"변환할 엑셀 파일이 없습니다: {args.input}")
+        return 1
 
-# 시트의 사용 범위를 가져옴
-used_range = sheet.UsedRange
+    # 같은 폴더의 a.xlsx와 a.xlsm처럼 출력 파일이 겹치는 워크북은 서로 덮어쓰지 않도록 변환하지 않음
+    targets = {}
+    for path in workbooks:
+        output_dir = output_dir_for(path, args.input, args.output_dir)
+        output_path = os.path.join(output_dir, os.path.splitext(os.path.basename(path))[0] + ".pkl")
+        targets.setdefault(output_path, []).append((path, output_dir))
+    failed = 0
+    jobs = []
+    for output_path, sources in targets.items():
+        if len(sources) > 1:
+            failed += len(sources)
+            print(f"변환 실패: 출력 파일이 겹칩니다: {output_path} <- {', '.join(path for path, _ in sources)}")
+        else:
+            jobs.append(sources[0])
+    if not jobs:
+        return 1
 
-# 데이터를 리스트로 변환
-data = used_range.Value
+    with ProcessPoolExecutor(max_workers=min(args.workers or 1, len(jobs))) as executor:
+        futures = {
+            executor.submit(convert_workbook, path, output_dir, args.password, args.sheets): path
+            for path, output_dir in jobs
+        }
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                output_path, row_counts = future.result()
+                summary = ", ".join(f"{name}: {count}행" for name, count in row_counts.items())
+                print(f"변환 완료: {path} -> {output_path} ({summary})")
+            except Exception as e:
+                failed += 1
+                print(f"변환 실패: {path}: {e}")
 
-# 엑셀 파일 닫기
-workbook.Close(SaveChanges=False)
-excel.Quit()
+    return 1 if failed else 0
 
-# 데이터를 pandas DataFrame으로 변환
-df = pd.DataFrame(data[1:], columns=data[0])  # 첫 번째 행을 헤더로 사용
 
-print(df)
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,77 +1,442 @@
+# mk_vector_store.py
+# 소스 코드 폴더를 함수 단위로 나누어 임베딩하고 FAISS 인덱스(faiss_index.idx)와 코드 매핑(code_id_mapping.pkl)을 만드는 인덱서
+# 식별자 검색용 BM25 색인(code_lexical_index.npz)도 함께 만든다.
+# 변경된 파일만 다시 임베딩하도록 파일 해시 manifest와 임베딩을 함께 저장한다.
+# 사용 예:
+#   python mk_vector_store.py /root/project/camera_hal --output-dir .
+#   python mk_vector_store.py /root/project/camera_hal --ext .c --ext .h --workers 4 --batch-size 64
+#   python mk_vector_store.py /root/project/camera_hal --index-type ivfpq --nlist 4096 --pq-m 32
+import argparse
+import ast
+import fnmatch
+import hashlib
+import json
 import os
-import glob
+import pickle
+import re
 import sys
-import faiss
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
-#from langchain.embeddings import OllamaEmbeddings
-#from langchain.vectorstores import FAISS
-from langchain_community.vectorstores import FAISS
-from langchain_community.chat_models import ChatOllama
-from langchain_community.embeddings import OllamaEmbeddings
-from sentence_transformers import SentenceTransformer
 
-# .c 파일들이 저장된 디렉토리 경로
-c_files_directory = '/root/project/wk_work/project/kafka-3.4.0-src'  # 실제 경로로 변경하세요.
+from lexical_index import LexicalIndex
+
+DEFAULT_EXTENSIONS = (".c", ".h", ".cc", ".cpp", ".cxx", ".hpp", ".hh", ".py")
+C_EXTENSIONS = (".c", ".h", ".cc", ".cpp", ".cxx", ".hpp", ".hh")
+DEFAULT_IGNORE = [".git", ".svn", ".repo", "__pycache__", "node_modules", "build", "out", "*.min.*", "*.o", "*.so"]
+IGNORE_FILE = ".cdlignore"
+
+INDEX_FILE = "faiss_index.idx"
+MAPPING_FILE = "code_id_mapping.pkl"
+MANIFEST_FILE = "code_index_manifest.json"
+EMBEDDINGS_FILE = "code_embeddings.npy"
+LEXICAL_FILE = "code_lexical_index.npz"
+
+# 함수 정의 시작 (반환형 + 이름 + 인자 목록 + '{'), 제어문은 제외
+C_FUNCTION_PATTERN = re.compile(
+    r"^[A-Za-z_][\w\s\*&:<>,~\[\]]*?\b([A-Za-z_~][\w:~]*)\s*\([^;{}]*\)\s*(?:const\s*)?(?:noexcept\s*)?(?:override\s*)?\{",
+    re.MULTILINE,
+)
+C_KEYWORDS = {"if", "for", "while", "switch", "return", "sizeof", "else", "do", "catch"}
+
+
+def load_ignore_patterns(root):
+    """기본 제외 패턴에 root의 .cdlignore(한 줄에 glob 패턴 하나) 내용을 더해 반환"""
+    patterns = list(DEFAULT_IGNORE)
+    ignore_path = os.path.join(root, IGNORE_FILE)
+    if os.path.exists(ignore_path):
+        with open(ignore_path, "r", encoding="utf-8") as f:
+            patterns += [line.strip().rstrip("/") for line in f if line.strip() and not line.startswith("#")]
+    return patterns
+
+
+def is_ignored(rel_path, patterns):
+    name = os.path.basename(rel_path)
+    return any(fnmatch.fnmatch(name, p) or fnmatch.fnmatch(rel_path, p) for p in patterns)
+
+
+def discover_files(root, extensions=DEFAULT_EXTENSIONS, patterns=None):
+    """
+    root 아래의 소스 파일을 재귀적으로 찾는 함수 (제외 패턴에 맞는 폴더는 내려가지 않음)
+    Returns:
+        list: root 기준 상대 경로 목록
+    """
+    patterns = load_ignore_patterns(root) if patterns is None else patterns
+    found = []
+    for current, dirs, files in os.walk(root):
+        rel_dir = os.path.relpath(current, root)
+        dirs[:] = [d for d in dirs if not is_ignored(os.path.normpath(os.path.join(rel_dir, d)), patterns)]
+        for file in files:
+            rel_path = os.path.normpath(os.path.join(rel_dir, file))
+            if file.endswith(tuple(extensions)) and not is_ignored(rel_path, patterns):
+                found.append(rel_path)
+    return sorted(found)
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(1024 * 1024):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _line_windows(lines, start, end, symbol, max_lines):
+    """너무 긴 구간을 max_lines 줄 단위로 나눈 청크 목록"""
+    chunks = []
+    for begin in range(start, end, max_lines):
+        stop = min(begin + max_lines, end)
+        text = "\n".join(lines[begin:stop])
+        if text.strip():
+            chunks.append({"symbol": symbol, "start_line": begin + 1, "end_line": stop, "text": text})
+    return chunks
+
+
+def _find_block_end(source, open_brace):
+    """여는 중괄호 위치에서 짝이 맞는 닫는 중괄호 위치를 찾음 (문자열/주석 안의 괄호는 무시)"""
+    depth = 0
+    i = open_brace
+    n = len(source)
+    while i < n:
+        c = source[i]
+        if c == "/" and source.startswith("//", i):
+            i = source.find("\n", i)
+            if i < 0:
+                return n - 1
+        elif c == "/" and source.startswith("/*", i):
+            i = source.find("*/", i + 2)
+            if i < 0:
+                return n - 1
+            i += 1
+        elif c in "\"'":
+            j = i + 1
+            while j < n and source[j] != c:
+                j += 2 if source[j] == "\\" else 1
+            i = j
+        elif c == "{":
+            depth += 1
+        elif c == "}":
+            depth -= 1
+            if depth == 0:
+                return i
+        i += 1
+    return n - 1
 
-# .c 파일들의 전체 경로 리스트 가져오기 (재귀적으로 검색)
-c_file_paths = glob.glob(os.path.join(c_files_directory, '**', '*.py'), recursive=False)
 
-# 디버깅을 위해 파일 경로 출력
-print("찾은 .c 파일 경로들:", c_file_paths)
+def chunk_c_source(source, max_lines=120):
+    """C/C++ 소스를 함수 정의 단위로 나누고, 함수 밖 코드(전역 선언, 매크로 등)는 줄 단위 청크로 묶음"""
+    lines = source.splitlines()
+    line_starts = np.cumsum([0] + [len(line) + 1 for line in lines])
+    chunks = []
+    covered_until = 0  # 줄 번호(0부터)
 
-# 코드 스니펫 리스트 초기화
-code_snippets = []
+    for match in C_FUNCTION_PATTERN.finditer(source):
+        name = match.group(1)
+        if name in C_KEYWORDS or match.start() < line_starts[covered_until]:
+            continue
+        end = _find_block_end(source, match.end() - 1)
+        start_line = int(np.searchsorted(line_starts, match.start(), side="right")) - 1
+        end_line = int(np.searchsorted(line_starts, end, side="right"))
+        if start_line > covered_until:
+            chunks += _line_windows(lines, covered_until, start_line, None, max_lines)
+        chunks += _line_windows(lines, start_line, end_line, name, max_lines)
+        covered_until = end_line
 
-# 각 .c 파일의 내용을 읽어서 리스트에 추가
-for file_path in c_file_paths:
+    chunks += _line_windows(lines, covered_until, len(lines), None, max_lines)
+    return chunks
+
+
+def chunk_python_source(source, max_lines=120):
+    """Python 소스를 최상위 함수/클래스 단위로 나눔 (구문 오류가 있으면 줄 단위로 나눔)"""
+    lines = source.splitlines()
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return _line_windows(lines, 0, len(lines), None, max_lines)
+
+    chunks = []
+    covered_until = 0
+    for node in tree.body:
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            continue
+        start = min([node.lineno] + [d.lineno for d in node.decorator_list]) - 1
+        if start > covered_until:
+            chunks += _line_windows(lines, covered_until, start, None, max_lines)
+        chunks += _line_windows(lines, start, node.end_lineno, node.name, max_lines)
+        covered_until = node.end_lineno
+    chunks += _line_windows(lines, covered_until, len(lines), None, max_lines)
+    return chunks
+
+
+def chunk_file(root, rel_path, max_lines=120):
+    """파일 하나를 언어에 맞게 청크로 나누고 각 청크에 경로를 붙여 반환"""
+    with open(os.path.join(root, rel_path), "r", encoding="utf-8", errors="replace") as f:
+        source = f.read()
+    if rel_path.endswith(".py"):
+        chunks = chunk_python_source(source, max_lines)
+    elif rel_path.endswith(C_EXTENSIONS):
+        chunks = chunk_c_source(source, max_lines)
+    else:
+        chunks = _line_windows(source.splitlines(), 0, len(source.splitlines()), None, max_lines)
+    for chunk in chunks:
+        chunk["path"] = rel_path
+    return chunks
+
+
+def embed_batched(embedder, texts, batch_size=32, workers=4):
+    """텍스트를 batch_size씩 나누어 스레드 풀에서 임베딩하고 원래 순서대로 합침"""
+    if not texts:
+        return np.zeros((0, 0), dtype=np.float32)
+    batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(embedder.encode, batches))
+    return np.vstack(results).astype(np.float32)
+
+
+def _atomic_write(path, write):
+    """같은 폴더의 임시 파일에 쓴 뒤 os.replace로 교체 (읽는 쪽은 항상 완성된 파일만 봄)"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    os.close(fd)
     try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            code = file.read()
-            code_snippets.append(code)
-    except Exception as e:
-        print(f"파일 {file_path} 읽기 중 오류 발생: {e}")
-
-# code_snippets 리스트가 비어있는지 확인
-if not code_snippets:
-    print("코드 스니펫이 없습니다. 디렉토리 경로와 .c 파일의 존재 여부를 확인하세요.")
-    sys.exit(1)
-
-# 확인을 위해 첫 번째 코드 스니펫 출력
-#print("첫 번째 코드 스니펫:\n", code_snippets[0])
-
-## 임베딩 모델 로드
-#model = SentenceTransformer('microsoft/codebert-base')
-#
-## 코드 스니펫에 대한 임베딩 생성
-#embeddings = model.encode(code_snippets, convert_to_tensor=True)
-#
-## 벡터 스토어 생성 및 저장
-#dimension = embeddings.shape[1]
-#index = faiss.IndexFlatL2(dimension)
-#index.add(embeddings)
-#faiss.write_index(index, 'faiss_index.idx')
-#
-## 코드 매핑 저장
-#import pickle
-#code_id_mapping = {i: code for i, code in enumerate(code_snippets)}
-#with open('code_id_mapping.pkl', 'wb') as f:
-#    pickle.dump(code_id_mapping, f)
-
-################### mistral #################
-## 임베딩 함수 설정
-#embedding_function = OllamaEmbeddings(model="mistral:7b")
-#
-## 임베딩 생성
-#embeddings = embedding_function.embed_documents(code_snippets)
-#
-## 4. code_snippets와 embeddings를 결합하여 text_embeddings 생성
-#text_embeddings = list(zip(code_snippets, embeddings))
-#
-## 벡터 스토어 생성
-#vector_store = FAISS.from_embeddings(embeddings, code_snippets)
-#
-## 벡터 스토어 저장
-#vector_store.save_local("faiss_vector_store")
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def load_previous(output_dir):
+    """이전 인덱싱 결과(manifest와 임베딩)를 읽음 (없으면 빈 결과)"""
+    manifest_path = os.path.join(output_dir, MANIFEST_FILE)
+    embeddings_path = os.path.join(output_dir, EMBEDDINGS_FILE)
+    if not (os.path.exists(manifest_path) and os.path.exists(embeddings_path)):
+        return None, None
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    return manifest, np.load(embeddings_path)
+
+
+INDEX_TYPES = ("flat", "ivfpq", "hnsw")
+DEFAULT_INDEX_OPTIONS = {"nlist": 1024, "pq_m": 16, "pq_bits": 8, "hnsw_m": 32, "ef_construction": 200}
+
+
+def resolve_index_options(index_type, dim, n_vectors, options=None):
+    """
+    인덱스 종류별 파라미터를 데이터 크기에 맞게 보정하는 함수
+    - IVF: 클러스터당 학습 벡터가 최소 39개가 되도록 nlist 축소
+    - PQ: 서브벡터 수(pq_m)는 차원의 약수, 코드북 비트 수는 코드당 학습 벡터가 39개 이상이 되도록 축소
+    Returns:
+        dict: 실제 사용할 파라미터 ({"type": index_type, ...})
+    """
+    opts = dict(DEFAULT_INDEX_OPTIONS, **(options or {}))
+    resolved = {"type": index_type}
+    if index_type == "ivfpq":
+        resolved["nlist"] = max(1, min(opts["nlist"], n_vectors // 39))
+        pq_m = min(opts["pq_m"], dim)
+        while dim % pq_m:
+            pq_m -= 1
+        resolved["pq_m"] = pq_m
+        resolved["pq_bits"] = max(1, min(opts["pq_bits"], int(np.log2(max(n_vectors // 39, 1)))))
+    elif index_type == "hnsw":
+        resolved["hnsw_m"] = opts["hnsw_m"]
+        resolved["ef_construction"] = opts["ef_construction"]
+    return resolved
+
+
+def build_index(embeddings, index_type="flat", options=None):
+    """
+    임베딩으로 FAISS 인덱스를 생성
+    Args:
+        index_type: flat(전체 탐색), ivfpq(클러스터 + 곱 양자화, 메모리 절약), hnsw(그래프 탐색, 빠른 검색)
+        options: resolve_index_options 참고
+    Returns:
+        tuple: (인덱스, 실제 사용한 파라미터)
+    """
+    import faiss
+
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"지원하지 않는 인덱스 종류: {index_type}")
+    dim = embeddings.shape[1]
+    resolved = resolve_index_options(index_type, dim, len(embeddings), options)
+    # 학습에 필요한 벡터가 부족하면(PQ 코드 16개 미만) 전체 탐색 인덱스로 대체
+    if index_type == "ivfpq" and resolved["pq_bits"] < 4:
+        index_type, resolved = "flat", {"type": "flat"}
+
+    if index_type == "ivfpq":
+        quantizer = faiss.IndexFlatL2(dim)
+        index = faiss.IndexIVFPQ(quantizer, dim, resolved["nlist"], resolved["pq_m"], resolved["pq_bits"])
+        index.train(embeddings)
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, resolved["hnsw_m"])
+        index.hnsw.efConstruction = resolved["ef_construction"]
+    else:
+        index = faiss.IndexFlatL2(dim)
+    if len(embeddings):
+        index.add(embeddings)
+    return index, resolved
+
+
+def set_search_params(index, nprobe=None, ef_search=None):
+    """검색 시점 파라미터 설정 (IVF: 탐색할 클러스터 수, HNSW: 탐색 후보 수)"""
+    import faiss
+
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None and nprobe:
+        ivf.nprobe = nprobe
+    if isinstance(index, faiss.IndexHNSW) and ef_search:
+        index.hnsw.efSearch = ef_search
+
+
+def build_lexical_index(output_dir, previous_chunks, kept_ids, new_texts, all_texts):
+    """
+    BM25 색인을 갱신하는 함수
+    이전 색인이 이전 manifest와 일치하면 변경 없는 청크의 토큰을 재사용하고 새 청크만 토큰화한다.
+    """
+    path = os.path.join(output_dir, LEXICAL_FILE)
+    if previous_chunks and os.path.exists(path):
+        lexical = LexicalIndex.load(path)
+        if lexical.n_docs == len(previous_chunks):
+            lexical.rebuild(kept_ids, new_texts)
+            return lexical
+    lexical = LexicalIndex()
+    lexical.rebuild([], all_texts)
+    return lexical
+
+
+def write_outputs(output_dir, index, chunks, manifest, embeddings, lexical=None):
+    """
+    인덱스, 코드 매핑, BM25 색인, manifest, 임베딩을 각각 원자적으로 저장
+    파일 묶음 전체는 한 번에 바뀌지 않으므로 읽는 쪽(CodeVectorStore)은 manifest 수정 시간으로 다시 로드하고 파일 간 청크 수를 확인한다.
+    """
+    import faiss
+
+    os.makedirs(output_dir, exist_ok=True)
+    code_id_mapping = {i: chunk["text"] for i, chunk in enumerate(chunks)}
+
+    def write_mapping(path):
+        with open(path, "wb") as f:
+            pickle.dump(code_id_mapping, f)
+
+    def write_manifest(path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False)
+
+    def write_embeddings(path):
+        with open(path, "wb") as f:
+            np.save(f, embeddings)
+
+    _atomic_write(os.path.join(output_dir, EMBEDDINGS_FILE), write_embeddings)
+    _atomic_write(os.path.join(output_dir, MAPPING_FILE), write_mapping)
+    _atomic_write(os.path.join(output_dir, INDEX_FILE), lambda path: faiss.write_index(index, path))
+    if lexical is not None:
+        lexical.save(os.path.join(output_dir, LEXICAL_FILE))
+    # manifest를 마지막에 써서 중간에 실패하면 다음 실행에서 전체를 다시 확인하고, 읽는 쪽은 갱신이 끝난 뒤에 다시 로드하도록 함
+    _atomic_write(os.path.join(output_dir, MANIFEST_FILE), write_manifest)
+
+
+def run_indexer(root, output_dir, embedder, extensions=DEFAULT_EXTENSIONS, max_lines=120, batch_size=32, workers=4,
+                index_type="flat", index_options=None, log=print):
+    """
+    root 아래 소스 코드를 인덱싱하는 함수 (변경된 파일만 다시 청크/임베딩)
+    Returns:
+        dict: 인덱싱 통계
+    """
+    files = discover_files(root, extensions)
+    hashes = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for rel_path, digest in zip(files, executor.map(lambda p: file_sha256(os.path.join(root, p)), files)):
+            hashes[rel_path] = digest
+
+    previous, previous_embeddings = load_previous(output_dir)
+    reusable = previous is not None and previous.get("model") == embedder.name and previous.get("root") == os.path.abspath(root)
+    previous_files = previous["files"] if reusable else {}
+    previous_chunks = previous["chunks"] if reusable else []
+
+    unchanged = [p for p in files if p in previous_files and previous_files[p]["sha256"] == hashes[p]]
+    changed = [p for p in files if p not in unchanged]
+
+    # 변경 없는 파일의 청크와 임베딩은 그대로 재사용
+    kept_ids = [i for p in unchanged for i in previous_files[p]["chunk_ids"]]
+    kept_chunks = [dict(previous_chunks[i]) for i in kept_ids]
+    kept_embeddings = previous_embeddings[kept_ids] if kept_ids else None
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        new_chunks = [chunk for chunks in executor.map(lambda p: chunk_file(root, p, max_lines), changed) for chunk in chunks]
+    log(f"파일 {len(files)}개 중 변경 {len(changed)}개, 새로 임베딩할 청크 {len(new_chunks)}개")
+    new_embeddings = embed_batched(embedder, [chunk["text"] for chunk in new_chunks], batch_size, workers)
+
+    parts = [e for e in (kept_embeddings, new_embeddings) if e is not None and len(e)]
+    embeddings = np.vstack(parts) if parts else np.zeros((0, 1), dtype=np.float32)
+    chunks = kept_chunks + new_chunks
+
+    file_entries = {}
+    for i, chunk in enumerate(chunks):
+        chunk["id"] = i
+        file_entries.setdefault(chunk["path"], {"sha256": hashes[chunk["path"]], "chunk_ids": []})["chunk_ids"].append(i)
+    for rel_path in files:
+        file_entries.setdefault(rel_path, {"sha256": hashes[rel_path], "chunk_ids": []})
+
+    index, resolved = build_index(embeddings, index_type, index_options)
+    lexical = build_lexical_index(
+        output_dir, previous_chunks, kept_ids, [chunk["text"] for chunk in new_chunks], [chunk["text"] for chunk in chunks]
+    )
+    manifest = {
+        "root": os.path.abspath(root),
+        "model": embedder.name,
+        "index": resolved,
+        "files": file_entries,
+        "chunks": [{k: v for k, v in chunk.items()} for chunk in chunks],
+    }
+    write_outputs(output_dir, index, chunks, manifest, embeddings, lexical)
+    return {"files": len(files), "changed": len(changed), "chunks": len(chunks), "embedded": len(new_chunks)}
+
+
+def get_code_embedder(model_name):
+    """코드 임베딩 모델 (hashing이면 외부 모델 없이 동작하는 로컬 임베딩)"""
+    from attachment_pipeline import HashingEmbedder, SentenceTransformerEmbedder
+
+    if model_name == "hashing":
+        return HashingEmbedder()
+    return SentenceTransformerEmbedder(model_name)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="소스 코드 FAISS 인덱스를 생성/갱신합니다.")
+    parser.add_argument("root", help="인덱싱할 소스 코드 폴더")
+    parser.add_argument("--output-dir", default=".", help="faiss_index.idx, code_id_mapping.pkl을 저장할 폴더")
+    parser.add_argument("--ext", action="append", dest="extensions", help="포함할 확장자 (여러 번 지정 가능)")
+    parser.add_argument("--model", default="microsoft/codebert-base", help="SentenceTransformer 모델 이름 또는 hashing")
+    parser.add_argument("--max-lines", type=int, default=120, help="청크 하나의 최대 줄 수")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--index-type", choices=INDEX_TYPES, default="flat", help="FAISS 인덱스 종류")
+    parser.add_argument("--nlist", type=int, default=DEFAULT_INDEX_OPTIONS["nlist"], help="IVF 클러스터 수")
+    parser.add_argument("--pq-m", type=int, default=DEFAULT_INDEX_OPTIONS["pq_m"], help="PQ 서브벡터 수")
+    parser.add_argument("--pq-bits", type=int, default=DEFAULT_INDEX_OPTIONS["pq_bits"], help="PQ 코드 비트 수")
+    parser.add_argument("--hnsw-m", type=int, default=DEFAULT_INDEX_OPTIONS["hnsw_m"], help="HNSW 노드당 연결 수")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.root):
+        print(f"폴더가 존재하지 않습니다: {args.root}")
+        return 1
 
+    stats = run_indexer(
+        args.root,
+        args.output_dir,
+        get_code_embedder(args.model),
+        extensions=tuple(args.extensions or DEFAULT_EXTENSIONS),
+        max_lines=args.max_lines,
+        batch_size=args.batch_size,
+        workers=args.workers,
+        index_type=args.index_type,
+        index_options={"nlist": args.nlist, "pq_m": args.pq_m, "pq_bits": args.pq_bits, "hnsw_m": args.hnsw_m},
+    )
+    print(f"인덱싱 완료: {stats}")
+    return 0
 
 
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+# model_compare.py
+import asyncio
+import time
+
+
+async def astream_model(model, llm, messages, on_update=None):
+    """
+    하나의 모델에 비동기로 질문하고 스트리밍 응답을 모으는 함수
+    Args:
+        model: 모델 이름
+        llm: astream을 지원하는 LangChain 채팅 모델
+        messages: 보낼 메시지 목록
+        on_update: (모델 이름, 지금까지의 응답) 콜백 (조각을 받을 때마다 호출)
+    Returns:
+        dict: 모델별 응답과 지연/처리량 지표
+    """
+    result = {"model": model, "response": "", "ttft": None, "tokens": 0, "error": None}
+    parts = []
+    start = time.perf_counter()
+    try:
+        async for chunk in llm.astream(messages):
+            if not chunk.content:
+                continue
+            if result["ttft"] is None:
+                result["ttft"] = time.perf_counter() - start
+            result["tokens"] += 1
+            parts.append(chunk.content)
+            if on_update is not None:
+                on_update(model, "".join(parts))
+    except Exception as e:
+        result["error"] = str(e)
+        parts.append(f"Error: {e}")
+        if on_update is not None:
+            on_update(model, "".join(parts))
+
+    result["response"] = "".join(parts)
+    result["total"] = time.perf_counter() - start
+    generation_time = result["total"] - (result["ttft"] or 0.0)
+    result["tokens_per_s"] = result["tokens"] / generation_time if generation_time > 0 and result["tokens"] else 0.0
+    return result
+
+
+async def acompare_models(llms, messages, on_update=None):
+    """여러 모델에 같은 메시지를 동시에 보내고 모든 결과를 모델 순서대로 반환"""
+    return await asyncio.gather(*(astream_model(model, llm, messages, on_update) for model, llm in llms.items()))
+
+
+def compare_models(llms, messages, on_update=None):
+    """
+    acompare_models의 동기 래퍼 (Streamlit 스크립트 스레드에서 호출)
+    Args:
+        llms: {모델 이름: LLM} 사전
+        messages: 보낼 메시지 목록
+        on_update: 스트리밍 중간 결과 콜백
+    Returns:
+        list: 모델별 결과 dict 목록
+    """
+    return asyncio.run(acompare_models(llms, messages, on_update))
@@ -0,0 +1,176 @@
+# ollama_stub.py
+# Ollama HTTP API(/api/chat, /api/generate, /api/tags)와 OpenAI 호환 API(/v1/chat/completions)를 흉내 내는 로컬 테스트 서버
+# 실제 모델 없이 챗봇 스트리밍, 모델 비교, 부하 테스트를 오프라인으로 확인할 때 사용한다.
+# 사용 예:
+#   python ollama_stub.py --port 11435 --token-delay 0.02
+#   OLLAMA_BASE_URL=http://localhost:11435 OPENAI_BASE_URL=http://localhost:11435/v1 streamlit run main.py
+import argparse
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def make_handler(token_delay=0.01, load_delay=0.0, n_tokens=40):
+    loaded = set()
+    lock = threading.Lock()
+
+    class OllamaStubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _read_json(self):
+            length = int(self.headers.get("Content-Length", 0))
+            return json.loads(self.rfile.read(length) or b"{}")
+
+        def _send_json(self, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _load_model(self, model):
+            """처음 요청된 모델만 load_delay만큼 기다려 모델 로드 시간을 흉내 낸다"""
+            with lock:
+                first = model not in loaded
+                loaded.add(model)
+            if first and load_delay:
+                time.sleep(load_delay)
+
+        def _tokens(self, model, prompt):
+            words = f"[{model}] stub answer to: {prompt}".split()
+            return [(words[i % len(words)] + " ") for i in range(n_tokens)]
+
+        def _stream(self, model, tokens, make_chunk, make_done, sse=False):
+            """토큰을 token_delay 간격으로 전송 (Ollama는 NDJSON, OpenAI 호환 API는 server-sent events)"""
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream" if sse else "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            start = time.perf_counter()
+            for token in tokens:
+                time.sleep(token_delay)
+                self._write_chunk(make_chunk(token), sse)
+            self._write_chunk(make_done(len(tokens), time.perf_counter() - start), sse)
+            if sse:
+                self._write_line(b"data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+
+        def _write_chunk(self, payload, sse=False):
+            line = json.dumps(payload)
+            self._write_line((f"data: {line}\n\n" if sse else line + "\n").encode("utf-8"))
+
+        def _write_line(self, line):
+            self.wfile.write(f"{len(line):x}\r\n".encode("ascii") + line + b"\r\n")
+            self.wfile.flush()
+
+        def _openai_chat(self, request, model):
+            """OpenAI 호환 /v1/chat/completions (TabGPTChatbot을 OPENAI_BASE_URL로 연결하여 테스트)"""
+            messages = request.get("messages", [])
+            prompt = messages[-1]["content"] if messages else ""
+            tokens = self._tokens(model, prompt[:80])
+            created = int(time.time())
+            base = {"id": "chatcmpl-stub", "created": created, "model": model}
+            if request.get("stream"):
+                chunk = lambda t: {**base, "object": "chat.completion.chunk",
+                                   "choices": [{"index": 0, "delta": {"content": t}, "finish_reason": None}]}
+                done = lambda n, d: {**base, "object": "chat.completion.chunk",
+                                     "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+                self._stream(model, tokens, chunk, done, sse=True)
+                return
+            time.sleep(token_delay * len(tokens))
+            self._send_json({
+                **base,
+                "object": "chat.completion",
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(tokens)}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": len(prompt.split()), "completion_tokens": len(tokens),
+                          "total_tokens": len(prompt.split()) + len(tokens)},
+            })
+
+        def do_GET(self):
+            if self.path == "/api/tags":
+                self._send_json({"models": [{"name": name} for name in sorted(loaded)]})
+            else:
+                self.send_error(404)
+
+        def do_POST(self):
+            request = self._read_json()
+            model = request.get("model", "stub")
+            now = datetime.now(timezone.utc).isoformat()
+            self._load_model(model)
+
+            if self.path == "/v1/chat/completions":
+                self._openai_chat(request, model)
+                return
+            elif self.path == "/api/chat":
+                messages = request.get("messages", [])
+                prompt = messages[-1]["content"] if messages else ""
+                tokens = self._tokens(model, prompt[:80])
+                chunk = lambda t: {"model": model, "created_at": now, "message": {"role": "assistant", "content": t}, "done": False}
+                done = lambda n, d: {
+                    "model": model, "created_at": now, "message": {"role": "assistant", "content": ""},
+                    "done": True, "eval_count": n, "eval_duration": int(d * 1e9),
+                }
+            elif self.path == "/api/generate":
+                prompt = request.get("prompt", "")
+                if not prompt:
+                    # 빈 프롬프트는 모델 로드(warm-up) 요청
+                    self._send_json({"model": model, "created_at": now, "response": "", "done": True})
+                    return
+                tokens = self._tokens(model, prompt[:80])
+                chunk = lambda t: {"model": model, "created_at": now, "response": t, "done": False}
+                done = lambda n, d: {"model": model, "created_at": now, "response": "", "done": True,
+                                     "eval_count": n, "eval_duration": int(d * 1e9)}
+            else:
+                self.send_error(404)
+                return
+
+            if request.get("stream", True):
+                self._stream(model, tokens, chunk, done)
+            else:
+                time.sleep(token_delay * len(tokens))
+                result = done(len(tokens), token_delay * len(tokens))
+                if self.path == "/api/chat":
+                    result["message"]["content"] = "".join(tokens)
+                else:
+                    result["response"] = "".join(tokens)
+                self._send_json(result)
+
+    return OllamaStubHandler
+
+
+def start_stub_server(host="127.0.0.1", port=0, **handler_options):
+    """
+    스텁 서버를 백그라운드 스레드에서 시작하는 함수
+    Returns:
+        tuple: (서버 객체, base_url) - 종료할 때는 server.shutdown() 호출
+    """
+    server = ThreadingHTTPServer((host, port), make_handler(**handler_options))
+    threading.Thread(target=server.serve_forever, name="ollama-stub", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ollama HTTP API 스텁 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--token-delay", type=float, default=0.01, help="토큰 하나를 보내는 간격(초)")
+    parser.add_argument("--load-delay", type=float, default=0.0, help="모델 첫 로드 시간(초)")
+    parser.add_argument("--tokens", type=int, default=40, help="응답 토큰 수")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(
+        (args.host, args.port),
+        make_handler(token_delay=args.token_delay, load_delay=args.load_delay, n_tokens=args.tokens),
+    )
+    print(f"Ollama stub server: http://{args.host}:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
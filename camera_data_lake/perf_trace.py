@@ -0,0 +1,274 @@
+# perf_trace.py
+# rerun 단위 성능 계측
+# - span(name, **attrs): 구간 시간을 현재 rerun 기록에 추가 (rerun 기록 중이 아니면 아무것도 하지 않음)
+# - run(session_id): main.py에서 rerun 전체를 감싸고, 끝나면 st.session_state 메모리 사용량과 함께 JSON lines로 내보냄
+# - python perf_trace.py ./.cache/perf/spans.jsonl: 여러 사용자의 기록을 모아 단계별 p50/p95 집계
+# 환경 변수: CDL_PERF_LOG (내보낼 파일 경로, 빈 문자열이면 내보내지 않음)
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+import numpy as np
+import streamlit as st
+
+DEFAULT_EXPORT_PATH = "./.cache/perf/spans.jsonl"
+HISTORY_RUNS = 50  # 디버그 패널에서 세션별 p50/p95를 계산할 최근 rerun 수
+
+_local = threading.local()  # 스크립트 스레드별 현재 rerun 기록
+_export_lock = threading.Lock()
+
+
+def estimate_size(obj, _seen=None):
+    """
+    객체가 차지하는 메모리의 대략적인 바이트 수
+    (컨테이너는 내용까지 합산, numpy 배열/DataFrame은 데이터 크기, 그 외 객체는 자신의 크기만 계산)
+    """
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+
+    if isinstance(obj, np.memmap):
+        return sys.getsizeof(obj)  # 파일에 매핑된 데이터는 세션 메모리로 보지 않음
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if hasattr(obj, "memory_usage") and hasattr(obj, "columns"):
+        return int(obj.memory_usage(index=True).sum())
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(estimate_size(k, _seen) + estimate_size(v, _seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+        size += sum(estimate_size(item, _seen) for item in obj)
+    return size
+
+
+def session_state_sizes(state=None):
+    """st.session_state 키별 메모리 사용량 {키: 바이트} (큰 순서)"""
+    state = st.session_state if state is None else state
+    sizes = {}
+    for key in list(state.keys()):
+        try:
+            sizes[str(key)] = estimate_size(state[key])
+        except Exception:
+            sizes[str(key)] = 0
+    return dict(sorted(sizes.items(), key=lambda item: -item[1]))
+
+
+class RunTrace:
+    """rerun 하나의 span 기록"""
+    def __init__(self, session_id, run_id):
+        self.session_id = session_id
+        self.run_id = run_id
+        self.ts = time.time()
+        self.start = time.perf_counter()
+        self.spans = []  # {"stage", "ms", "depth", "attrs"} (끝난 순서)
+        self.depth = 0
+        self.total_ms = None
+        self.state_sizes = {}
+        self.status = "ok"
+        self.attrs = {}  # rerun 전체 레코드에 추가할 값 (예: 세션 값 저장소 사용량)
+
+    def finish(self, state=None):
+        self.total_ms = (time.perf_counter() - self.start) * 1000
+        measure_start = time.perf_counter()
+        self.state_sizes = session_state_sizes(state)
+        self.measure_ms = (time.perf_counter() - measure_start) * 1000
+
+    def ordered_spans(self):
+        """시작 순서로 정렬한 span 목록 (중첩 구조 표시용)"""
+        return sorted(self.spans, key=lambda s: s["offset_ms"])
+
+    def records(self):
+        """JSON lines로 내보낼 레코드 (span마다 한 줄 + rerun 전체 한 줄)"""
+        base = {"ts": round(self.ts, 3), "session": self.session_id, "run": self.run_id}
+        records = [
+            {**base, "stage": s["stage"], "ms": round(s["ms"], 3), "depth": s["depth"], **s["attrs"]}
+            for s in self.spans
+        ]
+        records.append({
+            **base,
+            "stage": "rerun",
+            "ms": round(self.total_ms, 3),
+            "status": self.status,
+            "state_bytes": sum(self.state_sizes.values()),
+            "state_top": dict(list(self.state_sizes.items())[:5]),
+            **self.attrs,
+        })
+        return records
+
+
+def current_trace():
+    return getattr(_local, "trace", None)
+
+
+@contextmanager
+def span(name, **attrs):
+    """
+    구간 시간을 측정하여 현재 rerun 기록에 추가하는 context manager
+    yield된 dict에 값을 넣으면 속성으로 함께 기록된다. (예: 읽은 바이트 수)
+    """
+    trace = current_trace()
+    if trace is None:
+        yield attrs
+        return
+    depth = trace.depth
+    trace.depth += 1
+    start = time.perf_counter()
+    try:
+        yield attrs
+    except Exception as e:
+        attrs["error"] = type(e).__name__
+        raise
+    finally:
+        end = time.perf_counter()
+        trace.depth = depth
+        trace.spans.append({
+            "stage": name,
+            "ms": (end - start) * 1000,
+            "offset_ms": (start - trace.start) * 1000,
+            "depth": depth,
+            "attrs": attrs,
+        })
+
+
+def session_id():
+    """세션 식별자 (사용자 정보 없이 세션마다 임의로 생성)"""
+    return st.session_state.setdefault("perf_session_id", uuid.uuid4().hex[:12])
+
+
+@contextmanager
+def run(session, export_path=None):
+    """
+    rerun 전체를 감싸는 context manager
+    st.stop()/st.rerun()으로 중단되어도 끝날 때 세션 메모리를 측정하고 기록을 내보낸다.
+    """
+    run_id = st.session_state.get("perf_run_id", 0) + 1
+    st.session_state["perf_run_id"] = run_id
+    trace = RunTrace(session, run_id)
+    _local.trace = trace
+    try:
+        yield trace
+    except BaseException as e:
+        trace.status = type(e).__name__
+        raise
+    finally:
+        _local.trace = None
+        trace.finish()
+        history = st.session_state.setdefault("perf_history", deque(maxlen=HISTORY_RUNS))
+        stages = {"rerun": trace.total_ms}
+        for s in trace.spans:
+            stages[s["stage"]] = stages.get(s["stage"], 0.0) + s["ms"]
+        history.append(stages)
+        st.session_state["perf_last_run"] = trace
+        export(trace.records(), export_path)
+
+
+def export(records, path=None):
+    """레코드를 JSON lines 파일에 추가 (여러 세션이 같은 파일에 기록)"""
+    path = os.environ.get("CDL_PERF_LOG", DEFAULT_EXPORT_PATH) if path is None else path
+    if not path:
+        return
+    lines = "".join(json.dumps(record, ensure_ascii=False, default=str) + "\n" for record in records)
+    with _export_lock:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(lines)
+
+
+def percentiles(values_by_stage):
+    """{단계: [ms]} -> [{"stage", "count", "p50_ms", "p95_ms", "max_ms"}] (p95 큰 순서)"""
+    rows = []
+    for stage, values in values_by_stage.items():
+        values = np.asarray(values, dtype=np.float64)
+        rows.append({
+            "stage": stage,
+            "count": len(values),
+            "p50_ms": round(float(np.percentile(values, 50)), 1),
+            "p95_ms": round(float(np.percentile(values, 95)), 1),
+            "max_ms": round(float(values.max()), 1),
+        })
+    return sorted(rows, key=lambda row: -row["p95_ms"])
+
+
+def summarize(paths, since=None):
+    """
+    내보낸 JSON lines 파일(여러 개 가능)에서 단계별 p50/p95를 집계하는 함수
+    Args:
+        since: 이 시각(epoch 초) 이후 기록만 집계
+    """
+    values = {}
+    for path in [paths] if isinstance(paths, str) else paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # 기록 중에 잘린 줄
+                if since is not None and record.get("ts", 0) < since:
+                    continue
+                values.setdefault(record["stage"], []).append(record["ms"])
+    return percentiles(values)
+
+
+def render_panel():
+    """
+    사이드바 체크박스로 켜는 성능 디버그 패널
+    마지막으로 끝난 rerun의 span, 이 세션의 단계별 p50/p95, st.session_state 키별 메모리 사용량을 표시한다.
+    (st.stop()으로 중단되는 탭도 있으므로 현재 rerun이 아니라 이전 rerun의 기록을 표시)
+    """
+    if not st.sidebar.checkbox("성능 디버그 패널", key="perf_debug"):
+        return
+    trace = st.session_state.get("perf_last_run")
+    if trace is None:
+        return
+
+    with st.expander(f"⏱ 이전 rerun #{trace.run_id}: {trace.total_ms:.0f}ms ({trace.status})", expanded=True):
+        st.write("**구간**")
+        st.dataframe([
+            {
+                "stage": "　" * s["depth"] + s["stage"],
+                "ms": round(s["ms"], 1),
+                "start_ms": round(s["offset_ms"], 1),
+                "attrs": json.dumps(s["attrs"], ensure_ascii=False, default=str) if s["attrs"] else "",
+            }
+            for s in trace.ordered_spans()
+        ])
+
+        history = st.session_state.get("perf_history", [])
+        values = {}
+        for entry in history:
+            for stage, ms in entry.items():
+                values.setdefault(stage, []).append(ms)
+        st.write(f"**이 세션의 최근 {len(history)}회 rerun**")
+        st.dataframe(percentiles(values))
+
+        total = sum(trace.state_sizes.values())
+        st.write(f"**st.session_state 메모리: {total / 2 ** 20:.2f}MB** (측정 {trace.measure_ms:.1f}ms)")
+        st.dataframe(
+            [{"key": key, "KB": round(size / 1024, 1)} for key, size in list(trace.state_sizes.items())[:20]]
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="성능 기록(JSON lines)의 단계별 p50/p95 집계")
+    parser.add_argument("paths", nargs="*", default=[os.environ.get("CDL_PERF_LOG", DEFAULT_EXPORT_PATH)])
+    parser.add_argument("--hours", type=float, default=None, help="최근 N시간 기록만 집계")
+    args = parser.parse_args()
+
+    since = time.time() - args.hours * 3600 if args.hours else None
+    rows = summarize(args.paths, since)
+
+    print(f"{'stage':40s} {'count':>7s} {'p50_ms':>9s} {'p95_ms':>9s} {'max_ms':>9s}")
+    for row in rows:
+        print(f"{row['stage']:40s} {row['count']:7d} {row['p50_ms']:9.1f} {row['p95_ms']:9.1f} {row['max_ms']:9.1f}")
+
+
+if __name__ == "__main__":
+    main()
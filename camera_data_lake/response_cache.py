@@ -0,0 +1,135 @@
+# response_cache.py
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import numpy as np
+
+
+def normalize_prompt(prompt):
+    """공백과 대소문자 차이를 무시하도록 질문을 정규화"""
+    return re.sub(r"\s+", " ", prompt).strip().lower()
+
+
+class ResponseCache:
+    """
+    챗봇 응답을 로컬 디스크(SQLite)에 저장하는 캐시
+    - 정확 일치: (모델, temperature, 정규화된 질문, 첨부 파일 해시)의 해시 키로 조회
+    - 유사 일치: 같은 모델/temperature/첨부 파일 범위에서 질문 임베딩의 코사인 유사도가 임계값 이상인 항목 조회
+    - TTL이 지난 항목은 무시하고, 전체 크기가 max_bytes를 넘으면 오래 사용하지 않은 항목부터 삭제
+    """
+    def __init__(self, path="./.cache/chat_responses.sqlite", ttl=7 * 24 * 3600, max_bytes=64 * 1024 * 1024, embedder=None):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.embedder = embedder
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                scope TEXT NOT NULL,
+                prompt TEXT NOT NULL,
+                response TEXT NOT NULL,
+                embedding BLOB,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_scope ON responses(scope)")
+        self._conn.commit()
+
+    @staticmethod
+    def _scope(model, temperature, attachment_hash):
+        return f"{model}|{float(temperature):.3f}|{attachment_hash or ''}"
+
+    def _key(self, scope, prompt):
+        return hashlib.sha256(f"{scope}|{normalize_prompt(prompt)}".encode("utf-8")).hexdigest()
+
+    def get(self, model, temperature, prompt, attachment_hash=None, similarity_threshold=None):
+        """
+        캐시된 응답을 조회하는 함수
+        Args:
+            similarity_threshold: None이면 정확 일치만, 값이 있으면 코사인 유사도 임계값으로 유사 질문도 조회
+        Returns:
+            dict 또는 None: {"response", "prompt", "similarity"}
+        """
+        scope = self._scope(model, temperature, attachment_hash)
+        min_created = time.time() - self.ttl
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT key, prompt, response FROM responses WHERE key = ? AND created >= ?",
+                (self._key(scope, prompt), min_created),
+            ).fetchone()
+            if row:
+                self._touch(row[0])
+                return {"response": row[2], "prompt": row[1], "similarity": 1.0}
+
+            if similarity_threshold is None or self.embedder is None:
+                return None
+
+            rows = self._conn.execute(
+                "SELECT key, prompt, response, embedding FROM responses "
+                "WHERE scope = ? AND created >= ? AND embedding IS NOT NULL",
+                (scope, min_created),
+            ).fetchall()
+
+        if not rows:
+            return None
+        query = self.embedder.encode([normalize_prompt(prompt)])[0].astype(np.float32)
+        matrix = np.stack([np.frombuffer(r[3], dtype=np.float32) for r in rows])
+        if matrix.shape[1] != len(query):
+            # 임베딩 모델이 바뀐 경우
+            return None
+        scores = matrix @ query
+        best = int(np.argmax(scores))
+        if scores[best] < similarity_threshold:
+            return None
+
+        with self._lock:
+            self._touch(rows[best][0])
+        return {"response": rows[best][2], "prompt": rows[best][1], "similarity": float(scores[best])}
+
+    def _touch(self, key):
+        self._conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (time.time(), key))
+        self._conn.commit()
+
+    def put(self, model, temperature, prompt, response, attachment_hash=None):
+        """응답을 저장하고 TTL/크기 제한에 따라 오래된 항목을 정리"""
+        scope = self._scope(model, temperature, attachment_hash)
+        embedding = None
+        if self.embedder is not None:
+            embedding = self.embedder.encode([normalize_prompt(prompt)])[0].astype(np.float32).tobytes()
+        size = len(prompt.encode("utf-8")) + len(response.encode("utf-8")) + len(embedding or b"")
+        now = time.time()
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (self._key(scope, prompt), scope, prompt, response, embedding, size, now, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now):
+        self._conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # 오래 사용하지 않은 항목부터 삭제
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY accessed").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
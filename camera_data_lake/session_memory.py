@@ -0,0 +1,349 @@
+# session_memory.py
+# 세션별 큰 값(file_content, svg_content, messages, JSON 에디터 버퍼 등)의 메모리 관리
+# - 큰 값은 st.session_state 대신 여기 세션 슬롯에 보관하고, 키별 크기를 측정
+# - 세션 상한을 넘거나 세션이 한동안 사용되지 않으면 디스크에 내보내고(spill) 핸들만 남김 -> 다시 읽을 때 자동으로 불러옴
+# - 프로세스 전체 상한을 넘으면 오래 사용하지 않은 세션의 값부터 내보냄
+# 환경 변수:
+#   CDL_SESSION_CAP_MB=256, CDL_GLOBAL_CAP_MB=4096 (메모리 상한)
+#   CDL_SESSION_IDLE_S=600 (이 시간 동안 rerun이 없으면 디스크로 내보냄), CDL_SESSION_TTL_S=86400 (이후 완전히 삭제)
+#   CDL_SPILL_DIR=./.cache/session_spill
+import hashlib
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+import streamlit as st
+from perf_trace import current_trace, estimate_size, session_id, span
+
+_lock = threading.Lock()
+_memory = None
+
+
+class SpillHandle:
+    """디스크로 내보낸 값의 핸들"""
+    def __init__(self, path, size):
+        self.path = path
+        self.size = size
+
+    def load(self):
+        with open(self.path, "rb") as f:
+            return pickle.load(f)
+
+
+class SessionValues:
+    """
+    세션 하나의 큰 값 저장소 (dict처럼 사용)
+    값이 디스크에 있으면 읽을 때 메모리로 다시 불러온다.
+    """
+    def __init__(self, session, spill_dir):
+        self.session = session
+        self.spill_dir = spill_dir
+        self.values = {}  # 키 -> 값 또는 SpillHandle
+        self.sizes = {}  # 키 -> 메모리에 있을 때의 바이트 수
+        self._lengths = {}  # list 값의 키 -> 측정 당시 (원소 수, list 자체 크기) (append된 부분만 추가로 측정)
+        self.last_seen = time.time()
+        self.active = False  # rerun 실행 중이면 다른 스레드가 내보내지 않음
+        self._lock = threading.RLock()
+
+    def __contains__(self, key):
+        return key in self.values
+
+    def __getitem__(self, key):
+        with self._lock:
+            value = self.values[key]
+            if isinstance(value, SpillHandle):
+                value = value.load()
+                self._drop_spill(key)
+                self.values[key] = value
+                self._measure(key, value)
+            return value
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            self._drop_spill(key)
+            self.values[key] = value
+            self._measure(key, value)
+
+    def __delitem__(self, key):
+        with self._lock:
+            self._drop_spill(key)
+            del self.values[key]
+            self.sizes.pop(key, None)
+            self._lengths.pop(key, None)
+
+    def get(self, key, default=None):
+        return self[key] if key in self.values else default
+
+    def setdefault(self, key, default):
+        with self._lock:
+            if key not in self.values:
+                self[key] = default
+            return self[key]
+
+    def pop(self, key, default=None):
+        with self._lock:
+            if key not in self.values:
+                return default
+            value = self[key]
+            del self[key]
+            return value
+
+    def is_spilled(self, key):
+        return isinstance(self.values.get(key), SpillHandle)
+
+    def resident_bytes(self):
+        return sum(size for key, size in self.sizes.items() if not self.is_spilled(key))
+
+    def _measure(self, key, value):
+        """값 전체의 크기를 측정 (저장하거나 디스크에서 다시 불러올 때 한 번)"""
+        self.sizes[key] = estimate_size(value)
+        if isinstance(value, list):
+            self._lengths[key] = (len(value), sys.getsizeof(value))
+        else:
+            self._lengths.pop(key, None)
+
+    def measure(self):
+        """
+        messages처럼 제자리에서 append되는 list 값의 크기 변화를 반영
+        (rerun마다 모든 값을 다시 훑지 않도록 새로 추가된 원소만 측정하고, 줄어든 list만 전체를 다시 측정)
+        """
+        with self._lock:
+            for key, (length, container) in list(self._lengths.items()):
+                value = self.values.get(key)
+                if not isinstance(value, list) or len(value) == length:
+                    continue
+                if len(value) < length:
+                    self._measure(key, value)
+                    continue
+                self.sizes[key] += sys.getsizeof(value) - container + sum(estimate_size(item) for item in value[length:])
+                self._lengths[key] = (len(value), sys.getsizeof(value))
+
+    def spill(self, key):
+        """값을 디스크로 내보내고 핸들로 바꿈 (rerun 실행 중인 세션은 값을 바꾸고 있을 수 있으므로 제외)"""
+        with self._lock:
+            value = self.values.get(key)
+            if self.active or value is None or isinstance(value, SpillHandle):
+                return 0
+            os.makedirs(self.spill_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.spill_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            path = os.path.join(self.spill_dir, hashlib.sha1(str(key).encode("utf-8")).hexdigest()[:16] + ".pkl")
+            os.replace(tmp_path, path)
+            self.values[key] = SpillHandle(path, self.sizes.get(key, 0))
+            return self.sizes.get(key, 0)
+
+    def spill_largest(self, target_bytes, min_bytes):
+        """메모리 사용량이 target_bytes 이하가 될 때까지 큰 값부터 내보냄 (min_bytes보다 작은 값은 제외)"""
+        with self._lock:
+            resident = self.resident_bytes()
+            candidates = sorted(
+                (key for key in self.values if not self.is_spilled(key) and self.sizes.get(key, 0) >= min_bytes),
+                key=lambda k: -self.sizes[k],
+            )
+            for key in candidates:
+                if resident <= target_bytes:
+                    break
+                resident -= self.spill(key)
+            return resident
+
+    def _drop_spill(self, key):
+        value = self.values.get(key)
+        if isinstance(value, SpillHandle) and os.path.exists(value.path):
+            os.remove(value.path)
+
+    def clear(self):
+        with self._lock:
+            self.values.clear()
+            self.sizes.clear()
+            self._lengths.clear()
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
+
+
+class SessionMemoryManager:
+    """
+    프로세스 전체의 세션 슬롯 관리자
+    - rerun이 끝날 때(end_run) 세션 상한과 전체 상한을 적용
+    - 백그라운드 스레드가 일정 시간 사용하지 않은 세션의 값을 디스크로 내보내고, TTL이 지나면 삭제
+    """
+    def __init__(self, spill_dir="./.cache/session_spill", session_cap=256 * 2 ** 20, global_cap=4 * 2 ** 30,
+                 idle_seconds=600, ttl_seconds=24 * 3600, spill_min_bytes=256 * 1024, interval=30.0):
+        self.spill_dir = os.path.join(spill_dir, str(os.getpid()))  # 서버 프로세스마다 별도 폴더
+        self.session_cap = session_cap
+        self.global_cap = global_cap
+        self.idle_seconds = idle_seconds
+        self.ttl_seconds = ttl_seconds
+        self.spill_min_bytes = spill_min_bytes
+        self.interval = interval
+        self.sessions = {}  # 세션 ID -> SessionValues
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._remove_stale(spill_dir)
+
+    def _remove_stale(self, spill_dir):
+        """종료된 프로세스가 남긴 폴더는 참조하는 세션이 없으므로 삭제"""
+        if not os.path.isdir(spill_dir):
+            return
+        for name in os.listdir(spill_dir):
+            if not name.isdigit():
+                continue
+            try:
+                os.kill(int(name), 0)
+                if int(name) != os.getpid():
+                    continue
+            except ProcessLookupError:
+                pass
+            except PermissionError:
+                continue  # 다른 사용자의 살아 있는 프로세스
+            shutil.rmtree(os.path.join(spill_dir, name), ignore_errors=True)
+
+    def start(self):
+        threading.Thread(target=self._run, name="session-memory", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.sweep()
+            except Exception:
+                # 정리 스레드는 오류가 나도 계속 동작해야 한다
+                pass
+
+    def session(self, session):
+        with self._lock:
+            values = self.sessions.get(session)
+            if values is None:
+                values = self.sessions[session] = SessionValues(session, os.path.join(self.spill_dir, session))
+            return values
+
+    def begin_run(self, session):
+        values = self.session(session)
+        with values._lock:
+            values.active = True
+            values.last_seen = time.time()
+        return values
+
+    def end_run(self, session):
+        """rerun이 끝날 때 append된 값의 크기를 반영하고 세션 상한과 전체 상한을 적용"""
+        values = self.session(session)
+        with values._lock:
+            values.active = False
+            values.last_seen = time.time()
+        values.measure()
+        values.spill_largest(self.session_cap, self.spill_min_bytes)
+        self.enforce_global_cap()
+
+    def resident_bytes(self):
+        with self._lock:
+            sessions = list(self.sessions.values())
+        return sum(values.resident_bytes() for values in sessions)
+
+    def enforce_global_cap(self):
+        """전체 메모리 사용량이 상한을 넘으면 실행 중이 아닌 세션 중 오래 사용하지 않은 세션의 값부터 내보냄"""
+        total = self.resident_bytes()
+        if total <= self.global_cap:
+            return
+        with self._lock:
+            idle_first = sorted((v for v in self.sessions.values() if not v.active), key=lambda v: v.last_seen)
+        for values in idle_first:
+            if total <= self.global_cap:
+                break
+            before = values.resident_bytes()
+            total -= before - values.spill_largest(0, self.spill_min_bytes)
+
+    def sweep(self):
+        """오래 사용하지 않은 세션의 값은 디스크로 내보내고, TTL이 지난 세션은 삭제"""
+        now = time.time()
+        with self._lock:
+            sessions = list(self.sessions.items())
+        for session, values in sessions:
+            if values.active:
+                continue
+            idle = now - values.last_seen
+            if idle > self.ttl_seconds:
+                values.clear()
+                with self._lock:
+                    self.sessions.pop(session, None)
+            elif idle > self.idle_seconds:
+                values.spill_largest(0, self.spill_min_bytes)
+        self.enforce_global_cap()
+
+    def stats(self):
+        """세션별 메모리/디스크 사용량 (디버그 패널용)"""
+        with self._lock:
+            sessions = list(self.sessions.items())
+        rows = []
+        for session, values in sessions:
+            spilled = sum(size for key, size in values.sizes.items() if values.is_spilled(key))
+            rows.append({
+                "session": session,
+                "resident_MB": round(values.resident_bytes() / 2 ** 20, 2),
+                "spilled_MB": round(spilled / 2 ** 20, 2),
+                "idle_s": round(time.time() - values.last_seen),
+                "active": values.active,
+            })
+        return sorted(rows, key=lambda row: -row["resident_MB"])
+
+
+def get_session_memory():
+    """프로세스 전체에서 공유하는 세션 메모리 관리자"""
+    global _memory
+    with _lock:
+        if _memory is None:
+            _memory = SessionMemoryManager(
+                spill_dir=os.environ.get("CDL_SPILL_DIR", "./.cache/session_spill"),
+                session_cap=int(float(os.environ.get("CDL_SESSION_CAP_MB", "256")) * 2 ** 20),
+                global_cap=int(float(os.environ.get("CDL_GLOBAL_CAP_MB", "4096")) * 2 ** 20),
+                idle_seconds=float(os.environ.get("CDL_SESSION_IDLE_S", "600")),
+                ttl_seconds=float(os.environ.get("CDL_SESSION_TTL_S", "86400")),
+            ).start()
+        return _memory
+
+
+def session_values():
+    """현재 세션의 큰 값 저장소 (st.session_state 대신 file_content, svg_content, messages 등을 보관)"""
+    return get_session_memory().session(session_id())
+
+
+@contextmanager
+def run():
+    """
+    rerun 전체를 감싸는 context manager
+    실행 중에는 현재 세션의 값을 내보내지 않고, 끝나면 바뀐 크기를 반영하여 상한을 적용한다.
+    """
+    manager = get_session_memory()
+    session = session_id()
+    values = manager.begin_run(session)
+    try:
+        yield values
+    finally:
+        with span("session_memory.end_run"):
+            manager.end_run(session)
+        trace = current_trace()
+        if trace is not None:
+            trace.attrs["values_bytes"] = values.resident_bytes()
+            trace.attrs["spilled_bytes"] = sum(size for key, size in values.sizes.items() if values.is_spilled(key))
+
+
+def render_panel():
+    """현재 세션의 키별 크기와 프로세스 전체 사용량 표시 (성능 디버그 패널과 함께 사용)"""
+    manager = get_session_memory()
+    values = session_values()
+    with st.expander(
+        f"🧠 세션 메모리: {manager.resident_bytes() / 2 ** 20:.1f}MB / 상한 {manager.global_cap / 2 ** 20:.0f}MB "
+        f"(세션 {len(manager.sessions)}개)"
+    ):
+        st.write(f"**현재 세션** (상한 {manager.session_cap / 2 ** 20:.0f}MB)")
+        st.dataframe([
+            {"key": key, "KB": round(size / 1024, 1), "state": "disk" if values.is_spilled(key) else "memory"}
+            for key, size in sorted(values.sizes.items(), key=lambda item: -item[1])
+        ])
+        st.write("**전체 세션**")
+        st.dataframe(manager.stats())
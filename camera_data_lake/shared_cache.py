@@ -0,0 +1,228 @@
+# shared_cache.py
+# 여러 Streamlit 서버 프로세스가 함께 사용하는 로컬 공유 캐시
+# - 메타데이터는 SQLite(WAL)에, 작은 값은 SQLite에 직접, 큰 값은 파일로 저장
+# - numpy 배열은 .npy 파일로 저장하고 읽을 때 mmap(읽기 전용)으로 열어 복사 없이 사용
+#   (같은 파일을 여는 모든 프로세스가 OS 페이지 캐시를 공유하므로 워커 수만큼 메모리가 늘지 않음)
+# - get/put/evict 공통 API, 전체 크기가 max_bytes를 넘으면 오래 사용하지 않은 항목부터 삭제
+# 환경 변수:
+#   CDL_SHARED_CACHE_DIR=./.cache/shared (tmpfs인 /dev/shm 아래로 지정하면 디스크 I/O 없이 공유 메모리로 사용)
+#   CDL_SHARED_CACHE_MB=2048
+import os
+import pickle
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+import numpy as np
+
+_lock = threading.Lock()
+_cache = None
+
+
+class SharedCache:
+    """
+    (namespace, key) -> 값 저장소
+    값 종류: numpy 배열(object dtype 제외)은 mmap 가능한 .npy 파일, 그 외는 pickle
+    """
+    def __init__(self, root="./.cache/shared", max_bytes=2 * 2 ** 30, inline_bytes=256 * 1024, touch_interval=60.0):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.inline_bytes = inline_bytes  # 이보다 작은 pickle 값은 SQLite에 직접 저장
+        self.touch_interval = touch_interval  # 조회 시각 갱신 간격 (조회마다 쓰기가 생기지 않도록)
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(root, "blobs"), exist_ok=True)
+        self._conn = sqlite3.connect(
+            os.path.join(root, "index.sqlite"), check_same_thread=False, timeout=30, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS entries (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                path TEXT,
+                data BLOB,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL,
+                expires REAL,
+                PRIMARY KEY (namespace, key)
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries(accessed)")
+
+    def _blob_path(self, suffix):
+        # 같은 키를 다시 저장해도 다른 프로세스가 mmap 중인 파일을 덮어쓰지 않도록 항상 새 파일 이름 사용
+        return os.path.join(self.root, "blobs", f"{uuid.uuid4().hex}{suffix}")
+
+    def _write_file(self, path, write):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return os.path.getsize(path)
+
+    def put(self, namespace, key, value, ttl=None):
+        """
+        값을 저장하는 함수
+        Args:
+            ttl: 유효 시간(초), None이면 용량 제한으로 삭제될 때까지 유지
+        """
+        path, data = None, None
+        if isinstance(value, np.ndarray) and not value.dtype.hasobject:
+            kind = "ndarray"
+            path = self._blob_path(".npy")
+            size = self._write_file(path, lambda f: np.save(f, np.ascontiguousarray(value), allow_pickle=False))
+        else:
+            payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            kind = "pickle"
+            size = len(payload)
+            if size <= self.inline_bytes:
+                data = payload
+            else:
+                path = self._blob_path(".pkl")
+                self._write_file(path, lambda f: f.write(payload))
+
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                old = self._conn.execute(
+                    "SELECT path FROM entries WHERE namespace = ? AND key = ?", (namespace, key)
+                ).fetchone()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO entries (namespace, key, kind, path, data, size, created, accessed, expires) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (namespace, key, kind, path, data, size, now, now, now + ttl if ttl else None),
+                )
+                removed = self._evict_over_limit()
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                if path and os.path.exists(path):
+                    os.remove(path)
+                raise
+        self._remove_files(([old[0]] if old else []) + removed)
+
+    def get(self, namespace, key, default=None):
+        """
+        저장된 값을 반환하는 함수 (없거나 만료되었으면 default)
+        numpy 배열은 읽기 전용 mmap 배열로 반환한다.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT kind, path, data, accessed, expires FROM entries WHERE namespace = ? AND key = ?",
+                (namespace, key),
+            ).fetchone()
+        if row is None:
+            return default
+        kind, path, data, accessed, expires = row
+        now = time.time()
+        if expires is not None and expires < now:
+            self.evict(namespace, key)
+            return default
+
+        try:
+            if kind == "ndarray":
+                value = np.load(path, mmap_mode="r", allow_pickle=False)
+            elif path is not None:
+                with open(path, "rb") as f:
+                    value = pickle.load(f)
+            else:
+                value = pickle.loads(data)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError, ValueError):
+            # 다른 프로세스가 방금 삭제했거나 손상된 항목
+            self.evict(namespace, key)
+            return default
+
+        if now - accessed > self.touch_interval:
+            with self._lock:
+                self._conn.execute(
+                    "UPDATE entries SET accessed = ? WHERE namespace = ? AND key = ?", (now, namespace, key)
+                )
+        return value
+
+    def get_or_compute(self, namespace, key, compute, ttl=None):
+        """값이 없으면 compute()로 만들어 저장한 뒤 반환 (numpy 배열은 저장된 mmap 배열을 반환)"""
+        value = self.get(namespace, key)
+        if value is not None:
+            return value
+        value = compute()
+        if value is not None:
+            self.put(namespace, key, value, ttl)
+            if isinstance(value, np.ndarray) and not value.dtype.hasobject:
+                return self.get(namespace, key, value)
+        return value
+
+    def evict(self, namespace=None, key=None):
+        """
+        항목 삭제
+        Args:
+            namespace: None이면 전체, key가 None이면 namespace 전체
+        """
+        conditions, params = [], []
+        if namespace is not None:
+            conditions.append("namespace = ?")
+            params.append(namespace)
+        if key is not None:
+            conditions.append("key = ?")
+            params.append(key)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            paths = [row[0] for row in self._conn.execute(f"SELECT path FROM entries{where}", params)]
+            self._conn.execute(f"DELETE FROM entries{where}", params)
+            self._conn.execute("COMMIT")
+        self._remove_files(paths)
+
+    def _evict_over_limit(self):
+        """만료된 항목과, 전체 크기가 max_bytes를 넘는 만큼 오래 사용하지 않은 항목을 삭제 (트랜잭션 안에서 호출)"""
+        removed = [row[0] for row in self._conn.execute(
+            "SELECT path FROM entries WHERE expires IS NOT NULL AND expires < ?", (time.time(),)
+        )]
+        self._conn.execute("DELETE FROM entries WHERE expires IS NOT NULL AND expires < ?", (time.time(),))
+
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return removed
+        for namespace, key, path, size in self._conn.execute(
+            "SELECT namespace, key, path, size FROM entries ORDER BY accessed"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, key))
+            removed.append(path)
+            total -= size
+        return removed
+
+    def _remove_files(self, paths):
+        # 다른 프로세스가 mmap으로 열어 둔 파일도 삭제해도 됨 (매핑은 닫을 때까지 유지됨)
+        for path in paths:
+            if path and os.path.exists(path):
+                os.remove(path)
+
+    def stats(self):
+        """namespace별 항목 수와 크기"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT namespace, COUNT(*), SUM(size) FROM entries GROUP BY namespace ORDER BY namespace"
+            ).fetchall()
+        return [{"namespace": ns, "entries": count, "MB": round(size / 2 ** 20, 2)} for ns, count, size in rows]
+
+
+def get_shared_cache():
+    """프로세스 전체에서 공유하는 공유 캐시 연결"""
+    global _cache
+    with _lock:
+        if _cache is None:
+            _cache = SharedCache(
+                root=os.environ.get("CDL_SHARED_CACHE_DIR", "./.cache/shared"),
+                max_bytes=int(float(os.environ.get("CDL_SHARED_CACHE_MB", "2048")) * 2 ** 20),
+            )
+        return _cache
@@ -1,15 +1,12 @@
 # sidebar_utils.py
 import os
 import streamlit as st
-import json_utils as ju
-import image_utils as iu
 from datetime import datetime
+from dir_catalog import get_directory_catalog
 
 def find_file(filename, search_path):
-    for root, dirs, files in os.walk(search_path):
-        if filename in files:
-            return os.path.join(root, filename)
-    return None
+    # rerun마다 os.walk하지 않고 공용 폴더 catalog에서 찾음
+    return get_directory_catalog(search_path).find(filename, search_path)
 
 class Sidebar:
     def __init__(self, base_dir="."):
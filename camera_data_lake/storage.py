@@ -0,0 +1,393 @@
+# storage.py
+# 데이터 레이크 파일 읽기 계층
+# - LocalStorage: 로컬/마운트된 네트워크 경로를 그대로 읽음
+# - SimulatedRemoteStorage: 요청 지연과 대역폭 제한을 흉내 내는 오프라인 테스트용 백엔드
+# - CachedStorage: 로컬 디스크 read-through 캐시 (크기 제한, sha256 검증), 큰 파일 병렬 청크 읽기, 폴더 미리 읽기
+#   (캐시 용량보다 큰 파일은 캐시에 넣지 않고 백엔드에서 바로 읽음)
+# 환경 변수:
+#   CDL_STORAGE=local|simulated, CDL_SIM_LATENCY=0.05 (요청당 초), CDL_SIM_BANDWIDTH=50 (MB/s)
+#   CDL_FILE_CACHE_DIR=./.cache/file_cache, CDL_FILE_CACHE_MB=2048
+import hashlib
+import io
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+_lock = threading.Lock()
+_storage = None
+
+
+class LocalStorage:
+    """로컬 파일 시스템(또는 마운트된 네트워크 경로) 백엔드"""
+    def stat(self, path):
+        """(크기, 수정 시간)"""
+        st = os.stat(path)
+        return st.st_size, st.st_mtime
+
+    def read_range(self, path, offset, length):
+        with open(path, "rb") as f:
+            f.seek(offset)
+            return f.read(length)
+
+    def local_path(self, path):
+        """복사 없이 바로 열 수 있는 로컬 경로 (없으면 None)"""
+        return path
+
+
+class SimulatedRemoteStorage(LocalStorage):
+    """
+    로컬 파일을 읽되 요청마다 latency초를 기다리고 bandwidth(bytes/s)로 전송 속도를 제한하는 백엔드
+    (실제 네트워크 없이 캐시/병렬 읽기/미리 읽기 효과를 확인하는 용도, 연결마다 대역폭이 따로 적용됨)
+    """
+    def __init__(self, latency=0.05, bandwidth=50 * 2 ** 20):
+        self.latency = latency
+        self.bandwidth = bandwidth
+
+    def stat(self, path):
+        time.sleep(self.latency)
+        return super().stat(path)
+
+    def read_range(self, path, offset, length):
+        data = super().read_range(path, offset, length)
+        time.sleep(self.latency + (len(data) / self.bandwidth if self.bandwidth else 0.0))
+        return data
+
+    def local_path(self, path):
+        return None  # 원격 저장소처럼 항상 받아서 사용
+
+
+class CachedStorage:
+    """
+    백엔드 앞에 두는 로컬 디스크 read-through 캐시
+    - 캐시 키: (경로, 크기, 수정 시간) -> 원본이 바뀌면 자동으로 새로 받음
+    - 저장 시 sha256을 함께 기록하고, 캐시에서 읽을 때 검증하여 손상된 항목은 버리고 다시 받음
+    - 전체 크기가 max_bytes를 넘으면 오래 사용하지 않은 항목부터 삭제 (사용 중이거나 방금 받은 항목은 제외)
+    - max_bytes보다 큰 파일은 캐시에 넣지 않고 백엔드에서 바로 읽음
+    - chunk_size보다 큰 파일은 여러 범위를 동시에 요청하여 받음
+    """
+    def __init__(self, backend, cache_dir="./.cache/file_cache", max_bytes=2 * 2 ** 30, chunk_size=8 * 2 ** 20, workers=8):
+        self.backend = backend
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self.workers = workers
+        os.makedirs(cache_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._inflight = {}  # 캐시 키 -> 받는 중인 Future
+        self._verified = {}  # 이 프로세스에서 검증을 마친 캐시 키 -> sha256 (rerun마다 다시 해시하지 않음)
+        self._in_use = {}  # 캐시 키 -> 사용 중인 수 (삭제 대상에서 제외)
+        self._checksums = {}  # 캐시하지 않는 큰 파일의 캐시 키 -> sha256
+        self._queued = set()  # 미리 읽기 대기/진행 중인 경로
+        self._chunk_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="storage-chunk")
+        self._prefetch_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="storage-prefetch")
+
+    def _key(self, path, size, mtime):
+        return hashlib.sha256(f"{os.path.abspath(path)}|{size}|{mtime}".encode("utf-8")).hexdigest()
+
+    def _paths(self, key):
+        base = os.path.join(self.cache_dir, key)
+        return base + ".bin", base + ".sha256"
+
+    def _valid_cached(self, key):
+        """검증된 캐시 파일 경로와 sha256 (없거나 손상되었으면 None)"""
+        data_path, checksum_path = self._paths(key)
+        if not (os.path.exists(data_path) and os.path.exists(checksum_path)):
+            self._verified.pop(key, None)
+            return None
+        try:
+            if key in self._verified:
+                os.utime(data_path)  # LRU 기준 시각 갱신
+                return data_path, self._verified[key]
+            with open(checksum_path, "r") as f:
+                expected = f.read().strip()
+            digest = hashlib.sha256()
+            with open(data_path, "rb") as f:
+                while block := f.read(2 ** 20):
+                    digest.update(block)
+        except FileNotFoundError:
+            # 같은 캐시 폴더를 쓰는 다른 프로세스가 방금 삭제한 항목
+            self._verified.pop(key, None)
+            return None
+        if digest.hexdigest() != expected:
+            for path in (data_path, checksum_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            return None
+        os.utime(data_path)
+        self._verified[key] = expected
+        return data_path, expected
+
+    def _stream(self, path, size, out, progress=None):
+        """
+        병렬 청크 읽기로 파일을 순서대로 out에 기록하고 sha256 반환
+        Args:
+            out: write()를 가진 객체, None이면 해시만 계산
+        """
+        ranges = [(offset, min(self.chunk_size, size - offset)) for offset in range(0, size, self.chunk_size)] or [(0, 0)]
+        digest = hashlib.sha256()
+        # 메모리 사용을 제한하기 위해 workers * 2개까지만 미리 요청하고, 순서대로 기록하며 해시 계산
+        pending = []
+        next_range = 0
+        done = 0
+        while next_range < len(ranges) or pending:
+            while next_range < len(ranges) and len(pending) < self.workers * 2:
+                offset, length = ranges[next_range]
+                pending.append(self._chunk_pool.submit(self.backend.read_range, path, offset, length))
+                next_range += 1
+            chunk = pending.pop(0).result()
+            if out is not None:
+                out.write(chunk)
+            digest.update(chunk)
+            done += len(chunk)
+            if progress is not None:
+                progress(done, size)
+        return digest.hexdigest()
+
+    def _download(self, path, size, key, progress=None):
+        """병렬 청크 읽기로 캐시 파일을 만들고 (캐시 파일 경로, sha256) 반환"""
+        data_path, checksum_path = self._paths(key)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                checksum = self._stream(path, size, out, progress)
+            with open(checksum_path + ".tmp", "w") as f:
+                f.write(checksum)
+            os.replace(tmp_path, data_path)
+            os.replace(checksum_path + ".tmp", checksum_path)
+            self._verified[key] = checksum
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._evict(keep={key})
+        return data_path, checksum
+
+    @contextmanager
+    def _pinned(self, key):
+        """with 블록 동안 key 항목을 삭제 대상에서 제외"""
+        with self._lock:
+            self._in_use[key] = self._in_use.get(key, 0) + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._in_use[key] -= 1
+                if not self._in_use[key]:
+                    del self._in_use[key]
+
+    def fetch(self, path, progress=None):
+        """
+        파일을 로컬 캐시에 받아 두고 (캐시 파일 경로, sha256)을 반환하는 함수
+        같은 파일을 다른 세션/미리 읽기가 받는 중이면 새로 요청하지 않고 기다린다.
+        반환된 캐시 파일은 이후 삭제될 수 있으므로, 경로를 열어 쓰는 동안에는 open_local을 사용한다.
+        Args:
+            progress: (받은 바이트, 전체 바이트) 콜백
+        Raises:
+            ValueError: 캐시 용량(max_bytes)보다 큰 파일
+        """
+        size, mtime = self.backend.stat(path)
+        key = self._key(path, size, mtime)
+        if size > self.max_bytes:
+            raise ValueError(f"캐시 용량({self.max_bytes} bytes)보다 큰 파일은 캐시에 받을 수 없습니다: {path}")
+        with self._pinned(key):
+            return self._fetch(path, size, key, progress)
+
+    def _fetch(self, path, size, key, progress=None):
+        with self._lock:
+            future = self._inflight.get(key)
+        if future is not None:
+            return future.result()
+
+        cached = self._valid_cached(key)
+        if cached is not None:
+            if progress is not None:
+                progress(size, size)
+            return cached
+
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = _Result()
+        if not owner:
+            return future.result()
+        try:
+            result = self._download(path, size, key, progress)
+            future.set(result)
+            return result
+        except BaseException as e:
+            future.fail(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    @contextmanager
+    def open_local(self, path, progress=None):
+        """
+        with 블록 동안 사용할 수 있는 로컬 파일 경로와 sha256 (블록 안에서는 캐시 삭제 대상에서 제외)
+        캐시 용량보다 큰 파일은 캐시에 넣지 않고, 백엔드의 로컬 경로를 그대로 쓰거나 블록이 끝나면 지우는 임시 파일로 받는다.
+        Yields:
+            (str, str): 로컬 파일 경로, sha256
+        """
+        size, mtime = self.backend.stat(path)
+        key = self._key(path, size, mtime)
+        with self._pinned(key):
+            if size <= self.max_bytes:
+                yield self._fetch(path, size, key, progress)
+                return
+            local_path = self.backend.local_path(path)
+            if local_path is not None:
+                yield local_path, self._checksum_uncached(path, size, key, progress)
+                return
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".part")
+            try:
+                with os.fdopen(fd, "wb") as out:
+                    checksum = self._stream(path, size, out, progress)
+                self._checksums[key] = checksum
+                yield tmp_path, checksum
+            finally:
+                os.remove(tmp_path)
+
+    def _checksum_uncached(self, path, size, key, progress=None):
+        """캐시하지 않는 큰 파일의 sha256 (같은 버전은 한 번만 계산)"""
+        checksum = self._checksums.get(key)
+        if checksum is None:
+            checksum = self._checksums[key] = self._stream(path, size, None, progress)
+        elif progress is not None:
+            progress(size, size)
+        return checksum
+
+    def read(self, path, progress=None):
+        """파일 전체 내용 (캐시를 거쳐 읽고, 캐시 용량보다 큰 파일은 백엔드에서 바로 읽음)"""
+        size, mtime = self.backend.stat(path)
+        key = self._key(path, size, mtime)
+        if size > self.max_bytes:
+            out = io.BytesIO()
+            self._checksums[key] = self._stream(path, size, out, progress)
+            return out.getvalue()
+        with self._pinned(key):
+            data_path, _ = self._fetch(path, size, key, progress)
+            with open(data_path, "rb") as f:
+                return f.read()
+
+    def checksum(self, path):
+        """파일의 sha256 (캐시에 있으면 다시 읽지 않음)"""
+        size, mtime = self.backend.stat(path)
+        key = self._key(path, size, mtime)
+        if size > self.max_bytes:
+            return self._checksum_uncached(path, size, key)
+        with self._pinned(key):
+            return self._fetch(path, size, key)[1]
+
+    def prefetch(self, paths, max_file_bytes=None):
+        """
+        파일들을 백그라운드에서 미리 캐시에 받아 둠 (이미 캐시에 있거나 받는 중이거나 대기 중인 파일은 건너뜀)
+        Args:
+            max_file_bytes: 이보다 큰 파일은 미리 받지 않음 (캐시 용량보다 큰 파일도 제외)
+        """
+        limit = self.max_bytes if max_file_bytes is None else min(max_file_bytes, self.max_bytes)
+
+        def task(path):
+            try:
+                if self.backend.stat(path)[0] <= limit:
+                    self.fetch(path)
+            except Exception:
+                # 미리 읽기 실패는 실제로 읽을 때 다시 시도
+                pass
+            finally:
+                with self._lock:
+                    self._queued.discard(path)
+
+        with self._lock:
+            paths = [path for path in paths if path not in self._queued]
+            self._queued.update(paths)
+        for path in paths:
+            self._prefetch_pool.submit(task, path)
+
+    def cached_bytes(self):
+        total = 0
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.name.endswith(".bin"):
+                    total += entry.stat().st_size
+        return total
+
+    def _evict(self, keep=()):
+        """
+        전체 캐시 크기가 max_bytes를 넘으면 오래 사용하지 않은 항목부터 삭제
+        Args:
+            keep: 삭제하지 않을 캐시 키 (방금 받은 항목 등), 사용 중이거나 받는 중인 항목도 삭제하지 않음
+        """
+        entries = []
+        with os.scandir(self.cache_dir) as it:
+            for e in it:
+                if e.name.endswith(".bin"):
+                    try:
+                        stat = e.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, e.path))
+        total = sum(size for _, size, _ in entries)
+        with self._lock:
+            protected = set(keep) | set(self._in_use) | set(self._inflight)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            key = os.path.basename(path)[:-len(".bin")]
+            if key in protected:
+                continue
+            self._verified.pop(key, None)
+            for stale in (path, path[:-len(".bin")] + ".sha256"):
+                if os.path.exists(stale):
+                    os.remove(stale)
+            total -= size
+
+
+class _Result:
+    """다른 스레드가 받는 중인 결과를 기다리기 위한 간단한 Future"""
+    def __init__(self):
+        self._event = threading.Event()
+        self._value = None
+        self._error = None
+
+    def set(self, value):
+        self._value = value
+        self._event.set()
+
+    def fail(self, error):
+        self._error = error
+        self._event.set()
+
+    def result(self):
+        self._event.wait()
+        if self._error is not None:
+            raise self._error
+        return self._value
+
+
+def make_backend(kind=None):
+    """환경 변수(CDL_STORAGE)에 맞는 백엔드 생성"""
+    kind = kind or os.environ.get("CDL_STORAGE", "local")
+    if kind == "simulated":
+        return SimulatedRemoteStorage(
+            latency=float(os.environ.get("CDL_SIM_LATENCY", "0.05")),
+            bandwidth=float(os.environ.get("CDL_SIM_BANDWIDTH", "50")) * 2 ** 20,
+        )
+    return LocalStorage()
+
+
+def get_storage():
+    """프로세스 전체에서 공유하는 캐시 저장소 (세션 간에 캐시와 받는 중인 파일을 공유)"""
+    global _storage
+    with _lock:
+        if _storage is None:
+            _storage = CachedStorage(
+                make_backend(),
+                cache_dir=os.environ.get("CDL_FILE_CACHE_DIR", "./.cache/file_cache"),
+                max_bytes=int(float(os.environ.get("CDL_FILE_CACHE_MB", "2048")) * 2 ** 20),
+            )
+        return _storage
@@ -0,0 +1,305 @@
+# symbol_index.py
+# 주소 -> 심볼/섹션 변환 인덱스 (메모리 덤프, 크래시 로그 분석용)
+# - ELF 파일(.elf/.axf/.out/.so)의 심볼 테이블과 섹션 헤더, 또는 GNU ld 링커 맵(.map)에서 구간 목록을 만듦
+# - 구간 시작 주소를 정렬한 NumPy 배열에 searchsorted(이진 탐색)로 여러 주소를 한 번에 변환
+# - 링커 맵은 심볼 크기가 없으므로 같은 입력 섹션 안의 다음 심볼까지를 심볼 구간으로 사용
+#   (맵에 나오지 않는 static 함수 등은 입력 섹션 이름(.text.foo)과 오브젝트 파일로 표시)
+import re
+import struct
+import numpy as np
+import pandas as pd
+
+ELF_MAGIC = b"\x7fELF"
+_SHT_SYMTAB, _SHT_DYNSYM = 2, 11
+_SHF_ALLOC = 0x2
+_STT_SECTION, _STT_FILE = 3, 4
+_STT_FUNC = 2
+_EM_ARM = 40
+# 링커 맵에서 주소 0에 나오지만 메모리에 올라가지 않는 섹션
+_NON_ALLOC_SECTIONS = (".comment", ".debug", ".stab", ".note.GNU-stack", ".ARM.attributes", ".gnu.attributes", ".riscv.attributes")
+# 0x 없는 8/16자리 토큰은 날짜(20261019) 같은 10진수와 구분하기 위해 a-f 문자가 있거나 백트레이스 문맥(pc/lr/sp, #NN)일 때만 주소로 봄
+_ADDRESS = re.compile(
+    r"\b0[xX](?P<prefixed>[0-9a-fA-F]+)\b"
+    r"|(?:\b(?:pc|lr|sp)\b[\s:=]*|#\d+\s+)(?P<context>[0-9a-fA-F]{8}(?:[0-9a-fA-F]{8})?)\b"
+    r"|\b(?=[0-9]*[a-fA-F])(?P<bare>[0-9a-fA-F]{8}(?:[0-9a-fA-F]{8})?)\b"
+)
+
+
+class IntervalIndex:
+    """
+    겹치지 않는 [start, end) 구간 목록 (시작 주소로 정렬)
+    같은 시작 주소의 구간이 여럿이면 입력 순서상 앞의 것만 남기고, 구간이 다음 구간과 겹치면 다음 시작 주소에서 자른다.
+    """
+    def __init__(self, starts, ends, names, details=None):
+        starts = np.asarray(starts, dtype=np.uint64)
+        ends = np.asarray(ends, dtype=np.uint64)
+        names = np.asarray(names, dtype=object)
+        details = np.asarray(details if details is not None else [""] * len(starts), dtype=object)
+
+        order = np.argsort(starts, kind="stable")
+        starts, ends, names, details = starts[order], ends[order], names[order], details[order]
+        keep = np.ones(len(starts), dtype=bool)
+        keep[1:] = starts[1:] != starts[:-1]
+        self.starts, self.ends, self.names, self.details = starts[keep], ends[keep], names[keep], details[keep]
+        if len(self.starts) > 1:
+            self.ends[:-1] = np.minimum(self.ends[:-1], self.starts[1:])
+
+    def __len__(self):
+        return len(self.starts)
+
+    def lookup(self, addresses):
+        """
+        주소 배열이 속한 구간 번호
+        Returns:
+            (np.ndarray, np.ndarray): 구간 번호(int64), 구간 안에 있는지 여부(bool)
+        """
+        addresses = np.asarray(addresses, dtype=np.uint64)
+        positions = np.searchsorted(self.starts, addresses, side="right").astype(np.int64) - 1
+        hit = positions >= 0
+        clipped = np.maximum(positions, 0)
+        if len(self.starts):
+            hit &= addresses < self.ends[clipped]
+        else:
+            hit[:] = False
+        return clipped, hit
+
+
+def _extend_zero_sizes(starts, sizes, limits):
+    """크기가 0인 심볼(레이블, 맵 심볼)은 다음 심볼 시작 또는 limits(속한 섹션 끝)까지로 확장"""
+    starts = np.asarray(starts, dtype=np.uint64)
+    ends = starts + np.asarray(sizes, dtype=np.uint64)
+    order = np.argsort(starts, kind="stable")
+    next_start = np.empty_like(starts)
+    sorted_starts = starts[order]
+    # 같은 주소의 심볼은 건너뛰고 더 큰 다음 시작 주소를 찾음
+    following = np.searchsorted(sorted_starts, sorted_starts, side="right")
+    next_sorted = np.where(
+        following < len(sorted_starts), sorted_starts[np.minimum(following, len(sorted_starts) - 1)], np.uint64(2 ** 64 - 1)
+    )
+    next_start[order] = next_sorted
+    zero = ends == starts
+    ends[zero] = np.minimum(next_start[zero], np.asarray(limits, dtype=np.uint64)[zero])
+    return ends
+
+
+class SymbolIndex:
+    """
+    빌드 하나(ELF 또는 링커 맵)의 주소 -> 심볼/섹션 인덱스
+    symbols: 함수/변수 구간, regions: 링커 맵의 입력 섹션 구간 (심볼이 없는 주소의 대체 표시), sections: 출력 섹션 구간
+    """
+    def __init__(self, symbols, sections, regions=None, source=""):
+        self.symbols = symbols
+        self.sections = sections
+        self.regions = regions if regions is not None else IntervalIndex([], [], [])
+        self.source = source
+
+    @classmethod
+    def load(cls, path):
+        """파일 앞부분으로 ELF/링커 맵을 구분하여 인덱스 생성"""
+        with open(path, "rb") as f:
+            magic = f.read(4)
+        return cls.from_elf(path) if magic == ELF_MAGIC else cls.from_map(path)
+
+    @classmethod
+    def from_elf(cls, path):
+        """
+        ELF의 .symtab(없으면 .dynsym)과 SHF_ALLOC 섹션으로 인덱스를 만드는 함수
+        (파일을 mmap으로 열고 섹션 헤더와 심볼 테이블만 읽음, 디버그 정보는 읽지 않음)
+        """
+        data = np.memmap(path, mode="r")
+        header = bytes(data[:64])
+        if header[:4] != ELF_MAGIC:
+            raise ValueError(f"ELF 파일이 아닙니다: {path}")
+        is64 = header[4] == 2
+        order = "<" if header[5] == 1 else ">"
+        word = "Q" if is64 else "I"
+        machine = struct.unpack_from(f"{order}H", header, 18)[0]
+        shoff = struct.unpack_from(f"{order}{word}", header, 40 if is64 else 32)[0]
+        shentsize, shnum, shstrndx = struct.unpack_from(f"{order}HHH", header, 58 if is64 else 46)
+
+        addr_t = f"{order}u{8 if is64 else 4}"
+        section_dtype = np.dtype([
+            ("name", f"{order}u4"), ("type", f"{order}u4"), ("flags", addr_t), ("addr", addr_t),
+            ("offset", addr_t), ("size", addr_t), ("link", f"{order}u4"), ("info", f"{order}u4"),
+            ("addralign", addr_t), ("entsize", addr_t),
+        ])
+        headers = np.frombuffer(data, dtype=section_dtype, count=shnum, offset=shoff) if shnum else np.zeros(0, section_dtype)
+
+        def read(index):
+            h = headers[index]
+            return data[int(h["offset"]):int(h["offset"]) + int(h["size"])]
+
+        def names_from(table, offsets):
+            table = bytes(table)
+            return [table[o:table.find(b"\0", o)].decode("utf-8", errors="replace") for o in offsets.tolist()]
+
+        section_names = names_from(read(shstrndx), headers["name"]) if shnum else []
+        alloc = np.flatnonzero((headers["flags"] & _SHF_ALLOC != 0) & (headers["size"] > 0))
+        sections = IntervalIndex(
+            headers["addr"][alloc], headers["addr"][alloc] + headers["size"][alloc], [section_names[i] for i in alloc]
+        )
+
+        symtab = next((i for i in range(shnum) if headers[i]["type"] == _SHT_SYMTAB), None)
+        if symtab is None:
+            symtab = next((i for i in range(shnum) if headers[i]["type"] == _SHT_DYNSYM), None)
+        if symtab is None:
+            return cls(IntervalIndex([], [], []), sections, source=path)
+
+        if is64:
+            symbol_dtype = np.dtype([
+                ("name", f"{order}u4"), ("info", "u1"), ("other", "u1"), ("shndx", f"{order}u2"),
+                ("value", f"{order}u8"), ("size", f"{order}u8"),
+            ])
+        else:
+            symbol_dtype = np.dtype([
+                ("name", f"{order}u4"), ("value", f"{order}u4"), ("size", f"{order}u4"),
+                ("info", "u1"), ("other", "u1"), ("shndx", f"{order}u2"),
+            ])
+        raw = read(symtab)
+        symbols = np.frombuffer(raw, dtype=symbol_dtype, count=len(raw) // symbol_dtype.itemsize)
+        kind = symbols["info"] & 0xF
+        shndx = symbols["shndx"].astype(np.int64)
+        # 정의된(섹션이 있는) 심볼만 (undefined, 섹션/파일 심볼, 절대/공통 심볼 제외)
+        valid = (shndx > 0) & (shndx < shnum) & (kind != _STT_SECTION) & (kind != _STT_FILE) & (symbols["name"] > 0)
+        symbols, kind, shndx = symbols[valid], kind[valid], shndx[valid]
+        names = names_from(read(headers[symtab]["link"]), symbols["name"])
+        # ARM 매핑 심볼($a, $t, $d)은 함수/변수가 아님
+        mapping = np.array([name[:1] == "$" for name in names], dtype=bool)
+        if mapping.any():
+            symbols, kind, shndx = symbols[~mapping], kind[~mapping], shndx[~mapping]
+            names = [name for name, skip in zip(names, mapping) if not skip]
+
+        starts = symbols["value"].astype(np.uint64)
+        if machine == _EM_ARM:
+            starts = np.where(kind == _STT_FUNC, starts & ~np.uint64(1), starts)  # Thumb 함수 주소의 최하위 비트 제거
+        section_ends = (headers["addr"] + headers["size"]).astype(np.uint64)[shndx]
+        ends = _extend_zero_sizes(starts, symbols["size"], section_ends)
+        # 같은 주소에 여러 심볼이 있으면 함수/변수(크기 있는 심볼), 전역 심볼 순으로 우선
+        priority = np.lexsort(((symbols["info"] >> 4) != 1, symbols["size"] == 0))
+        return cls(
+            IntervalIndex(starts[priority], ends[priority], np.asarray(names, dtype=object)[priority],
+                          np.asarray(section_names, dtype=object)[shndx][priority]),
+            sections,
+            source=path,
+        )
+
+    @classmethod
+    def from_map(cls, path):
+        """
+        GNU ld 링커 맵(-Wl,-Map)의 'Linker script and memory map' 부분으로 인덱스를 만드는 함수
+        이름이 길어 주소가 다음 줄로 넘어간 섹션도 처리한다.
+        """
+        output_section = re.compile(r"^(\S+)\s+0x([0-9a-fA-F]+)\s+0x([0-9a-fA-F]+)")
+        input_section = re.compile(r"^ (\S+)\s+0x([0-9a-fA-F]+)\s+0x([0-9a-fA-F]+)(?:\s+(.+))?$")
+        wrapped = re.compile(r"^\s+0x([0-9a-fA-F]+)\s+0x([0-9a-fA-F]+)(?:\s+(.+))?$")
+        symbol_line = re.compile(r"^\s+0x([0-9a-fA-F]+)\s+([A-Za-z_.$][\w.$@]*)\s*$")
+
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            lines = f.read().splitlines()
+        start = next((i + 1 for i, line in enumerate(lines) if line.startswith("Linker script and memory map")), 0)
+
+        sections = []  # (start, end, name)
+        regions = []  # (start, end, 입력 섹션 이름, 오브젝트 파일)
+        symbols = []  # (주소, 이름, 출력 섹션, 입력 섹션 끝)
+        current, region_end, pending = "", 0, None
+        for line in lines[start:]:
+            if not line.strip():
+                continue
+            if pending is not None:
+                match = wrapped.match(line)
+                if match:
+                    line = f"{pending}{line}"
+                pending = None
+            if not line[0].isspace():
+                match = output_section.match(line)
+                if match:
+                    address, size = int(match.group(2), 16), int(match.group(3), 16)
+                    current = match.group(1)
+                    if size and not current.startswith(_NON_ALLOC_SECTIONS):
+                        sections.append((address, address + size, current))
+                elif re.match(r"^\S+\s*$", line):
+                    pending, current = line.rstrip(), line.strip()
+                continue
+            if current.startswith(_NON_ALLOC_SECTIONS):
+                continue
+            match = input_section.match(line)
+            if match:
+                address, size = int(match.group(2), 16), int(match.group(3), 16)
+                region_end = address + size
+                if size and address and match.group(1) != "*fill*":
+                    regions.append((address, region_end, match.group(1), (match.group(4) or "").strip()))
+                continue
+            if re.match(r"^ \S+\s*$", line):
+                pending = line.rstrip()  # 다음 줄에 주소/크기가 오는 긴 입력 섹션 이름
+                continue
+            match = symbol_line.match(line)
+            if match:
+                address = int(match.group(1), 16)
+                symbols.append((address, match.group(2), current, max(region_end, address)))
+
+        if symbols:
+            starts, names, details, limits = zip(*symbols)
+            ends = _extend_zero_sizes(starts, np.zeros(len(starts), dtype=np.uint64), limits)
+            symbol_index = IntervalIndex(starts, ends, names, details)
+        else:
+            symbol_index = IntervalIndex([], [], [])
+        return cls(
+            symbol_index,
+            IntervalIndex(*zip(*sections)) if sections else IntervalIndex([], [], []),
+            IntervalIndex([r[0] for r in regions], [r[1] for r in regions],
+                          [r[2] for r in regions], [r[3] for r in regions]),
+            source=path,
+        )
+
+    def resolve(self, addresses):
+        """
+        주소 배열을 심볼+오프셋과 섹션으로 변환하는 함수 (벡터 연산, 주소 수에 비례하는 이진 탐색만 수행)
+        Returns:
+            pd.DataFrame: address, symbol, offset, location('symbol+0x10'), section, object
+                          (심볼을 찾지 못한 주소는 symbol이 빈 문자열)
+        """
+        addresses = np.asarray(addresses, dtype=np.uint64)
+        n = len(addresses)
+        symbol = np.full(n, "", dtype=object)
+        offset = np.zeros(n, dtype=np.uint64)
+        section = np.full(n, "", dtype=object)
+        obj = np.full(n, "", dtype=object)
+
+        positions, hit = self.symbols.lookup(addresses)
+        symbol[hit] = self.symbols.names[positions[hit]]
+        offset[hit] = addresses[hit] - self.symbols.starts[positions[hit]]
+
+        # 심볼이 없는 주소는 링커 맵의 입력 섹션(.text.foo 등)으로 표시
+        positions, region_hit = self.regions.lookup(addresses)
+        fallback = region_hit & ~hit
+        symbol[fallback] = self.regions.names[positions[fallback]]
+        offset[fallback] = addresses[fallback] - self.regions.starts[positions[fallback]]
+        obj[region_hit] = self.regions.details[positions[region_hit]]
+
+        positions, section_hit = self.sections.lookup(addresses)
+        section[section_hit] = self.sections.names[positions[section_hit]]
+
+        found = hit | fallback
+        location = np.full(n, "", dtype=object)
+        if found.any():
+            location[found] = [f"{name}+{off:#x}" for name, off in zip(symbol[found], offset[found].tolist())]
+        return pd.DataFrame({
+            "address": [f"0x{address:08X}" for address in addresses.tolist()],
+            "symbol": symbol,
+            "offset": offset,
+            "location": location,
+            "section": section,
+            "object": obj,
+        })
+
+
+def parse_addresses(text):
+    """
+    텍스트(크래시 로그, 주소 목록)에서 주소를 순서대로 추출하는 함수
+    0x로 시작하는 16진수와 0x 없는 8/16자리 16진수(예: 백트레이스의 pc 값)를 주소로 본다.
+    0x 없는 토큰이 숫자로만 되어 있으면 'pc 00012345', '#03 00012345'처럼 백트레이스 문맥일 때만 주소로 본다.
+    Returns:
+        np.ndarray: uint64 주소 배열
+    """
+    values = [int(m.group(m.lastgroup), 16) for m in _ADDRESS.finditer(text)]
+    return np.array([v for v in values if v < 2 ** 64], dtype=np.uint64)
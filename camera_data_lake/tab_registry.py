@@ -0,0 +1,64 @@
+# tab_registry.py
+import importlib
+import sys
+import threading
+import time
+import streamlit as st
+
+# 프로세스 전체의 탭 모듈 로드 시간 기록 {모듈 이름: 초}
+_import_lock = threading.Lock()
+_import_times = {}
+
+
+def import_tab_module(module_name):
+    """
+    탭 모듈을 처음 필요할 때 import하고 걸린 시간을 기록하는 함수
+    (openai, langchain, cv2, wavedrom 같은 무거운 라이브러리는 해당 탭을 처음 열 때만 로드됨)
+    """
+    with _import_lock:
+        if module_name in sys.modules:
+            return sys.modules[module_name]
+        start = time.perf_counter()
+        module = importlib.import_module(module_name)
+        _import_times[module_name] = time.perf_counter() - start
+        return module
+
+
+def import_times():
+    """지금까지 로드한 탭 모듈별 import 시간 (로드 순서대로)"""
+    with _import_lock:
+        return dict(_import_times)
+
+
+class TabRegistry:
+    """
+    탭 이름 -> (모듈 이름, 클래스 이름) 등록부
+    - 모듈은 탭을 처음 선택할 때 import
+    - 탭 객체는 세션마다 한 번만 만들고 st.session_state에 보관하여 rerun마다 다시 만들지 않음
+    """
+    def __init__(self, tabs, state_key="tab_instances"):
+        self.tabs = tabs
+        self.state_key = state_key
+
+    def labels(self):
+        return list(self.tabs.keys())
+
+    def get_class(self, label):
+        module_name, class_name = self.tabs[label]
+        return getattr(import_tab_module(module_name), class_name)
+
+    def get_instance(self, label):
+        """현재 세션의 탭 객체 (없으면 생성)"""
+        instances = st.session_state.setdefault(self.state_key, {})
+        if label not in instances:
+            instances[label] = self.get_class(label)()
+        return instances[label]
+
+    def render_import_times(self):
+        """사이드바에 탭 모듈 로드 시간을 표시 (시작 시간 회귀 확인용)"""
+        times = import_times()
+        if not times:
+            return
+        with st.sidebar.expander("모듈 로드 시간"):
+            for module_name, elapsed in times.items():
+                st.caption(f"{module_name}: {elapsed * 1000:.0f}ms")
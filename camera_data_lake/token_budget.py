@@ -0,0 +1,174 @@
+# token_budget.py
+from attachment_pipeline import count_tokens
+
+FILE_PAYLOAD_PREFIX = "파일 내용:"
+QUESTION_MARKER = "\n\n질문: "
+
+
+def strip_file_payload(content):
+    """'파일 내용: ...\\n\\n질문: ...' 형식의 메시지에서 파일 내용을 빼고 질문만 남긴다"""
+    if content.startswith(FILE_PAYLOAD_PREFIX) and QUESTION_MARKER in content:
+        return content.split(QUESTION_MARKER, 1)[1]
+    return content
+
+
+def truncate_to_tokens(text, max_tokens, suffix="\n...(생략)"):
+    """
+    text를 max_tokens 이하가 되도록 뒷부분을 잘라내는 함수 (잘린 경우 suffix를 붙임)
+    """
+    if count_tokens(text) <= max_tokens:
+        return text
+    budget = max_tokens - count_tokens(suffix)
+    if budget <= 0:
+        return ""
+    # budget 이하인 가장 긴 앞부분을 이분 탐색
+    lo, hi = 0, len(text)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if count_tokens(text[:mid]) <= budget:
+            lo = mid
+        else:
+            hi = mid - 1
+    return text[:lo] + suffix
+
+
+class TokenBudget:
+    """
+    챗봇에 보낼 대화 기록을 토큰 예산 안으로 맞추는 클래스 (TabGPTChatbot, CameraChatbotMistral7b 공용)
+    - 최근 keep_recent개 메시지는 예산 안에서 그대로 유지
+    - 그보다 오래된 메시지와 예산에 들어가지 않는 최근 메시지는 요약하며,
+      요약은 state에 저장해 새로 밀려난 메시지만 덧붙여 갱신
+    - 이전 턴에 들어간 첨부 파일 내용은 제거하고 마지막 질문에만 포함
+    - 마지막 질문 자체가 예산을 넘으면 질문은 남기고 앞쪽의 첨부/검색 내용부터 자름
+    """
+    def __init__(self, max_tokens=4000, keep_recent=6, summary_tokens=400):
+        self.max_tokens = max_tokens
+        self.keep_recent = keep_recent
+        self.summary_tokens = summary_tokens
+
+    def _format_turns(self, messages):
+        return "\n".join(f"{msg['role']}: {strip_file_payload(msg['content'])}" for msg in messages)
+
+    def _fallback_summary(self, previous, messages):
+        """요약 모델이 없을 때 각 메시지 앞부분만 이어 붙이고 뒤쪽(최근)부터 summary_tokens 이내로 자른다"""
+        lines = ([previous] if previous else []) + [
+            f"{msg['role']}: {strip_file_payload(msg['content'])[:200]}" for msg in messages
+        ]
+        kept, used = [], 0
+        for line in reversed(lines):
+            tokens = count_tokens(line)
+            if used + tokens > self.summary_tokens:
+                break
+            kept.append(line)
+            used += tokens
+        return "\n".join(reversed(kept))
+
+    def update_summary(self, old_messages, state, summarize=None):
+        """
+        요약 범위 밖으로 새로 밀려난 메시지만 기존 요약에 합쳐 요약을 갱신하는 함수
+        Args:
+            old_messages: 요약 대상인 오래된 메시지 목록 (앞에서부터 누적)
+            state: {"covered": 요약에 반영된 메시지 수, "text": 요약} 캐시 (세션 상태에 보관)
+            summarize: 텍스트를 받아 요약 문자열을 반환하는 함수 (없거나 None을 반환하면 단순 축약)
+        """
+        covered = state.get("covered", 0)
+        if covered > len(old_messages):
+            # 대화가 초기화된 경우
+            covered = 0
+            state["text"] = ""
+        if covered == len(old_messages):
+            return state.get("text", "")
+
+        new_messages = old_messages[covered:]
+        previous = state.get("text", "")
+        summary = None
+        if summarize is not None:
+            text = (f"이전 요약:\n{previous}\n\n" if previous else "") + self._format_turns(new_messages)
+            try:
+                summary = summarize(text, self.summary_tokens)
+            except Exception:
+                summary = None
+        if not summary:
+            summary = self._fallback_summary(previous, new_messages)
+
+        state["covered"] = len(old_messages)
+        state["text"] = summary
+        return summary
+
+    def _trim_final(self, final_message, max_tokens):
+        """이번 질문 메시지를 max_tokens 이하로 줄임 (질문 앞의 파일/로그/코드 내용을 먼저 자름)"""
+        content = final_message["content"]
+        if count_tokens(content) <= max_tokens:
+            return final_message
+        if QUESTION_MARKER in content:
+            context, question = content.rsplit(QUESTION_MARKER, 1)
+            question = QUESTION_MARKER + question
+            context_budget = max_tokens - count_tokens(question)
+            if context_budget > 0:
+                content = truncate_to_tokens(context, context_budget) + question
+            else:
+                content = truncate_to_tokens(question.lstrip(), max_tokens)
+        else:
+            content = truncate_to_tokens(content, max_tokens)
+        return {**final_message, "content": content}
+
+    def build(self, history, final_message, state, summarize=None):
+        """
+        토큰 예산에 맞춘 메시지 목록을 만드는 함수
+        Args:
+            history: st.session_state.messages (마지막 질문 포함 가능)
+            final_message: 첨부 파일 내용을 포함한 이번 질문 메시지
+            state: 요약 캐시 dict
+            summarize: 요약 함수 (summarize(text, max_tokens) -> str)
+        Returns:
+            tuple: (메시지 목록, 통계 dict)
+        """
+        history = list(history)
+        # 이번 질문이 이미 기록에 추가되어 있으면 중복이므로 제외
+        if history and history[-1]["role"] == "user" and history[-1]["content"] == strip_file_payload(final_message["content"]):
+            history = history[:-1]
+
+        history = [{"role": msg["role"], "content": strip_file_payload(msg["content"])} for msg in history]
+
+        # 이전 대화가 있으면 요약이 들어갈 자리를 남기고 이번 질문을 자름
+        original_tokens = count_tokens(final_message["content"])
+        final_message = self._trim_final(final_message, self.max_tokens - (self.summary_tokens if history else 0))
+        final_tokens = count_tokens(final_message["content"])
+
+        split = max(len(history) - self.keep_recent, 0)
+        covered = state.get("covered", 0)
+        if covered <= len(history):
+            # 이전 턴에 예산 때문에 요약으로 넘어간 메시지는 계속 요약에 둠
+            split = max(split, covered)
+        while True:
+            old, recent = history[:split], history[split:]
+            summary = self.update_summary(old, state, summarize)
+            summary_message = None
+            if summary:
+                # 요약 모델이 요청보다 길게 답한 경우에도 이번 질문과 함께 예산 안에 들어가도록 자름
+                content = truncate_to_tokens(f"이전 대화 요약:\n{summary}", max(self.max_tokens - final_tokens, 0))
+                summary_message = {"role": "system", "content": content} if content else None
+            used = final_tokens + (count_tokens(summary_message["content"]) if summary_message else 0)
+
+            # 최근 메시지는 뒤에서부터 예산 안에서만 유지
+            kept = []
+            for msg in reversed(recent):
+                tokens = count_tokens(msg["content"])
+                if used + tokens > self.max_tokens:
+                    break
+                kept.append(msg)
+                used += tokens
+            kept.reverse()
+            if len(kept) == len(recent):
+                break
+            # 예산에 들어가지 않은 최근 메시지는 버리지 않고 요약에 합침
+            split += len(recent) - len(kept)
+
+        messages = ([summary_message] if summary_message else []) + kept + [final_message]
+        stats = {
+            "prompt_tokens": used,
+            "recent_turns": len(kept),
+            "summarized_turns": len(old),
+            "trimmed_tokens": original_tokens - final_tokens,
+        }
+        return messages, stats
@@ -1,54 +1,150 @@
-from sentence_transformers import SentenceTransformer
-from langchain.vectorstores import FAISS  # 벡터 데이터베이스 사용 (예: FAISS)
+# vector_store.py
+# mk_vector_store.py가 만든 코드 인덱스(faiss_index.idx, code_id_mapping.pkl)를 읽어 질문과 관련된 코드 스니펫을 검색
+# 사용 예:
+#   python vector_store.py --index-dir .
+import argparse
+import json
+import os
+import pickle
+import time
 
-# Hugging Face의 SentenceTransformer 모델 로드 (무료 모델 사용)
-embeddings = SentenceTransformer('all-MiniLM-L6-v2')
+from lexical_index import LexicalIndex, reciprocal_rank_fusion
+from mk_vector_store import INDEX_FILE, LEXICAL_FILE, MAPPING_FILE, MANIFEST_FILE, get_code_embedder, set_search_params
 
-# 예시 데이터 (텍스트 목록)
-documents = ["문서 1 내용", "문서 2 내용", "문서 3 내용"]
+DEFAULT_CODE_MODEL = "microsoft/codebert-base"  # manifest가 없는 예전 인덱스의 임베딩 모델
+SEARCH_MODES = ("hybrid", "vector", "lexical")
 
-# 문서 임베딩 생성
-document_embeddings = embeddings.encode(documents)
 
-# FAISS 벡터 스토어 생성
-vector_store = FAISS.from_documents(documents, embeddings)
+class CodeVectorStore:
+    """
+    코드 인덱스 검색기
+    - FAISS 인덱스는 메모리 맵(IO_FLAG_MMAP)으로 열어 전체를 메모리에 복사하지 않음 (flat, ivfpq, hnsw 모두 지원)
+    - nprobe(IVF), ef_search(HNSW)로 검색 정확도와 속도를 조절
+    - manifest가 있으면 청크의 파일 경로/함수 이름/줄 번호를 출처로 함께 반환
+    - BM25 색인이 있으면 벡터 검색과 식별자 검색 결과를 RRF로 합친 hybrid 검색 제공
+    """
+    def __init__(self, index_dir=".", embedder=None, nprobe=16, ef_search=64):
+        import faiss
 
-# 로컬에 벡터 스토어 저장 (예: 'vector_store' 디렉터리)
-vector_store.save_local("vector_store")
+        self.index_dir = index_dir
+        self.index = faiss.read_index(os.path.join(index_dir, INDEX_FILE), faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+        set_search_params(self.index, nprobe=nprobe, ef_search=ef_search)
+        with open(os.path.join(index_dir, MAPPING_FILE), "rb") as f:
+            self.code_id_mapping = pickle.load(f)
 
+        lexical_path = os.path.join(index_dir, LEXICAL_FILE)
+        self.lexical = LexicalIndex.load(lexical_path) if os.path.exists(lexical_path) else None
 
-######################## chat bot ####################
-# 벡터 스토어 로드
-index = faiss.read_index('faiss_index.idx')
+        self.chunks = None
+        model_name = DEFAULT_CODE_MODEL
+        manifest_path = os.path.join(index_dir, MANIFEST_FILE)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            self.chunks = manifest["chunks"]
+            model_name = manifest.get("model", model_name)
+        self._check_consistent()
 
-# 코드 매핑 로드
-with open('code_id_mapping.pkl', 'rb') as f:
-    code_id_mapping = pickle.load(f)
+        # 인덱스를 만든 모델과 같은 모델로 질문을 임베딩해야 함
+        self.embedder = embedder if embedder is not None else get_code_embedder(
+            "hashing" if model_name.startswith("hashing") else model_name
+        )
 
-# 임베딩 모델 로드
-model = SentenceTransformer('microsoft/codebert-base')
+    def _check_consistent(self):
+        """
+        파일들이 같은 인덱싱 결과인지 청크 수로 확인
+        mk_vector_store는 파일을 하나씩 교체하므로 갱신 도중에 읽으면 새 FAISS 인덱스와 이전 BM25/manifest가 섞일 수 있다.
+        """
+        counts = {"faiss": self.index.ntotal, "mapping": len(self.code_id_mapping)}
+        if self.lexical is not None:
+            counts["bm25"] = self.lexical.n_docs
+        if self.chunks is not None:
+            counts["manifest"] = len(self.chunks)
+        if len(set(counts.values())) > 1:
+            raise ValueError(f"코드 인덱스 파일의 청크 수가 서로 다릅니다 {counts}. 인덱스를 갱신하는 중이면 잠시 후 다시 시도하세요.")
 
-# 로그 데이터 로드
-log_data = parse_log_file('path_to_log_file.log')
+    def source(self, chunk_id):
+        """청크의 출처 정보 (manifest가 없으면 id만)"""
+        if self.chunks is None or chunk_id >= len(self.chunks):
+            return {"id": chunk_id, "path": None, "symbol": None, "start_line": None, "end_line": None}
+        chunk = self.chunks[chunk_id]
+        return {key: chunk.get(key) for key in ("id", "path", "symbol", "start_line", "end_line")}
 
-# 챗봇 인터페이스 실행
-while True:
-    question = input("질문을 입력하세요 (종료하려면 'exit'):")
-    if question.lower() == 'exit':
-        break
+    def vector_search(self, question, top_k):
+        """임베딩 거리 기준 상위 청크 (id 배열, 거리 배열)"""
+        query = self.embedder.encode([question]).astype("float32")
+        if query.shape[1] != self.index.d:
+            raise ValueError(f"임베딩 차원({query.shape[1]})이 인덱스 차원({self.index.d})과 다릅니다. 인덱스를 다시 생성하세요.")
+        distances, ids = self.index.search(query, min(top_k, self.index.ntotal))
+        valid = ids[0] >= 0
+        return ids[0][valid], distances[0][valid]
 
-    # 질문 임베딩 생성
-    question_embedding = model.encode([question], convert_to_numpy=True)
+    def search(self, question, top_k=5, mode="hybrid", candidates=4):
+        """
+        질문과 가까운 코드 스니펫을 검색하는 함수
+        Args:
+            mode: hybrid(벡터 + BM25, RRF 결합), vector, lexical
+            candidates: hybrid에서 각 검색기가 가져올 후보 수 (top_k의 배수)
+        Returns:
+            tuple: (결과 목록 [{"text", "score", "retriever", 출처 정보...}], 검색 시간(초))
+        """
+        start = time.perf_counter()
+        if self.lexical is None and mode != "vector":
+            mode = "vector"
 
-    # 유사한 코드 스니펫 검색
-    k = 5
-    D, I = index.search(question_embedding, k)
-    retrieved_codes = [code_id_mapping[i] for i in I[0]]
+        if mode == "vector":
+            ids, scores = self.vector_search(question, top_k)
+            ranked = [(int(i), float(d)) for i, d in zip(ids, scores)]
+        elif mode == "lexical":
+            ids, scores = self.lexical.search(question, top_k)
+            ranked = [(int(i), float(s)) for i, s in zip(ids, scores)]
+        else:
+            vector_ids, _ = self.vector_search(question, top_k * candidates)
+            lexical_ids, _ = self.lexical.search(question, top_k * candidates)
+            ranked = reciprocal_rank_fusion([vector_ids, lexical_ids], top_k=top_k)
 
-    # LLM 입력 생성
-    context = "\n".join(retrieved_codes)
-    llm_input = f"질문: {question}\n\n로그 데이터:\n{log_data}\n\n관련 코드:\n{context}"
+        results = []
+        for chunk_id, score in ranked:
+            result = self.source(chunk_id)
+            result["text"] = self.code_id_mapping[chunk_id]
+            result["score"] = score
+            result["retriever"] = mode
+            results.append(result)
+        return results, time.perf_counter() - start
 
-    # 답변 생성
-    response = llm(llm_input)
-    print(f"답변: {response}")
+
+def format_source(result):
+    """검색 결과의 출처를 'path:start-end (symbol)' 형식으로 표시"""
+    if result.get("path") is None:
+        return f"chunk #{result['id']}"
+    text = f"{result['path']}:{result['start_line']}-{result['end_line']}"
+    return f"{text} ({result['symbol']})" if result.get("symbol") else text
+
+
+def format_context(results):
+    """검색 결과를 LLM 프롬프트에 넣을 문자열로 변환"""
+    return "\n\n".join(f"// {format_source(r)}\n{r['text']}" for r in results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="코드 인덱스 검색")
+    parser.add_argument("--index-dir", default=".")
+    parser.add_argument("-k", "--top-k", type=int, default=5)
+    parser.add_argument("--nprobe", type=int, default=16, help="IVF 인덱스에서 탐색할 클러스터 수")
+    parser.add_argument("--ef-search", type=int, default=64, help="HNSW 인덱스의 탐색 후보 수")
+    parser.add_argument("--mode", choices=SEARCH_MODES, default="hybrid", help="검색 방식")
+    args = parser.parse_args()
+
+    store = CodeVectorStore(args.index_dir, nprobe=args.nprobe, ef_search=args.ef_search)
+    while True:
+        question = input("질문을 입력하세요 (종료하려면 'exit'):")
+        if question.lower() == "exit":
+            break
+        results, elapsed = store.search(question, args.top_k, mode=args.mode)
+        print(f"검색 시간: {elapsed * 1000:.1f}ms")
+        for result in results:
+            print(f"- {format_source(result)} (점수 {result['score']:.3f})")
+
+
+if __name__ == "__main__":
+    main()